@@ -1,10 +1,21 @@
 """the base objects and functions that are independent of the GUI,
-  for a ##FUTURE command line program flavour"""
+  also the base for the command line program flavour (timestamper_cli.py)"""
 
 import os,sys,re,time,datetime
+import array,itertools,bisect,copy
 import calendar                 #the inverse of time.gmtime -> calendar.timegm is here
 
 import config
+import datastamp                #time.strptime for the datafile stamps, fast
+import fnamestamp               #the stamps in file names, prefiltered patterns
+import mediaprefs               #the nearest MYFILENAME_MEDIAPREFS, shared and cached
+import perftrace                #timing spans and counters, switched off: no cost
+import tzkey                    #the local timezone the caches of local times depend on
+
+try:
+  import numpy                  #optional: vectorized batch comparison (CompareEpochColumns)
+except ImportError:
+  numpy = None
 
 RUNNING_WIN = None
 if   sys.platform.startswith("win"):   RUNNING_WIN = True
@@ -16,9 +27,21 @@ else: assert 0,"Not tested on %s" % sys.platform
 #----------------------------------------------------------------------
 #CellObject, the lowest object for one files value for one column (cell)
 
+def StructSortKey(structtime):
+  """a time.struct_time as ONE INT in the same order as comparing the 9 fields,
+    much cheaper to compare (and to keep) than the struct itself
+    ! 2 digits per field are plenty, even for month 13 from a broken stamp"""
+  year,month,day, hour,minute,second, wday,yday, isdst = structtime[:9]
+  return ((((((((year*100 + month)*100 + day)*100 + hour)*100 + minute)*100 + second)
+            *10 + wday)*1000 + yday)*10 + isdst+1)
+
 #===== CLASS 0: THE BASE =====
 class CellObject:
-  """the root CellObject, an abstract base class"""
+  """the root CellObject, an abstract base class
+    ! all CellObjects have __slots__: there are several per file, a __dict__ each
+      would be the biggest part of them"""
+  
+  __slots__ = ()
   
   #tuple -> colour from the windows library, to be supplied by the main program
   colourMaker = None
@@ -37,14 +60,47 @@ class CellObject:
   #only for TIMESTAMPs !
   def transferGet(self):
     raise NotImplementedError("transferGet should only be called for timestamps (which must implement it)")
-  def transferSet(self, input):
+  def transferSet(self, input, batch=None):
+    """batch: a transfer.TransferBatch that sets the mtimes later, None: at once"""
     raise NotImplementedError("transferSet should only be called for timestamps (which must implement it)")
+  def transferPlan(self, input):
+    raise NotImplementedError("transferPlan should only be called for timestamps (which must implement it)")
+
 
+#SHARED COLOURS (flyweights): one colour object per colour tuple and colourMaker,
+#  every file with that colour gets the same one (a wx.Colour per cell would be a lot)
+_sharedcolours = {}
+
+def SharedColour(coltuple):
+  """CellObject.colourMaker(coltuple), made only once"""
+  key = (coltuple, CellObject.colourMaker)
+  colour = _sharedcolours.get(key)
+  if colour is None:
+    colour = _sharedcolours[key] = CellObject.colourMaker(coltuple)
+  return colour
+
+def SeverityColours():
+  """{severity: colour} for config.GUI_COLOUR_SEVERITIES, one dict for all files"""
+  key = ("severities", CellObject.colourMaker)
+  colours = _sharedcolours.get(key)
+  if colours is None:
+    colours = _sharedcolours[key] = {sev:SharedColour(col) for sev,col in config.GUI_COLOUR_SEVERITIES.items()}
+  return colours
+
+def ErrorDisplay():
+  """(text, colour) of all stamps that can't be shown (month 13)"""
+  key = ("error", CellObject.colourMaker)
+  display = _sharedcolours.get(key)
+  if display is None:
+    display = _sharedcolours[key] = (config.GUI_TIMESTAMP_ERROR, SharedColour(config.GUI_COLOUR_ERROR))
+  return display
 
 #===== CLASS 1: A DUMMY WITH ONLY 2 VALUES =====
 class CellObjectDummy (CellObject):
   """a DUMMY CellObject that supplies fixed answers to the normal questions format/sort"""
   
+  __slots__ = ("dispstring", "sortkey")
+  
   def __init__(self, dispstring,sortkey):
     self.dispstring = dispstring
     self.sortkey    = sortkey
@@ -70,10 +126,10 @@ CODummyDirStr = CellObjectDummy("","")          #Columns not relevant for Subdir
                                                 #(no display, sorting as "")
 """
 
-CODummyFileTime = CellObjectDummy(config.GUI_TIMESTAMP_DUMMY, time.gmtime(1))
+CODummyFileTime = CellObjectDummy(config.GUI_TIMESTAMP_DUMMY, StructSortKey(time.gmtime(1)))
   #Files that do not have this Timestamp
   #  - display from config
-  #  - sortkey must be a struct,
+  #  - sortkey must be a (compact) struct,
   #    DIRs are 0 seconds and FILEs 1 second after epoch
   #    ~>see "Note on DUMMY VALUES for TIMESTAMPS"
   #      and class CellObjectProxyStamp
@@ -87,13 +143,15 @@ class CellObjectProxy (CellObject):
     they do not store any values and therefore require them to be supplied
     to the individual methods
   """
-  pass
+  __slots__ = ()
 
 class CellObjectProxyMarker (CellObjectProxy):
   """a proxy for the MARKER column, the first to return a colour"""
   
+  __slots__ = ("mycolour",)
+  
   def __init__(self):
-    self.mycolour = CellObject.colourMaker(config.GUI_COLOUR_MARK)
+    self.mycolour = SharedColour(config.GUI_COLOUR_MARK)
   
   def getDisplay(self, value):
     """first time we wish for a colour :-)"""
@@ -106,6 +164,8 @@ class CellObjectProxyMarker (CellObjectProxy):
 class CellObjectProxyString (CellObjectProxy):
   """a proxy for STRING type columns, very simple conversions"""
   
+  __slots__ = ()
+  
   #def __init__(self):
   #  pass
   
@@ -120,6 +180,8 @@ class CellObjectProxyString (CellObjectProxy):
 class CellObjectProxyInt (CellObjectProxy):
   """a proxy for INT type columns, very simple conversions"""
   
+  __slots__ = ()
+  
   #def __init__(self):
   #  pass
   
@@ -134,6 +196,8 @@ class CellObjectProxyInt (CellObjectProxy):
 class CellObjectProxyBytes (CellObjectProxy):
   """a proxy for 'SIZE in Bytes' columns, fancy formatting"""
   
+  __slots__ = ()
+  
   thousands_sep = config.GUI_BYTES_SEPARATOR
   
   #def __init__(self):
@@ -151,6 +215,8 @@ class CellObjectProxyBytes (CellObjectProxy):
 class CellObjectProxyOutput (CellObjectProxy):
   """a proxy for the OUTPUT column, outputs are None or Tuples from ANALYSE"""
   
+  __slots__ = ()
+  
   #def __init__(self):
   #  pass
   
@@ -165,17 +231,22 @@ class CellObjectProxyOutput (CellObjectProxy):
     text = "%s:%d" % (severity,seconds)
     return (text, colour)
   
+  SECONDS_RANGE = 10**12       #more than year 1 to 9999, so (severity, seconds) fits in one int
+  
   def getSortKey(self, value):
-    """sort by distance means absolute difference !"""
-    if not value: return (-1,0)
+    """sort by distance means absolute difference !
+      (severity, seconds) compact as one int"""
+    if not value: return -1*self.SECONDS_RANGE
     
     severity, colour, seconds = value
     severitynum = int(severity[0])
-    return (severitynum,abs(seconds))
+    return severitynum*self.SECONDS_RANGE + abs(seconds)
 
 class CellObjectProxyStamp (CellObjectProxy):
   """a proxy for all TIMESTAMP columns, very fancy formatting !"""
   
+  __slots__ = ()
+  
   #def __init__(self):
   #  pass
   
@@ -188,13 +259,16 @@ class CellObjectProxyStamp (CellObjectProxy):
     """all non-zero Values are full objects, only None from DIRs will come here"""
     #DIRs are 0 seconds and FILEs 1 second after epoch (see big comment below)
     assert value is None
-    return time.gmtime(0)
+    return self.DIRSORTKEY
+  
+  DIRSORTKEY = StructSortKey(time.gmtime(0))
 
   #Note on DUMMY VALUES for TIMESTAMPS
   #! we can't compare ints like -2 and -1 to timestructs;
   #  but we don't want the inefficiency of converting back to ints either
+  #  (StructSortKey is no epoch, it packs the struct's fields into one int)
   #
-  #! DUMMY Values must therefore be in time.struct_time format;
+  #! DUMMY Values must therefore be in (compact) time.struct_time format;
   #  which means we can't go negative before the epoch
   #=>so for DIRS (which never have timestamps)
   #  to come before FILES (those which do not have this particular stamp)
@@ -234,17 +308,17 @@ def DEBUGASSERT2STRUCTS(txt_prefix,txt_transop, struct1,struct2):
 class CellObjectStamp (CellObject):
   """the core of all TimeStamp classes is to use time.struct_time structures"""
   
+  __slots__ = ("my_structtime", "action_colour")
+  
   def __init__(self):
     self.my_structtime = None           #set by subclasses !
     self.action_colour = None           #[possibly] set by ActionColourise
-    
-    self.errordisplay = (config.GUI_TIMESTAMP_ERROR, CellObject.colourMaker(config.GUI_COLOUR_ERROR))
   
   def getDisplay(self):
     try:
       text = time.strftime( config.GUI_TIMESTAMP_FORMAT, self.my_structtime )
     except ValueError:
-      return self.errordisplay
+      return ErrorDisplay()             #the same tuple for all
     
     if self.action_colour:
       return (text,self.action_colour)
@@ -252,16 +326,16 @@ class CellObjectStamp (CellObject):
       return text
   
   def getSortKey(self):
-    """these timestamps will be compared as time.struct_time,
+    """these timestamps will be compared as time.struct_time (compact),
       DUMMIES must be converted accordingly"""
       ##see 'Note on DUMMY VALUES for TIMESTAMPS'
-    return self.my_structtime
+    return StructSortKey(self.my_structtime)
   
   def transferGet(self):
     """all transfers will be based on time.struct_time structures"""
     return self.my_structtime
   
-  #def transferSet(self, input):
+  #def transferSet(self, input, batch=None):
   #  Setting is more difficult, must be done in subclass logic
   
   def setActionColour(self, colour):
@@ -274,16 +348,31 @@ class CellObjectStampStat (CellObjectStamp):
     time.struct_time structures is the same, only the conversion functions differ
     (and the stamp they are inited with)"""
   
-  def __init__(self, fullpath,statkey,statint):
+  __slots__ = ("fullpath", "statkey")
+  
+  def __init__(self, fullpath,statkey,statint, structtime=None):
     """take an integer stamp from os.stat and convert it to my 
-      internal storage format (time.struct_time)"""
+      internal storage format (time.struct_time)
+      structtime: that conversion done already (stampcache.StampCache)"""
     super().__init__()
     self.fullpath = fullpath    #full path of my file in case to write back stat data
     self.statkey = statkey      #which stat value is it ?
-    self.my_structtime = self._int2struct(statint)
+    self.my_structtime = structtime or self._int2struct(statint)
+  
+  #===== transferPlan: what transferSet would do, without doing it
+  def transferPlan(self, inputstruct):
+    """the new mtime integer for inputstruct, nothing is changed
+      raises ValueError if there is none (ctime, month=13)"""
+    if self.statkey == "st_ctime": raise ValueError("ctime can not be set")
+    
+    #convert to mtime Integer
+    statint = self._struct2int(inputstruct)
+    teststruct = self._int2struct(statint)
+    DEBUGASSERT2STRUCTS("transferSet PY double check", "_struct2int-> _int2struct->", inputstruct[:6],teststruct[:6])
+    return statint
   
   #===== transferSet for Linux-style mtime
-  def transferSet(self, inputstruct):
+  def transferSet(self, inputstruct, batch=None):
     #silently ignore if we are still trying to set ctime, forbidden in GUI
     if self.statkey == "st_ctime": return False
     
@@ -293,10 +382,13 @@ class CellObjectStampStat (CellObjectStamp):
     #THE REAL CHANGE: but also push the mtime back to the filesystem!
     
     try:
-      #convert to mtime Integer
-      statint = self._struct2int(inputstruct)
-      teststruct = self._int2struct(statint)
-      DEBUGASSERT2STRUCTS("transferSet PY double check", "_struct2int-> _int2struct->", inputstruct[:6],teststruct[:6])
+      #convert to mtime Integer (with the double check)
+      statint = self.transferPlan(inputstruct)
+      
+      #BATCH: the TransferBatch sets all mtimes at once (and reports failures per file)
+      if batch is not None:
+        batch.AddMtime(self, statint)
+        return True
     
       #SET DATE VALUES (%%internal: like in touchplus.py)
       mystat = os.stat(self.fullpath)
@@ -325,8 +417,10 @@ class CellObjectStampStat (CellObjectStamp):
     raise NotImplementedError("the 2 subclasses of CellObjectStampStat for local/utc will implement _struct2int differently")
 
 class CellObjectStampLocal (CellObjectStampStat):
-  def __init__(self, fullpath,statkey,statint):
-    super().__init__(fullpath,statkey,statint)
+  __slots__ = ()
+  
+  def __init__(self, fullpath,statkey,statint, structtime=None):
+    super().__init__(fullpath,statkey,statint, structtime)
   
   #===== stat-ints are considered GMT <=> CALLBACKS for local times
   def _int2struct(self, statint):
@@ -337,8 +431,10 @@ class CellObjectStampLocal (CellObjectStampStat):
     return int(time.mktime(structtime))
 
 class CellObjectStampGmt (CellObjectStampStat):
-  def __init__(self, fullpath,statkey,statint):
-    super().__init__(fullpath,statkey,statint)
+  __slots__ = ()
+  
+  def __init__(self, fullpath,statkey,statint, structtime=None):
+    super().__init__(fullpath,statkey,statint, structtime)
   
   #===== stat-ints are considered GMT <=> CALLBACKS for structs also in GMT
   def _int2struct(self, statint):
@@ -354,7 +450,9 @@ class CellObjectStampLinux (CellObjectStamp):
     only needs to be a Wrapper Object when running Windows for FAT
   """
   
-  def __init__(self, fsutc,dstnow, cellobj_local):
+  __slots__ = ("dstnow", "cellobj_local")
+  
+  def __init__(self, fsutc,dstnow, cellobj_local, structtime=None):
     super().__init__()
     
     assert RUNNING_WIN,"No need for this Wrapper Class when running Linux, use cellobj_local above"
@@ -366,7 +464,7 @@ class CellObjectStampLinux (CellObjectStamp):
     self.cellobj_local = cellobj_local
     structtime_local   = cellobj_local.transferGet()
     
-    self.my_structtime = self.linux_onwin_fat_formula(structtime_local, inversion=1)
+    self.my_structtime = structtime or self.linux_onwin_fat_formula(structtime_local, inversion=1)
   
   def linux_onwin_fat_formula(self, structtimeinput, inversion):
     """the Localtime from TS1 is already quite close,
@@ -389,15 +487,23 @@ class CellObjectStampLinux (CellObjectStamp):
     
     return time.localtime(timestamp)
   
-  def transferSet(self, inputstruct):
+  def _transferResolve(self, inputstruct):
+    """the struct for TS1 that shows as inputstruct here"""
     #crazy_windows_formula this time with inversion, input is WIN, we are converting to LINUX/PY
-    self.my_structtime = self.linux_onwin_fat_formula(inputstruct, inversion=-1)
+    structtime = self.linux_onwin_fat_formula(inputstruct, inversion=-1)
     
-    teststruct = self.linux_onwin_fat_formula(self.my_structtime, inversion=1)
+    teststruct = self.linux_onwin_fat_formula(structtime, inversion=1)
     DEBUGASSERT2STRUCTS("transferSet LINUX double check", "linux_onwin_fat-1-> linux_onwin_fat+1->", inputstruct[:6],teststruct[:6])
+    return structtime
+  
+  def transferSet(self, inputstruct, batch=None):
+    self.my_structtime = self._transferResolve(inputstruct)
     
     #back to TS1 base timestamp
-    return self.cellobj_local.transferSet(self.my_structtime)
+    return self.cellobj_local.transferSet(self.my_structtime, batch)
+  
+  def transferPlan(self, inputstruct):
+    return self.cellobj_local.transferPlan( self._transferResolve(inputstruct) )
 
 class CellObjectStampWin (CellObjectStamp):
   """Windows View of Timestamps, both old and new (switched with a flag)
@@ -406,8 +512,10 @@ class CellObjectStampWin (CellObjectStamp):
     (ini file MYFILENAME_MEDIAPREFS, value timestampmode)
   """
   
+  __slots__ = ("fsutc", "dstnow", "newwin", "cellobj_filesys", "cellobj_local", "dstforfile")
+  
   @staticmethod
-  def MakeStampWinWrapper(fsutc,dstnow, newwin, cellobj_filesys,cellobj_local):
+  def MakeStampWinWrapper(fsutc,dstnow, newwin, cellobj_filesys,cellobj_local, structtime=None):
     """normally, construct a CellObjectStampWin wrapper object,
       but has the choice of returning an unwrapped object 
       if there is no conversion (and thus no need for wrapping)"""
@@ -429,9 +537,9 @@ class CellObjectStampWin (CellObjectStamp):
         return cellobj_local
     
     #===== NORMALLY: just call my constructor =====
-    return CellObjectStampWin(fsutc,dstnow, newwin, cellobj_filesys,cellobj_local)
+    return CellObjectStampWin(fsutc,dstnow, newwin, cellobj_filesys,cellobj_local, structtime)
   
-  def __init__(self, fsutc,dstnow, newwin, cellobj_filesys,cellobj_local):
+  def __init__(self, fsutc,dstnow, newwin, cellobj_filesys,cellobj_local, structtime=None):
     super().__init__()
     
       #all the Flags to crazy_windows_formula apply both ways,
@@ -450,7 +558,7 @@ class CellObjectStampWin (CellObjectStamp):
     self.dstforfile = structtime_local.tm_isdst
     assert self.dstforfile in [0,1], "structtime_local needs to contain DST information, but is %r" % self.dstforfile
     
-    self.my_structtime = self.crazy_windows_formula(structtime_filesys,structtime_local, inversion=1)
+    self.my_structtime = structtime or self.crazy_windows_formula(structtime_filesys,structtime_local, inversion=1)
   
   def dst_plusFile_minusNow(self, timestamp,inversion):
     """normally +1 add 1 hour for dstforfile, -1 subtract 1 for dstnow
@@ -553,34 +661,28 @@ class CellObjectStampWin (CellObjectStamp):
     ##DEBUG print ("dst:", retstruct.tm_isdst)
     return retstruct
   
-  def transferSet(self, inputstruct):
+  def _transferResolve(self, inputstruct):
+    """(TS1 object, its struct) that shows as inputstruct here"""
     #crazy_windows_formula this time with inversion, input is WIN, we are converting to LINUX/PY
-    self.my_structtime = self.crazy_windows_formula(inputstruct,inputstruct, inversion=-1)
+    structtime = self.crazy_windows_formula(inputstruct,inputstruct, inversion=-1)
     
-    teststruct = self.crazy_windows_formula(self.my_structtime,self.my_structtime, inversion=1)
+    teststruct = self.crazy_windows_formula(structtime,structtime, inversion=1)
     DEBUGASSERT2STRUCTS("transferSet WIN double check", "crazywin-1-> crazywin+1->", inputstruct[:6],teststruct[:6])
     
     #back to gmt or local like in the constructor...
     if not self.fsutc:          #filesystem in LOCALTIME (FAT)
-      return self.cellobj_filesys.transferSet(self.my_structtime)
+      return self.cellobj_filesys, structtime
     
     else:                       #local times (currently Germany, winter)
-      return self.cellobj_local.transferSet(self.my_structtime)
-
-_RESTR_NUM6_PURE  = "([0-9]{2})([0-9]{2})([0-9]{2})"
-_RESTR_NUM6_MINUS = "([0-9]{2})-([0-9]{2})-([0-9]{2})"
-REs_FNAMESTAMP = [
-    #yyYYMMDD -_ HHMMSS
-  re.compile("(19|20|21)?%s[_-]%s" % ((_RESTR_NUM6_PURE,)*2)),
-    #o Samsung Fotos: 20251214_120000.jpg
-    #o Samsung Shots: Screenshot_20251214_120000_Program Name.jpg
-    #o Foto Rename: phoneprefix-251214-120000 Content description.jpg
-  
-    #yyYY-MM-DD xxxxxxx HH-MM-SS
-  re.compile("(19|20|21)?%s.*%s" % ((_RESTR_NUM6_MINUS,)*2)),
-    #o XFCE FX Shot: Screenshot 2026-01-12 at 15-57-36 Startpage.png
-    #o XFCE dom0 Shot: Screenshot_2026-01-10_21-57-04.png
-]
+      return self.cellobj_local, structtime
+  
+  def transferSet(self, inputstruct, batch=None):
+    cellobj, self.my_structtime = self._transferResolve(inputstruct)
+    return cellobj.transferSet(self.my_structtime, batch)
+  
+  def transferPlan(self, inputstruct):
+    cellobj, structtime = self._transferResolve(inputstruct)
+    return cellobj.transferPlan(structtime)
 
 class CellObjectStampFname (CellObjectStamp):
   """Stamp from the Filename as may be available from modern mobile phones
@@ -589,65 +691,57 @@ class CellObjectStampFname (CellObjectStamp):
     which is too dangerous at this point
   """
   
-  def __init__(self, fname):
+  __slots__ = ("fname",)
+  
+  def __init__(self, fname, structtime=None):
     super().__init__()
     self.fname = fname
     
-    #find a matching RE for Stamps in Filenames
-    for regex in REs_FNAMESTAMP:
-      m = regex.search(fname)
-      if m:
-        grps = list(m.groups())
-        break
+    if structtime:              #found already (stampcache.StampCache)
+      self.my_structtime = structtime
+      return
     
-    else:
-      #no match with any re in the list, no timestamp in the filename
+    #find a stamp in the filename, all the patterns at once (fnamestamp.Recognize)
+    structtime = fnamestamp.Recognize(fname)
+    if structtime is None:
+      #no match with any pattern, or a wrong date 2025-13-38 (like it wasn't there)
       #do not construct a full CellObjectStampFname, use a DUMMY instead
       raise ValueError("NO-TIMESTAMP")
-
-    #match found grps (groups) is a list of 7: example Xmas Lunch 2025
-    #  ['20', '25', '12', '14', '12', '00', '00'] or
-    #  [None, '25', '12', '14', '12', '00', '00']
-    
-    century = grps[0] or "20"         #default century is 20xx
-    grps[0:2] = [ century+grps[1] ]   #full year with century, now a list of 6
     
-    """FAIL, time.struct_time does not fill in the gaps we leave (by filling with -1)
-    grps.extend( 3* [-1] )            #don't know the 3 complicated calender values, list of 9
-    grps = (int(x) for x in grps)
-    self.my_structtime = time.struct_time(grps)
-    """
-    
-    grps = (int(x) for x in grps)       #convert to int
-
-    try:
-      dt = datetime.datetime(*grps)     #convert to datetime
-      self.my_structtime = dt.timetuple() #convert to time.struct_time
-    
-    except ValueError:                  #filenames can have wrong dates 2025-13-38
-      raise ValueError("NO-TIMESTAMP")  #like it wasn't there
+    self.my_structtime = structtime
     
     ##DEBUG EVIL: self.my_structtime = time.struct_time((1950, 13, 30, 8, 51, 8, 4, 30, 0))
     ##DEBUG print (self.my_structtime)
     ##DEBUG print (time.strftime( "%Y-%m-%d %H:%M:%S", my_structtime ))
   
-  def transferSet(self, input):
+  def transferSet(self, input, batch=None):
     #should never be called, the ColumnDescriptions says no to me being a TRANSFER target
     raise NotImplementedError("transferSet to CellObjectStampFname would mean file rename, not implemented.")
     
     ##LATER: consider implementing file rename from stamp
     ##  and not just the other way round
+  
+  def transferPlan(self, input):
+    raise NotImplementedError("transferPlan to CellObjectStampFname would mean file rename, not implemented.")
 
 class CellObjectStampDatafile (CellObjectStamp):
   """Stamp my private datafile MYFILENAME_DATA
     that has been read by the Directory Object"""
   
-  def __init__(self, datafilestamp):
+  __slots__ = ()
+  
+  def __init__(self, datafilestamp, parsed=None):
+    """parsed: {datafilestamp: struct_time or None} for the whole datafile,
+      from DirectoryData.readMyFile (the stamps not in there are parsed here)"""
     super().__init__()
     
-    if datafilestamp:           #NORMAL MODE
+    if parsed and datafilestamp in parsed:      #NORMAL MODE, parsed already
+      self.my_structtime = parsed[datafilestamp]
+        #None: wrong date in my data file, dummy mode...
+    
+    elif datafilestamp:         #NORMAL MODE
       try:
-        tstruct = time.strptime(datafilestamp, config.DATA_TIMESTAMP_FORMAT)
+        tstruct = datastamp.strptime(datafilestamp, config.DATA_TIMESTAMP_FORMAT)
         self.my_structtime = tstruct
       
       except ValueError:        #wrong date in my data file, error means dummy mode...
@@ -682,10 +776,13 @@ class CellObjectStampDatafile (CellObjectStamp):
   ##def transferGet(self): only returns my_structtime anyway
   ##def setActionColour(self, colour): doesnt matter if we set the colour
 
-  def transferSet(self, inputstruct):
+  def transferSet(self, inputstruct, batch=None):
     #really easy :-) this terminates a possible DUMMY MODE, we have data now
     self.my_structtime = inputstruct
     return True         #no failure here
+  
+  def transferPlan(self, inputstruct):
+    return None         #no mtime, the datafile is written after the transfer
 
 
 #----------------------------------------------------------------------
@@ -704,6 +801,23 @@ class _fakeStat:
   st_mtime = 0
   st_ctime = 0
 
+def EntrySignature(os_direntry):
+  """a cheap signature of an os.DirEntry for the incremental GotoDir:
+    if it is still the same, the FileData made from it is still valid
+    ! uses only what os.scandir has anyway (the stat is cached in the DirEntry
+      and will be reused by the FileData constructor)
+    ! None means: no signature, always rebuild"""
+  if os_direntry.is_file():
+    try:
+      mystat = os_direntry.stat()
+    except OSError:
+      return None
+    return ('F', mystat.st_ino, mystat.st_size, mystat.st_mtime_ns)
+      ##ctime is not part of it, the ctime columns are debug only (inactive)
+  
+  #subdirs and other have no stamps, just the name (the key) and the inode
+  return ('D' if os_direntry.is_dir() else 'x', os_direntry.inode())
+
 class FileData:
   #this RE is the rule for what column names are considered timestamps,
   #currently col_ts1_... to col_ts4...
@@ -722,16 +836,22 @@ class FileData:
     cls.allstampnames = [ colname for colname in cls.allcolnames if cls.RE_TIMESTAMP_COL.search(colname) ]
   
   def __init__(self, mydir,os_direntry):
-    #prepare colours for later Use
-    self.myseveritycolours = {sev:CellObject.colourMaker(col) for sev,col in config.GUI_COLOUR_SEVERITIES.items()}
-    
     #Files/Subdirs keep a link to their parent DIR object
     self.mydir = mydir
+    
+    self.mylazy     = False             #only normal files (not dirs, not my datafile) have lazy columns
+    self.mycached   = None              #a tuple like CacheableColumns (stampcache.StampCache)
+    self.mysortkeys = None              #colname -> sort key, made on the first sort by that column
 
     #construct my FILE object from os.DirEntry object (but retain that as well)
     self.mydirentry = os_direntry
       ##for DEBUG ?
     
+    #for the incremental GotoDir: did the entry change since I was made ?
+    self.mysignature = EntrySignature(os_direntry)
+    self.mydatafilestamp = None         #the string from my dir's datafile (files only)
+    self.mydirty = False                #set by a transfer, rebuild me in any case
+    
     ##GUIDELINES:
     ##  ! all my COLUMN DATA must have the col_... Prefix
     ##    this is how they will be found by getCellValue
@@ -746,7 +866,9 @@ class FileData:
       ##  but this file's value for the column with the name "name"
     
     #all entries accept markers [x] but DIRs and Special won't do anything with them
-    self.col_mark = False
+    #  the MARK is a bit of my directory (DirectoryData.marks) at my position in its EntryIndex,
+    #  None until the directory has indexed me (then never marked)
+    self.mypos = None
       ##LATER we could easily store UNDO data in self.col_lastmark
     
     #we start of with no OUTPUT stored, of course
@@ -779,67 +901,17 @@ class FileData:
           #ismyfile=True: special case: do not assert but fill the gaps
       
       else:                             #all other files
-        #----- TIMESTAMP(s) 1: PYTHON mtime/ctime -----
-        #even THE FIRST TIMESTAMP start off with 4 possible columns
-        #  * SOURCE: mtime or ctime (for test purposes)
-        #  * TIMEZONE: Local or GMT (for test purposes)
-        
-          ##ATTENTION, CellObjectStamp need to know the filepath
-          ##  for Updates to the STAT data !
-        self.col_ts1_modloc = CellObjectStampLocal(os_direntry.path, "st_mtime", mystat.st_mtime)     #<=MAIN COLUMN
-        self.col_ts1_modgmt = CellObjectStampGmt  (os_direntry.path, "st_mtime", mystat.st_mtime)
-        self.col_ts1_crtloc = CellObjectStampLocal(os_direntry.path, "st_ctime", mystat.st_ctime)
-        self.col_ts1_crtgmt = CellObjectStampGmt  (os_direntry.path, "st_ctime", mystat.st_ctime)
-        
-          ##for DEBUG: <hours> value raw from st_mtime without any conversion
-        self.col_rawhours = (int(mystat.st_mtime) // 3600) % 24
-          ##for DEBUG: <dst> value from time.localtime
-        self.col_isdst = self.col_ts1_modloc.transferGet().tm_isdst
-        
-        #----- TIMESTAMP(s) 2: LINUX -----
-        self.col_ts2_linux = self.col_ts1_modloc
-          ##CAN often just use TS1 PYTHON:
-          ##  1.if running UNIX: always
-          ##  2.on Windows: for NTFS
-        
-        if RUNNING_WIN:
-          if not mydir.fsutc:
-            self.col_ts2_linux = CellObjectStampLinux(mydir.fsutc,mydir.dstnow, self.col_ts1_modloc)
-            ##only FAT running on WIN need to be wrapped,
-            ##localtime in TS1 is still the base
-        
-        else:           #running on Linux this is exactly TS1,mtime,local
-          self.col_ts2_linux = self.col_ts1_modloc
-        
-        #----- TIMESTAMP(s) 3: WINDOWS -----
-        self.col_ts3_winold = CellObjectStampWin.MakeStampWinWrapper(mydir.fsutc,mydir.dstnow, False, self.col_ts1_modgmt, self.col_ts1_modloc)
-        self.col_ts3_winnew = CellObjectStampWin.MakeStampWinWrapper(mydir.fsutc,mydir.dstnow, True,  self.col_ts1_modgmt, self.col_ts1_modloc)
-        
-        #----- TIMESTAMP 4: FILE NAME -----
-        #try to find a timestamp in the filename...
-        try:
-          self.col_ts4_fname = CellObjectStampFname(fname)
-        
-        #there is a particular ValueError that means: no timestamp found, use DUMMY
-        except ValueError as ex:
-          if ex.args != ('NO-TIMESTAMP',): raise
-          self.col_ts4_fname = CODummyFileTime
+        #ALL TIMESTAMPS ARE LAZY: built on first access (display, sort, action)
+        #  by the _build... functions in LazyColumnBuilders, see __getattr__;
+        #  inactive columns are never asked for and thus never built
+        self.mylazy = True
+        self.mystat = mystat
         
         #----- TIMESTAMP 5: PRIVATE DATA FILE -----
-        
-        #ask MY DIRECTORY if there were stampdata in the private file for me
+        #ask MY DIRECTORY right now if there were stampdata in the private file for me
         #  this would still be in string format according to config
-        
-        ##try:            datafilestamp = self.mydir.mydatafile_dict[fname]
-        ##except KeyError:self.col_ts5_datafile = CODummyFileTime
-        ##else:           self.col_ts5_datafile = CellObjectStampDatafile(datafilestamp)
-        ##  ! NO CODummyFileTime allowed in this column !
-        ##    transferSet needs a proper CellObjectStampDatafile
-        
-        datafilestamp = self.mydir.mydatafile_dict.get(fname, None)
-        self.col_ts5_datafile = CellObjectStampDatafile(datafilestamp)
-          #if no data => construct in DUMMY MODE
-          #  (displayed like a dummy, but takes transferSet input)
+        #  (cheap, and the incremental GotoDir compares it)
+        self.mydatafilestamp = self.mydir.mydatafile_dict.get(fname, None)
         
         self.assertAllCellValues()      #assert that I have all required values
     
@@ -854,7 +926,134 @@ class FileData:
       #NO self.assertAllCellValues(): non-files do not provide the full list of columns,
       #  None will be returned where missing
     
-    self.line_colour = CellObject.colourMaker(line_colour) if line_colour else None
+    self.line_colour = SharedColour(line_colour) if line_colour else None
+  
+  #the colours for ANALYSE/COLOURISE, the same dict for all files
+  myseveritycolours = property(lambda self: SeverityColours())
+  
+  #the MARK column: a bit of my directory
+  col_mark = property(lambda self: self.mydir.marks.Get(self.mypos))
+  
+  #-------------------------------------------------
+  #LAZY COLUMNS: the stamps of normal files are built on first access
+  #  (into empty __slots__, see below)
+  
+  def __getattr__(self, colname):
+    """only called if there is no such attribute (yet): build a lazy column,
+      store it as a normal attribute, no second call for this column"""
+    builder = FileData.LazyColumnBuilders.get(colname)
+    if builder is None or not self.mylazy:
+      raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__, colname))
+    
+    value = builder(self)
+    setattr(self, colname, value)
+    return value
+  
+  #----- TIMESTAMP(s) 1: PYTHON mtime/ctime -----
+  #even THE FIRST TIMESTAMP start off with 4 possible columns
+  #  * SOURCE: mtime or ctime (for test purposes)
+  #  * TIMEZONE: Local or GMT (for test purposes)
+    
+    ##ATTENTION, CellObjectStamp need to know the filepath
+    ##  for Updates to the STAT data !
+  def _build_ts1_modloc(self): return CellObjectStampLocal(self.mydirentry.path, "st_mtime", self.mystat.st_mtime, self._cached("col_ts1_modloc"))     #<=MAIN COLUMN
+  def _build_ts1_modgmt(self): return CellObjectStampGmt  (self.mydirentry.path, "st_mtime", self.mystat.st_mtime, self._cached("col_ts1_modgmt"))
+  def _build_ts1_crtloc(self): return CellObjectStampLocal(self.mydirentry.path, "st_ctime", self.mystat.st_ctime)
+  def _build_ts1_crtgmt(self): return CellObjectStampGmt  (self.mydirentry.path, "st_ctime", self.mystat.st_ctime)
+    
+    ##for DEBUG: <hours> value raw from st_mtime without any conversion
+  def _build_rawhours(self): return (int(self.mystat.st_mtime) // 3600) % 24
+    ##for DEBUG: <dst> value from time.localtime
+  def _build_isdst(self):    return self.col_ts1_modloc.transferGet().tm_isdst
+  
+  #----- TIMESTAMP(s) 2: LINUX -----
+  def _build_ts2_linux(self):
+    ##CAN often just use TS1 PYTHON:
+    ##  1.if running UNIX: always
+    ##  2.on Windows: for NTFS
+    if RUNNING_WIN:
+      if not self.mydir.fsutc:
+        return CellObjectStampLinux(self.mydir.fsutc,self.mydir.dstnow, self.col_ts1_modloc, self._cached("col_ts2_linux"))
+        ##only FAT running on WIN need to be wrapped,
+        ##localtime in TS1 is still the base
+    
+    #running on Linux this is exactly TS1,mtime,local
+    return self.col_ts1_modloc
+  
+  #----- TIMESTAMP(s) 3: WINDOWS -----
+  def _build_ts3_winold(self):
+    return CellObjectStampWin.MakeStampWinWrapper(self.mydir.fsutc,self.mydir.dstnow, False, self.col_ts1_modgmt, self.col_ts1_modloc, self._cached("col_ts3_winold"))
+  def _build_ts3_winnew(self):
+    return CellObjectStampWin.MakeStampWinWrapper(self.mydir.fsutc,self.mydir.dstnow, True,  self.col_ts1_modgmt, self.col_ts1_modloc, self._cached("col_ts3_winnew"))
+  
+  #----- TIMESTAMP 4: FILE NAME -----
+  def _build_ts4_fname(self):
+    #the cache may know already that there is none
+    cached = self._cached("col_ts4_fname")
+    if cached is False: return CODummyFileTime
+    
+    #try to find a timestamp in the filename...
+    try:
+      return CellObjectStampFname(self.col_name, cached)
+    
+    #there is a particular ValueError that means: no timestamp found, use DUMMY
+    except ValueError as ex:
+      if ex.args != ('NO-TIMESTAMP',): raise
+      return CODummyFileTime
+  
+  #----- TIMESTAMP 5: PRIVATE DATA FILE -----
+  def _build_ts5_datafile(self):
+    ##try:            datafilestamp = self.mydir.mydatafile_dict[fname]
+    ##except KeyError:self.col_ts5_datafile = CODummyFileTime
+    ##else:           self.col_ts5_datafile = CellObjectStampDatafile(datafilestamp)
+    ##  ! NO CODummyFileTime allowed in this column !
+    ##    transferSet needs a proper CellObjectStampDatafile
+    return CellObjectStampDatafile(self.mydatafilestamp, self.mydir.mydatafile_parsed)
+      #if no data => construct in DUMMY MODE
+      #  (displayed like a dummy, but takes transferSet input)
+  
+  #----- STAMP CACHE: what the builders above found for this file in an earlier run -----
+  CacheableColumns = ["col_ts1_modloc", "col_ts1_modgmt", "col_ts2_linux", "col_ts3_winold", "col_ts3_winnew", "col_ts4_fname"]
+    ##mycached: a tuple like CacheableColumns, struct_time as tuple, False for "no stamp"
+  
+  def _cached(self, colname):
+    if not self.mycached: return None
+    value = self.mycached[ self.CacheableColumns.index(colname) ]
+    return value and time.struct_time(value)
+  
+  LazyColumnBuilders = {
+    "col_ts1_modloc":   _build_ts1_modloc,
+    "col_ts1_modgmt":   _build_ts1_modgmt,
+    "col_ts1_crtloc":   _build_ts1_crtloc,
+    "col_ts1_crtgmt":   _build_ts1_crtgmt,
+    "col_rawhours":     _build_rawhours,
+    "col_isdst":        _build_isdst,
+    "col_ts2_linux":    _build_ts2_linux,
+    "col_ts3_winold":   _build_ts3_winold,
+    "col_ts3_winnew":   _build_ts3_winnew,
+    "col_ts4_fname":    _build_ts4_fname,
+    "col_ts5_datafile": _build_ts5_datafile,
+  }
+  if perftrace.Enabled:         #count the columns built (switched off: not even an if per column)
+    LazyColumnBuilders = { colname:perftrace.Counted("built "+colname[4:], builder) for colname,builder in LazyColumnBuilders.items() }
+  
+  #SLOTS instead of a __dict__ per file: the lazy columns are empty slots until built,
+  #  an empty slot raises AttributeError, so __getattr__ is asked just like before
+  __slots__ = ( "mydir", "mydirentry", "mysignature", "mydatafilestamp", "mydirty",
+                "mystat", "mylazy", "mycached", "mysortkeys", "line_colour",
+                "mypos", "col_name", "col_out", "col_ftype", "col_extn", "col_bytes",
+              ) + tuple(LazyColumnBuilders)
+  
+  def isColumnBuilt(self, colname):
+    """is there a value for colname already (without building a lazy column) ?"""
+    slot = _LazySlots.get(colname)
+    if slot is not None:
+      try:
+        slot.__get__(self)              #the slot itself, never __getattr__
+        return True
+      except AttributeError:
+        return False
+    return hasattr(self, colname)         #normal attributes or properties (FileDataView)
   
   def __repr__(self):
     return "<%s object: %s '%s' ...>" % (self.__class__.__name__, self.col_ftype,self.col_name)
@@ -867,7 +1066,9 @@ class FileData:
         setattr(self,stamp,CODummyFileTime)
     
     #list of all colnames from my dir => anybody missing here ?
-    missing = [ colname for colname in self.allcolnames if not hasattr(self,colname) ]
+    #  (lazy columns are not built for this, it is enough that they can be)
+    missing = [ colname for colname in self.allcolnames
+                if not (self.mylazy and colname in self.LazyColumnBuilders) and not self.isColumnBuilt(colname) ]
     
     #NORMAL: assertion
     assert not missing, "FileData object '%s' is missing columns: %s" % (self.col_name, ",".join(missing))
@@ -888,18 +1089,75 @@ class FileData:
     #tiny wrapper we need the internal variation where col_ is already present
     return self._getCellValueCol("col_"+colname)
 
+  def getCellDisplay(self, colname, proxyobj):
+    """the display for one cell as a pair (string, colour),
+      colour is None unless the CellObject/proxy supplied one"""
+    
+    #1.get a single cell value for the file
+    cellvalue = self.getCellValue(colname)
+    
+    #2.format as string
+    if isinstance(cellvalue,CellObject):        #a)ask the CellObject
+      cellstringex = cellvalue.getDisplay()
+    
+    else:                                       #b)give the value to the column's proxyobj
+      ##all columns have a proxyobj, as asserted on init
+      cellstringex = proxyobj.getDisplay(cellvalue)
+    
+    if type(cellstringex)==type(()):            #CellObject may supply a colour
+      return cellstringex
+    else:
+      return (cellstringex, None)
+  
+  def getSortKey(self, colname, proxyobj):
+    """the sort key for one cell, made once and kept until the cell changes
+      (ChangeMark, SetOutput and ActionTransfer forget theirs)"""
+    #MARKS are bits of the directory, changed in bulk: never kept
+    if colname=="mark":
+      return proxyobj.getSortKey(self.col_mark)
+    
+    sortkeys = self.mysortkeys
+    if sortkeys is None:
+      sortkeys = self.mysortkeys = {}
+    
+    try:
+      return sortkeys[colname]
+    except KeyError:
+      pass
+    
+    #1.get a single cell value for the file
+    cellvalue = self.getCellValue(colname)
+    
+    #2.get value to use as key
+    if isinstance(cellvalue,CellObject):        #a)ask the CellObject
+      sortkey = cellvalue.getSortKey()
+    else:                                       #b)give the value to the column's proxyobj
+      sortkey = proxyobj.getSortKey(cellvalue)
+    
+    sortkeys[colname] = sortkey
+    return sortkey
+  
+  def ForgetSortKey(self, colname=None):
+    """the cell has changed (None: all cells), the directory must sort again"""
+    if self.mysortkeys:
+      if colname is None: self.mysortkeys = None
+      else:               self.mysortkeys.pop(colname, None)
+    self.mydir.SortKeysChanged(colname)
+  
   #convenience: direct access to the main columns/cells
   def getMark(self): return self.col_mark
   def getType(self): return self.col_ftype
   def getName(self): return self.col_name
   
   def ChangeMark(self, markmode):
-    if markmode==-1:    #-1 is toggle
-      self.col_mark = not self.col_mark
-    else:               #set from 0 or 1
-      self.col_mark = bool(markmode)
+    #-1 is toggle, else set from 0 or 1 (MarkBits.Set)
+    assert self.mypos is not None, "FileData object '%s' is not indexed by its directory, no mark possible" % self.col_name
+    self.mydir.marks.Set(self.mypos, markmode)
+    self.mydir.SortKeysChanged("mark")
   
-  def SetOutput(self, output): self.col_out = output
+  def SetOutput(self, output):
+    self.col_out = output
+    self.ForgetSortKey("out")
   
   def DelOutputs(self):
     """kill Output data: output column and colours set in timestamps"""
@@ -908,6 +1166,8 @@ class FileData:
     self.SetOutput(None)
     
     for colname in self.allstampnames:
+      #lazy stamps that were never built have no colour either
+      if not self.isColumnBuilt(colname): continue
       stampobj = self._getCellValueCol(colname)
       stampobj.setActionColour(None)
   
@@ -919,13 +1179,13 @@ class FileData:
   #-------------------------------------------------
   #[THE REAL] ACTIONS for THE MAIN FUNCTIONS
 
+  FEWSECONDS_DELTA = 20         #up to this many seconds are "2:secs"
+  
   def colourfulStampCompare(self, structtime1,structtime2):
     """the big Comparison Function for to structs: JUST HOW different are they ?
       returns (severity, colour, seconds)
     """
     
-    FEWSECONDS_DELTA = 20
-    
     #convert to datetime to use the modern delta functionality
     try:
       dt1 = datetime.datetime(*structtime1[:6])
@@ -957,7 +1217,7 @@ class FileData:
       
       #a few seconds difference ?
       #  ->no correction to apply, this does not work in combination with others
-      if abs(worksecs) <= FEWSECONDS_DELTA:
+      if abs(worksecs) <= self.FEWSECONDS_DELTA:
         return "2:secs"                         #just a few seconds, the camera took a moment...
       
       #if MIN:SEC are Zero, handle a pure HOURs difference
@@ -1042,7 +1302,8 @@ class FileData:
       
       stampobj2.setActionColour( outtuple[1] )
 
-  def ActionTransfer(self, coldesc1,coldesc2):
+  def ActionTransfer(self, coldesc1,coldesc2, batch=None):
+    """batch: a transfer.TransferBatch noting the new mtimes, None: set each one at once"""
     #ACTIONS work only on files
     if self.col_ftype!='F': return
     
@@ -1055,8 +1316,531 @@ class FileData:
     #empty source is normal, ignored silently
     if not structtime1: return
     
+    #the stamps of this file change now, an incremental GotoDir must rebuild me
+    self.mydirty = True
+    self.ForgetSortKey()        #several stamp columns share the same objects
+    
     #no DUMMIES allowed in the TARGET COL, would raise NotImplementedError
-    return stampobj2.transferSet(structtime1)
+    return stampobj2.transferSet(structtime1, batch)
+
+#the slot descriptors of the lazy columns: isColumnBuilt looks into a slot without building it
+_LazySlots = { colname:FileData.__dict__[colname] for colname in FileData.LazyColumnBuilders }
+
+#----------------------------------------------------------------------
+#BATCH COMPARISON: ANALYSE/COLOURISE for a whole directory at once
+#  the same severities as FileData.colourfulStampCompare,
+#  but on integer seconds for entire columns (NumPy if available)
+
+SEVERITY_NAMES = {
+  0:"0:equal", 1:"1:fat", 2:"2:secs", 3:"3:dst", 4:"4:hours", 5:"5:diff",
+  9:"9:ERROR",
+}
+
+EPOCH_ERROR = "ERROR"           #marker in epoch lists: fields datetime would reject (month 13)
+
+def StampEpoch(structtime):
+  """the first 6 fields of a stamp as integer seconds (counted from year 1),
+    differences are exactly those of datetime.datetime(*structtime[:6])
+    returns None for no stamp and EPOCH_ERROR where datetime would fail"""
+  if not structtime: return None
+  
+  year,month,day, hour,minute,second = structtime[:6]
+  if not (0<=hour<=23 and 0<=minute<=59 and 0<=second<=59):
+    return EPOCH_ERROR
+  
+  try:
+    days = datetime.date(year,month,day).toordinal()   #checks year, month and days of the month
+  except ValueError:
+    return EPOCH_ERROR
+  
+  return ((days*24 + hour)*60 + minute)*60 + second
+
+def ColumnEpochs(files, colname):
+  """StampEpoch for one column of many files (list)"""
+  return [ StampEpoch(entry._getCellValueCol(colname).transferGet()) for entry in files ]
+
+_FAT32DELTA = { 58:+2, 59:+1, 1:-1, 2:-2 }
+
+def _severityOfDelta(delta_sec):
+  """findSeverity of colourfulStampCompare on an int, returns the severity number"""
+  if delta_sec==0: return 0                     #fully equal
+  
+  worksecs = delta_sec
+  corr = _FAT32DELTA.get(worksecs%60)           #is there a FAT32 2seconds delta ?
+  if corr is not None:
+    worksecs += corr
+    if worksecs==0: return 1                    #FAT offset was enough
+  
+  if abs(worksecs) <= FileData.FEWSECONDS_DELTA:
+    return 2                                    #just a few seconds
+  
+  if worksecs%3600 == 0:                        #pure HOURs difference
+    return 3 if abs(worksecs)//3600 <= 2 else 4
+  
+  return 5                                      #hopeless, just different
+
+def _severitiesPure(deltas):
+  """pure python flavour: array of deltas -> array of severity numbers"""
+  return array.array('b', map(_severityOfDelta, deltas))
+
+def _severitiesNumpy(deltas):
+  """NumPy flavour, one pass per rule; later rules have the higher priority,
+    just like the early returns in _severityOfDelta"""
+  delta = numpy.asarray(deltas, dtype=numpy.int64)
+  
+  corrtable = numpy.zeros(60, dtype=numpy.int64)
+  for mod,corr in _FAT32DELTA.items(): corrtable[mod] = corr
+  corr = corrtable[delta % 60]                  #numpy % floors like python
+  work = delta + corr
+  
+  sev = numpy.full(delta.shape, 5, dtype=numpy.int8)
+  hours = (work % 3600 == 0)
+  sev[hours] = numpy.where(numpy.abs(work[hours])//3600 <= 2, 3, 4)
+  sev[numpy.abs(work) <= FileData.FEWSECONDS_DELTA] = 2
+  sev[(corr != 0) & (work == 0)] = 1
+  sev[delta == 0] = 0
+  return sev.tolist()
+
+def CompareEpochColumns(epochs1, epochs2):
+  """THE BATCH COMPARISON of two epoch lists (see ColumnEpochs)
+    returns one entry per row: None if a stamp is missing,
+    else (severityname, seconds) like colourfulStampCompare without colour"""
+  results = [None] * len(epochs1)
+  
+  #1.sort out missing and ERROR, only real pairs go into the number crunching
+  rows = []
+  deltas = array.array('q')
+  for row,(epoch1,epoch2) in enumerate(zip(epochs1,epochs2)):
+    if epoch1 is None or epoch2 is None: continue
+    if epoch1 is EPOCH_ERROR or epoch2 is EPOCH_ERROR:
+      results[row] = (SEVERITY_NAMES[9], -1)
+      continue
+    rows.append(row)
+    deltas.append(epoch1-epoch2)
+  
+  #2.all severities in one go
+  if numpy is not None and len(deltas) >= BATCH_NUMPY_MINIMUM:
+    severities = _severitiesNumpy(deltas)
+  else:
+    severities = _severitiesPure(deltas)
+  
+  for row,sev,delta in zip(rows,severities,deltas):
+    results[row] = (SEVERITY_NAMES[sev], delta)
+  return results
+
+BATCH_NUMPY_MINIMUM = 1000      #below that, NumPy's overhead is bigger than the gain
+
+#----------------------------------------------------------------------
+#STEPS: long work as generators, chunk by chunk (jobs.py runs them in a thread)
+#  a step generator yields (done, total, results of the chunk or None)
+#  and returns the result of the whole work
+
+def RunSteps(steps):
+  """a step generator to its end right here, returns its return value"""
+  while True:
+    try:
+      next(steps)
+    except StopIteration as stop:
+      return stop.value
+
+def BatchSteps(batchfunction, entries, *args, chunksize=None):
+  """a batch action like DirectoryData.ActionAnalyseBatch in STEPS:
+    batchfunction(chunk, *args) for one chunk of the entries after the other"""
+  entries = list(entries)
+  chunksize = chunksize or config.JOB_CHUNK
+  
+  with perftrace.Span(batchfunction.__name__):
+    for start in range(0, len(entries), chunksize):
+      batchfunction(entries[start:start+chunksize], *args)
+      yield (min(start+chunksize, len(entries)), len(entries), None)
+
+#----------------------------------------------------------------------
+#COLUMNAR STORAGE for very big directories (optional, DirectoryData columnar=True)
+#  parallel arrays instead of one FileData per entry,
+#  FileData objects are only made as VIEWS for rows someone asks for
+
+class _ColumnarStat:
+  """what FileData wants to know from os.stat, made from the arrays"""
+  __slots__ = ("st_size", "st_ino", "st_mtime", "st_ctime", "st_mtime_ns", "st_ctime_ns")
+  
+  def __init__(self, columns, rawidx):
+    self.st_size     = columns.sizes[rawidx]
+    self.st_ino      = columns.inodes[rawidx]
+    self.st_mtime_ns = columns.mtimes_ns[rawidx]
+    self.st_ctime_ns = columns.ctimes_ns[rawidx]
+    self.st_mtime    = _ns2float(self.st_mtime_ns)
+    self.st_ctime    = _ns2float(self.st_ctime_ns)
+
+def _ns2float(stamp_ns):
+  """float seconds exactly like os.stat makes st_mtime (sec + nsec*1e-9),
+    a plain stamp_ns/1e9 may round differently in the last bit"""
+  sec,nsec = divmod(stamp_ns, 1000000000)
+  return sec + nsec*1e-9
+
+class _ColumnarDirEntry:
+  """stands in for the os.DirEntry a FileData is made from"""
+  __slots__ = ("columns", "rawidx", "name", "path")
+  
+  def __init__(self, columns, rawidx):
+    self.columns = columns
+    self.rawidx  = rawidx
+    self.name    = columns.names[rawidx]
+    self.path    = os.path.join(columns.dirpath, self.name)
+  
+  def is_file(self):    return self.columns.ftypes[self.rawidx]==ord('F')
+  def is_dir(self):     return self.columns.ftypes[self.rawidx]==ord('D')
+  def is_symlink(self): return False    ##symlinks are stored as what they point to
+  def inode(self):      return self.columns.inodes[self.rawidx]
+  def stat(self):       return _ColumnarStat(self.columns, self.rawidx)
+
+class FileDataView (FileData):
+  """a FileData made on demand for one row of ColumnarEntries,
+    the raw index is the position in the EntryIndex (and the MARK bits) too"""
+  
+  __slots__ = ("mycolumns", "myrawidx")
+  
+  def __init__(self, mydir, columnar_direntry):
+    self.mycolumns = columnar_direntry.columns
+    self.myrawidx  = columnar_direntry.rawidx
+    
+    super().__init__(mydir, columnar_direntry)
+    self.mypos = self.myrawidx
+
+class ColumnarEntries:
+  """replaces the list DirectoryData.entries for very big directories
+    * one array per column: name, size, inode, mtime_ns, ctime_ns and type
+      (the marks are bits of the directory: DirectoryData.marks)
+    * the row order is a permutation (self.order) sorted in native array order
+    * behaves like a list of FileData: len(), [pos], iteration and sort(key,reverse),
+      the FileData are VIEWS made on first access and then kept (marks, outputs)
+  """
+  
+  def __init__(self, mydir):
+    self.mydir   = mydir
+    self.dirpath = mydir.dirpath
+    
+    self.names     = []                 #no array type for strings, a list it is
+    self.ftypes    = bytearray()        #ord('F'), ord('D'), ord('x')
+    self.sizes     = array.array('q')
+    self.inodes    = array.array('Q')
+    self.mtimes_ns = array.array('q')
+    self.ctimes_ns = array.array('q')
+    
+    self.order = array.array('l')       #row position -> raw index in the arrays
+    self.views = {}                     #raw index -> FileDataView, made on demand
+  
+  def Load(self):
+    """read all entries of my directory into the arrays, raises OSError like IterDir"""
+    with os.scandir(self.dirpath) as it:
+      for entry in it:
+        if entry.is_file():
+          ftype = 'F'
+          try:
+            mystat = entry.stat()
+            size,ino,mtime_ns,ctime_ns = mystat.st_size, mystat.st_ino, mystat.st_mtime_ns, mystat.st_ctime_ns
+          except OSError:               #like _fakeStat
+            size,ino,mtime_ns,ctime_ns = 0, 0, 0, 0
+        
+        else:
+          ftype = 'D' if entry.is_dir() else 'x'
+          size,ino,mtime_ns,ctime_ns = 0, entry.inode(), 0, 0
+        
+        self.names.append(entry.name)
+        self.ftypes.append(ord(ftype))
+        self.sizes.append(size)
+        self.inodes.append(ino)
+        self.mtimes_ns.append(mtime_ns)
+        self.ctimes_ns.append(ctime_ns)
+    
+    self.order = array.array('l', range(len(self.names)))
+  
+  #===== the list interface
+  def __len__(self): return len(self.order)
+  
+  def __getitem__(self, pos):
+    return self.getView(self.order[pos])
+  
+  def __iter__(self):
+    return (self.getView(rawidx) for rawidx in self.order)
+  
+  def getView(self, rawidx):
+    view = self.views.get(rawidx)
+    if view is None:
+      view = self.views[rawidx] = FileDataView(self.mydir, _ColumnarDirEntry(self, rawidx))
+    return view
+  
+  def sort(self, key, reverse=False):
+    """GENERIC sort like list.sort, but this needs a view for every row"""
+    views = list(self)
+    views.sort(key=key, reverse=reverse)
+    self.order = array.array('l', (view.myrawidx for view in views))
+  
+  #===== NATIVE sort: keys straight from the arrays, no views
+  def _nativeKeys(self, sortname):
+    """key list by raw index, exactly the keys the generic sort would get from
+      the FileData/proxies, or None if this column needs the FileData"""
+    names, ftypes = self.names, self.ftypes
+    isfile = [ ftype==ord('F') for ftype in ftypes ]
+    
+    if sortname=="name":
+      return [ name.lower() for name in names ]
+    if sortname=="ftype":
+      return [ chr(ftype).lower() for ftype in ftypes ]
+    if sortname=="extn":
+      return [ os.path.splitext(name)[1].lower() if f else "" for name,f in zip(names,isfile) ]
+    if sortname=="bytes":
+      return [ size if f else -1 for size,f in zip(self.sizes,isfile) ]
+    if sortname=="mark":
+      return self.mydir.marks.Flags()
+    
+    #mtime stamps: my datafile has dummies, other files their stat, dirs the proxy's gmtime(0)
+    if sortname in ("ts1_modloc","ts1_modgmt","ts2_linux") and not (sortname=="ts2_linux" and RUNNING_WIN):
+      convert = time.gmtime if sortname=="ts1_modgmt" else time.localtime
+        ##running Linux: ts2_linux is ts1_modloc
+      keys = []
+      for name,f,mtime_ns in zip(names,isfile,self.mtimes_ns):
+        if not f:                           keys.append(CellObjectProxyStamp.DIRSORTKEY)
+        elif name==config.MYFILENAME_DATA:  keys.append(CODummyFileTime.getSortKey())
+        else:                               keys.append(StructSortKey(convert(_ns2float(mtime_ns))))
+      return keys
+    
+    return None
+  
+  def sortNative(self, sortname, reverse):
+    """sort by a column from the arrays, False if the column needs the generic sort"""
+    keys = self._nativeKeys(sortname)
+    if keys is None: return False
+    
+    #same algorithm as the generic sort: stable sort of the CURRENT order
+    self.order = array.array('l', sorted(self.order, key=keys.__getitem__, reverse=reverse))
+    return True
+  
+  #===== marks without views
+  def iterMarked(self):
+    flags = self.mydir.marks.Flags()
+    return (self.getView(rawidx) for rawidx in self.order if flags[rawidx])
+  
+  #===== some rows only (the filter)
+  def subset(self, rawidxs):
+    """the same arrays and views, but only these rows (in this order)"""
+    sub = copy.copy(self)
+    sub.order = array.array('l', rawidxs)
+    return sub
+
+#----------------------------------------------------------------------
+#FILTER INDEX: what the filter of the grid asks about the entries,
+#  kept by DirectoryData while it loads, so a filter never touches a FileData
+
+class EntryIndex:
+  """the entries in LOAD ORDER, by position:
+    * keys: the FileData (or the raw index of ColumnarEntries)
+    * names, lnames: the names and lowercase, for the regex and the substring
+    * byextn, bytype: extension/type -> ascending positions (arrays)
+    * byseverity: severity number of the output -> positions, made when a filter
+      asks for it (outputs change with every action)
+    ! only appended to (by the job thread while loading): keys last,
+      readers take len(keys) first and ignore positions from there on"""
+  
+  def __init__(self):
+    self.keys   = []
+    self.names  = []
+    self.lnames = []
+    self.byextn = {}
+    self.bytype = {}
+    self.byseverity = None              #(size, dict) or None
+    self.lasthits   = None              #(rowfilter, size, positions) of the last Match
+  
+  def __len__(self): return len(self.keys)
+  
+  def Add(self, keys, names, extns, ftypes):
+    pos = len(self.keys)
+    for name,extn,ftype in zip(names,extns,ftypes):
+      lname = name.lower()
+      self.names.append(name)
+      self.lnames.append(name if lname==name else lname)   #the same string if it is lowercase already
+      positions = self.byextn.get(extn)
+      if positions is None: positions = self.byextn[extn] = array.array('l')
+      positions.append(pos)
+      positions = self.bytype.get(ftype)
+      if positions is None: positions = self.bytype[ftype] = array.array('l')
+      positions.append(pos)
+      pos += 1
+    self.keys.extend(keys)
+  
+  def AddEntries(self, entries):
+    """FileData, with the values they already have"""
+    self.Add(entries, [entry.col_name for entry in entries],
+             [entry.col_extn if entry.col_ftype=='F' else "" for entry in entries],
+             [entry.col_ftype for entry in entries])
+  
+  def AddColumnar(self, columns):
+    """all rows of ColumnarEntries, from the arrays (like ColumnarEntries._nativeKeys)"""
+    ftypes = [ chr(ftype) for ftype in columns.ftypes ]
+    self.Add(range(len(columns.names)), columns.names,
+             [ os.path.splitext(name)[1].lower() if ftype=='F' else "" for name,ftype in zip(columns.names,ftypes) ],
+             ftypes)
+  
+  def ForgetOutputs(self):
+    self.byseverity = None
+    self.lasthits   = None
+  
+  def _upto(self, positions, size):
+    return positions[:bisect.bisect_left(positions, size)]
+  
+  def _union(self, index, values, size):
+    lists = [ self._upto(index.get(value, ()), size) for value in values ]
+    if len(lists)==1: return lists[0]
+    return sorted(itertools.chain.from_iterable(lists))
+  
+  def _severities(self, size, outputof):
+    byseverity = self.byseverity
+    if byseverity is None or byseverity[0]!=size:
+      index = {}
+      for pos,key in enumerate(self.keys[:size]):
+        output = outputof(key)
+        if output: index.setdefault(int(output[0][0]), []).append(pos)
+      byseverity = self.byseverity = (size, index)
+    return byseverity[1]
+  
+  def Match(self, rowfilter, outputof):
+    """the ascending positions of the keys passing rowfilter (see rowfilter.RowFilter),
+      outputof(key): the output (col_out) of that entry"""
+    size = len(self.keys)
+    
+    #ONE MORE LETTER: only the last hits can match a longer text (nothing else changed)
+    last = self.lasthits
+    if last and last[1]==size and rowfilter.Narrows(last[0]):
+      positions = last[2]
+    
+    #else the smallest set from the indexes, the others checked against it
+    else:
+      positions = None
+      for index,values in [ (self.byextn, rowfilter.extns),
+                            (self.bytype, rowfilter.ftypes),
+                            (None,        rowfilter.severities) ]:
+        if not values: continue
+        if index is None: index = self._severities(size, outputof)
+        found = self._union(index, values, size)
+        if positions is not None:
+          found = set(found)
+          found = [ pos for pos in positions if pos in found ]
+        positions = found
+      
+      if positions is None:
+        positions = range(size)
+    
+    if rowfilter.text:
+      lnames,text = self.lnames,rowfilter.text
+      positions = [ pos for pos in positions if text in lnames[pos] ]
+    
+    if rowfilter.regex:
+      names,search = self.names,rowfilter.regex.search
+      positions = [ pos for pos in positions if search(names[pos]) ]
+    
+    if rowfilter.hasfname:
+      #a stamp in the name (ts4_fname): files only, never my datafile (fnamestamp knows them all)
+      names,files = self.names,set(self._upto(self.bytype.get('F', ()), size))
+      positions = [ pos for pos in positions if pos in files and names[pos]!=config.MYFILENAME_DATA
+                                                and fnamestamp.Recognize(names[pos]) is not None ]
+    
+    self.lasthits = (rowfilter, size, positions)
+    return positions
+
+#----------------------------------------------------------------------
+#MARKS: one bit per entry, at its position in the EntryIndex (DirectoryData.marks)
+
+_popcount = getattr(int, "bit_count", None) or (lambda num: bin(num).count("1"))
+  ##int.bit_count is python 3.10
+
+class MarkBits:
+  """the MARKS of a directory as a bitset, one bit per position:
+    * the counts are kept with every change: counting costs nothing
+    * BULK marks work on whole ints (a mask, bit p for position p),
+      not entry by entry, the counts are made again with a popcount
+    ! files[] tells which positions are files (type F), for the count of marked files"""
+  
+  def __init__(self):
+    self.bits    = bytearray()          #the marks, 8 positions per byte, bit p%8 of byte p//8
+    self.files   = bytearray()          #the same for "is a file"
+    self.size    = 0
+    self.nummark = 0
+    self.numfile = 0                    #marked files
+  
+  def Append(self, isfiles, marks=()):
+    """the next positions: are they files, are they marked (marks: may be shorter)"""
+    bits,files = self.bits,self.files
+    for pos,(isfile,mark) in enumerate(itertools.zip_longest(isfiles, marks), self.size):
+      if isfile is None: break          #more marks than positions
+      byte,bit = pos>>3, 1<<(pos&7)
+      if bit==1:
+        bits.append(0)
+        files.append(0)
+      if isfile:
+        files[byte] |= bit
+      if mark:
+        bits[byte] |= bit
+        self.nummark += 1
+        if isfile: self.numfile += 1
+      self.size = pos+1
+  
+  def Get(self, pos):
+    """is pos marked ? (None: never)"""
+    if pos is None: return False
+    return bool(self.bits[pos>>3] & 1<<(pos&7))
+  
+  def Set(self, pos, markmode):
+    """one mark: 1 set, 0 clear, -1 toggle"""
+    byte,bit = pos>>3, 1<<(pos&7)
+    old  = bool(self.bits[byte] & bit)
+    mark = (not old) if markmode==-1 else bool(markmode)
+    if mark==old: return
+    
+    self.bits[byte] ^= bit
+    diff = 1 if mark else -1
+    self.nummark += diff
+    if self.files[byte] & bit: self.numfile += diff
+  
+  def Counts(self):
+    """(marked files, marked anything), no counting"""
+    return (self.numfile, self.nummark)
+  
+  def CountsIn(self, mask):
+    """(marked files, marked anything) of the positions in the mask, with a popcount"""
+    marks = int.from_bytes(self.bits, "little") & mask
+    return (_popcount(marks & int.from_bytes(self.files, "little")), _popcount(marks))
+  
+  def Flags(self):
+    """a bool per position"""
+    bits = self.bits
+    return [ bool(bits[pos>>3] & 1<<(pos&7)) for pos in range(self.size) ]
+  
+  def Positions(self):
+    """the marked positions, ascending"""
+    for byte,value in enumerate(self.bits):
+      if value:
+        for bit in range(8):
+          if value & 1<<bit: yield byte*8+bit
+  
+  #===== BULK: masks as ints
+  def Mask(self, positions=None):
+    """the mask of these positions (None: all)"""
+    if positions is None: return (1<<self.size) - 1
+    
+    maskbytes = bytearray(len(self.bits))
+    for pos in positions:
+      maskbytes[pos>>3] |= 1<<(pos&7)
+    return int.from_bytes(maskbytes, "little")
+  
+  def Apply(self, mask, markmode):
+    """all positions in the mask: 1 set, 0 clear, -1 toggle"""
+    marks = int.from_bytes(self.bits, "little")
+    if   markmode==-1: marks ^= mask
+    elif markmode:     marks |= mask
+    else:              marks &= ~mask
+    
+    self.bits    = bytearray(marks.to_bytes(len(self.bits), "little"))
+    self.nummark = _popcount(marks)
+    self.numfile = _popcount(marks & int.from_bytes(self.files, "little"))
 
 class DirectoryData:
   """The DIRECTORY currently displayed in the main GRID
@@ -1078,13 +1862,38 @@ class DirectoryData:
   sortname  = None
   sortproxy = None
   
-  def __init__(self, AllColumnNames):
+  #the sort order the entries are in: [(colname,reverse),...], None when unsorted,
+  #  and the columns whose sort keys changed since (None in the set: all columns)
+  sortspec    = None
+  sortchanged = None
+  
+  #a stampcache.StampCache for GotoDir, None: all stamps are built (lazily) from scratch
+  #  (StoreStamps writes what was built, when the directory is left)
+  stampcache  = None
+  
+  #the FILTER of the grid (rowfilter.RowFilter, None: all rows), the EntryIndex behind it
+  #  and the rows it lets through as ((rowsversion, rowfilter), entries), see ShownEntries;
+  #  rowsversion counts the changes of the entries and their order
+  rowfilter   = None
+  filterindex = None
+  shown       = None
+  rowsversion = 0
+  
+  def __init__(self, AllColumnNames, columnar=False):
     #start with empty list, I will first learn of my directory
     #from a call to GotoDir
     self.dirpath = None
-    self.entries = []
     FileData.SetAllColumnNames(AllColumnNames)
     
+    #COLUMNAR: entries are ColumnarEntries (arrays + FileDataView on demand),
+    #  for directories with hundreds of thousands of entries
+    self.columnar = columnar
+    self.entries = self.EmptyEntries()
+    self.incomplete = False     #GotoDir ended early (cancelled, failed): entries are missing
+    
+    #the MARKS of the entries: bits by position in self.filterindex
+    self.marks = MarkBits()
+    
     #settings that are the same for all dir entries
     self.fsutc  = None          #is the filesystem in UTC ?
     self.dstnow = None          #are we on DST now ?
@@ -1092,44 +1901,128 @@ class DirectoryData:
     #input about/from my data file
     self.has_mydatafile = False
     self.mydatafile_dict = None
+    self.mydatafile_parsed = None
+    self.mydatafile_version = None
+    self.mydatafile_counts = (0,0)
   
   def ReadFromInifile(self, key, defvalue):
     #if we haven't read the distributed ini yet
     if self.inidict is None:
-      self.inidict = {}
-      dirpath = self.dirpath
+      #the nearest ini file up the directory tree, the resolver knows it mostly
+      self.inidict = mediaprefs.Resolver.Settings(self.dirpath)
+    
+    #with the inidict ready, just get the value
+    return self.inidict.get(key, defvalue)
+  
+  def GotoDir(self, dirpath, incremental=False):
+    """Destroy the database and Reload from new directory
+      incremental: when staying in the same DIR (Refresh, after Transfer),
+        keep the FileData objects (with marks and outputs) of unchanged entries"""
+    return RunSteps( self.GotoDirSteps(dirpath, incremental) )
+  
+  def GotoDirSteps(self, dirpath, incremental=False, chunksize=None, sortcols=None):
+    """GotoDir as a STEP GENERATOR (jobs.py): self.entries grows chunk by chunk,
+      yields (entries so far, None, None) after each chunk, returns the errormessage
+      ! closed before the end (cancel), the entries are the ones read so far
+        and self.incomplete stays True (also if it fails)
       
-      #find the ini file up the directory tree
-      while True:
-        inipath = os.path.join(dirpath, config.MYFILENAME_MEDIAPREFS)
-        if os.path.isfile(inipath): break
-        
-        newdirpath = os.path.dirname(dirpath)
-        if newdirpath==dirpath: return defvalue
-          #we have reached root without finding anything (empty dict)
-        
-        dirpath = newdirpath
+      sortcols (like ApplySortMulti): STREAMING, the entries are in that order all the time,
+        a first small chunk (one screenful) right away, then every chunk is sorted into them;
+        the end is exactly the order ApplySortMulti gives, it has nothing to do then"""
+    with perftrace.Span("GotoDir", dirpath=dirpath):
+      chunksize = chunksize or config.JOB_CHUNK
+      
+      oldentries  = self.entries if incremental and dirpath==self.dirpath else None
+      oldsettings = (self.fsutc, self.dstnow)
+      
+      errormessage = self.PrepareDir(dirpath)
+      
+      #different settings for the DIR (mediaprefs, DST switch) change all the stamps
+      if (self.fsutc, self.dstnow) != oldsettings:
+        oldentries = None
+      
+      #the MARKS stay with the names (new positions, new bits)
+      oldmarks = self.MarkedNames() if oldentries else set()
+      
+      #the STAMP CACHE record, before the first entry: every chunk is hydrated before it is sorted
+      stampcached = None
+      if self.stampcache and not self.columnar:
+        with perftrace.Span("stampcache"):
+          stampcached = self.stampcache.Load(self)
+      
+      self.entries = self.EmptyEntries()
+      self.sortspec = None                #new entries, new order
+      self.filterindex = EntryIndex()
+      self.marks = MarkBits()
+      self.RowsChanged()
+      self.incomplete = True              #until the last entry is read
+      
+      #GET ALL DIRECTORY CONTENTS, full os.stat for all entries
+      def readChunk(source, size):
+        with perftrace.Span("scandir+FileData"):
+          chunk = list(itertools.islice(source, size))
+          perftrace.Count("entries", len(chunk))
+          self.IndexEntries(chunk, oldmarks)
+          if stampcached: self.stampcache.Hydrate(chunk, stampcached)
+        return chunk
       
-      #ini file found, read it
       try:
-        with open(inipath,"rt") as inifile:
-          for line in inifile:
-            #strip spaces, ignore empty lines and comments
-            line = line.strip()
-            if not line: continue
-            if line[0]=='#': continue
+        #every os.DirEntry object becomes a FileData object
+        #  (the constructor will ask me for his entry in self.mydatafile_dict)
+        if self.columnar:
+          with perftrace.Span("LoadColumnar"):
+            self.entries = self.LoadColumnar()
+            self.filterindex.AddColumnar(self.entries)
+            columns = self.entries
+            self.marks.Append([ ftype==ord('F') for ftype in columns.ftypes ], [ name in oldmarks for name in columns.names ])
+          self.RowsChanged()
+        
+        elif not sortcols:
+          source = self.IterDirIncremental(oldentries) if oldentries else self.IterDir()
+          for chunk in iter(lambda: readChunk(source, chunksize), []):
+            self.entries.extend(chunk)
+            self.RowsChanged()
+            yield (len(self.entries), None, None)
+        
+        else:
+          source = self.IterDirIncremental(oldentries) if oldentries else self.IterDir()
+          size = config.JOB_FIRSTCHUNK
+          for chunk in iter(lambda: readChunk(source, size), []):
+            #the entries so far are one sorted run, the (stable) sort only sorts
+            #  the chunk behind them and merges; ties stay in scandir order
+            #  like in one sort of everything
+            merged = self.entries + chunk
+            with perftrace.Span("sort"):
+              self.SortEntries(merged, sortcols)
+            self.entries = merged         #ONE assignment: the GUI thread sees the old or the new list
+            self.RowsChanged()
+            yield (len(self.entries), None, None)
             
-            key,value = line.split('=')
-            self.inidict[key]=value
+            #chunks grow with the list: all the merging stays linear
+            size = max(chunksize, len(self.entries)//2)
+          
+          self.sortname    = sortcols[0][0]
+          self.sortspec    = [ (sortname,sortreverse) for sortname,sortproxy,sortreverse in sortcols ]
+          self.sortchanged = set()
+        
+        self.incomplete = False           #closed before (cancel): stays True, no actions then
       
-      except OSError:   #cant read my own INI
-        pass            #inidict remains {}, no need to try again
+      except OSError as ex:               #no access to my own directory
+        #overrides the message for reading INI
+        errormessage = "GotoDir fails: %s" % str(ex)
+          ##FUTURE: maybe the big table should show a red error line ?
     
-    #with the inidict ready, just get the value
-    return self.inidict.get(key, defvalue)
+    return errormessage
   
-  def GotoDir(self, dirpath):
-    """Destroy the database and Reload from new directory"""
+  def StoreStamps(self):
+    """the stamp columns built meanwhile into the stamp cache (when the directory is left)"""
+    if self.stampcache and not self.columnar and self.dirpath and not self.incomplete:
+      with perftrace.Span("stampcache store"):
+        self.stampcache.Store(self)
+  
+  def PrepareDir(self, dirpath):
+    """first half of GotoDir: the settings and the datafile for a new directory,
+      but no entries yet (they follow from IterDir)"""
     
     #double check, can be an assert
     assert os.path.isdir(dirpath)
@@ -1145,145 +2038,443 @@ class DirectoryData:
       #(will change twice a year if we are running then)
     self.dstnow = time.localtime().tm_isdst
     assert self.dstnow in [0,1], "time.localtime() needs to contain DST information, but is %r" % self.dstnow
+    tzkey.RevalidateZone()              #same for the offsets (TZ of the process)
     
     #the MAIN DIR Object handles my datafiles inside the dir
-    errormessage = self.readMyFile()
-    
-    ##LATER: possible optimisation
-    ##  when Updating the list while staying in the same DIR very little 
-    ##  may have changed, this should require less than a full reconstruction
-    ##
-    ##  - this would require storing the original os.DirEntry data
-    ##    in all the FileData and a structure here indexing them by filename
-    self.entries = []
-    
-    #GET ALL DIRECTORY CONTENTS, full os.stat for all entries
-    try:
-      with os.scandir(dirpath) as it:
-        #list comprehension: every os.DirEntry object becomes a FileData object
-        #  (the constructor will ask me for his entry in self.mydatafile_dict)
-        self.entries = [FileData(self, entry) for entry in it]
-    
-    except OSError as ex:               #no access to my own directory
-      #overrides the message for reading INI
-      errormessage = "GotoDir fails: %s" % str(ex)
-        ##FUTURE: maybe the big table should show a red error line ?
-    
-    return errormessage
+    return self.readMyFile()
+  
+  def IterDir(self):
+    """second half of GotoDir: generator for FileData objects straight from os.scandir
+      ! the entries are NOT stored in self.entries, this is for streaming
+        one row after the other (command line), GotoDir keeps the list
+      ! raises OSError if the directory can't be listed"""
+    with os.scandir(self.dirpath) as it:
+      for entry in it:
+        yield FileData(self, entry)
+  
+  def EmptyEntries(self):
+    return ColumnarEntries(self) if self.columnar else []
+  
+  def LoadColumnar(self):
+    """the COLUMNAR flavour of GotoDir: all entries into arrays, no FileData
+      ! incremental is simple here: reloading arrays is cheap,
+        only the marks are taken over by name (GotoDirSteps)"""
+    columns = ColumnarEntries(self)
+    columns.Load()
+    return columns
+  
+  def IndexEntries(self, entries, oldmarks=()):
+    """new FileData (a chunk of GotoDir): their positions in the EntryIndex and the MARK bits,
+      marked if their name is in oldmarks"""
+    for pos,entry in enumerate(entries, len(self.filterindex)):
+      entry.mypos = pos
+    self.marks.Append([ entry.col_ftype=='F' for entry in entries ], [ entry.col_name in oldmarks for entry in entries ])
+    self.filterindex.AddEntries(entries)
+  
+  def MarkedNames(self):
+    """the names of all marked entries"""
+    if self.filterindex is None: return set()
+    names = self.filterindex.names
+    return { names[pos] for pos in self.marks.Positions() }
+  
+  def IterDirIncremental(self, oldentries):
+    """like IterDir, but old FileData objects are given back if nothing changed:
+      same EntrySignature (inode,size,mtime_ns), same datafile stamp, no transfer
+      ! rebuilt entries keep their mark by name (GotoDirSteps), but not outputs
+        (they are outdated), vanished entries are simply not returned"""
+    oldbyname = { oldentry.getName():oldentry for oldentry in oldentries }
+    
+    with os.scandir(self.dirpath) as it:
+      for entry in it:
+        oldentry = oldbyname.get(entry.name)
+        
+        if oldentry is None:            #NEW entry
+          yield FileData(self, entry)
+          continue
+        
+        signature = EntrySignature(entry)
+        if (signature is not None and not oldentry.mydirty
+            and signature == oldentry.mysignature
+            and self.mydatafile_dict.get(entry.name) == oldentry.mydatafilestamp):
+          yield oldentry                #UNCHANGED, no new stat, no new stamps
+          continue
+        
+        yield FileData(self, entry)     #CHANGED, but it is still the same file for the user
   
   def ApplySort(self, sortname,sortproxy,sortreverse):
     #2.APPLY SORT ORDER
-    self.sortname  = sortname           #keep it, just FYI
+    self.sortproxy = sortproxy          #keep it, just FYI
+    return self.ApplySortMulti([ (sortname,sortproxy,sortreverse) ])
+  
+  def ApplySortMulti(self, sortcols):
+    """sort by several columns: [(sortname,sortproxy,sortreverse),...], the first is the main one
+      returns False if the entries are already in that order (nothing changed since)"""
+    self.sortname = sortcols[0][0]      #keep it, just FYI
+    
+    #SKIP: same order as last time and none of its keys changed (eg. only marks when sorted by name)
+    sortspec = [ (sortname,sortreverse) for sortname,sortproxy,sortreverse in sortcols ]
+    changed  = self.sortchanged or set()
+    if sortspec==self.sortspec and None not in changed and not changed.intersection(name for name,rev in sortspec):
+      return False
     
-    def cellKeyFunction(entry):
-      """Generic Key Function for sorting entries in this DIR
-        iterates trough the entry(ies),
-        gets column data from local variables"""
-      
-      #1.get cell value for the file
-      cellvalue = entry.getCellValue(sortname)
+    with perftrace.Span("ApplySort", sortspec=sortspec):
+      self.SortEntries(self.entries, sortcols)
+      perftrace.Count("sorted", len(self.entries))
+    self.RowsChanged()
+    
+    self.sortspec    = sortspec
+    self.sortchanged = set()
+    return True
+  
+  def SortEntries(self, entries, sortcols):
+    """sort a list of entries (in place) like ApplySortMulti"""
+    #the LAST column first: every sort is stable, so the next one keeps that order for ties
+    for sortname,sortproxy,sortreverse in reversed(sortcols):
+      #COLUMNAR: most columns are sorted from the arrays, without a FileData
+      if self.columnar and entries.sortNative(sortname, sortreverse):
+        continue
       
-      #2.get value to use as key
-      if isinstance(cellvalue,CellObject):              #a)ask the CellObject
-        return cellvalue.getSortKey()
-      
-      else:                                             #b)give the value to the column's proxyobj
-        ##all columns have a proxyobj, as asserted on init
-        return sortproxy.getSortKey(cellvalue)
+      #the keys are kept in the FileData (see FileData.getSortKey)
+      entries.sort(key=lambda entry: entry.getSortKey(sortname,sortproxy), reverse=sortreverse)
+  
+  def SortKeysChanged(self, colname):
+    """called by the FileData: sort keys of this column (None: all) are no longer valid"""
+    if self.sortchanged is None: self.sortchanged = set()
+    self.sortchanged.add(colname)
+    
+    #the filter by severity needs the outputs again
+    if colname in ("out",None) and self.filterindex:
+      self.filterindex.ForgetOutputs()
+      if self.rowfilter and self.rowfilter.severities: self.RowsChanged()
+  
+  #===== the FILTER: the grid shows only the entries passing it
+  def SetFilter(self, rowfilter):
+    """rowfilter.RowFilter, None (or an empty one): all entries"""
+    self.rowfilter = rowfilter if rowfilter and not rowfilter.isEmpty() else None
+  
+  def RowsChanged(self):
+    """the entries or their order changed: the filter must look again"""
+    self.rowsversion += 1
+  
+  def ShownEntries(self):
+    """the entries passing the filter in the current order (a list, or ColumnarEntries),
+      made again only after the entries, their order or the filter changed"""
+    rowfilter = self.rowfilter
+    if rowfilter is None or self.filterindex is None:
+      return self.entries
+    
+    shownkey = (self.rowsversion, rowfilter)      #FIRST: a job may change the entries meanwhile
+    shown = self.shown
+    if shown is None or shown[0]!=shownkey:
+      with perftrace.Span("Filter"):
+        entries = self.entries
+        index = self.filterindex
+        
+        if self.columnar:
+          views = entries.views
+          positions = index.Match(rowfilter, lambda rawidx: getattr(views.get(rawidx), "col_out", None))
+          keys = index.keys
+          hits = { keys[pos] for pos in positions }
+          shownentries = entries.subset( rawidx for rawidx in entries.order if rawidx in hits )
+        
+        else:
+          positions = index.Match(rowfilter, lambda entry: entry.col_out)
+          keys = index.keys
+          hits = { keys[pos] for pos in positions }
+          shownentries = [ entry for entry in entries if entry in hits ]
+        
+        perftrace.Count("shown", len(shownentries))
+      shown = self.shown = (shownkey, shownentries)
     
-    self.entries.sort(key=cellKeyFunction, reverse=sortreverse)
+    return shown[1]
 
   #access self.entries without handing over the entire list
-  def get_EntriesLen(self):     return len(self.entries)
-  def get_Entry(self,idx):      return self.entries[idx]
+  #  (the ROWS of the grid: only the entries passing the filter)
+  def get_EntriesLen(self):     return len(self.ShownEntries())
+  def get_Entry(self,idx):      return self.ShownEntries()[idx]
+  def get_EntriesLenAll(self):  return len(self.entries)
 
   def get_EntriesIterAll(self):
     """NORMAL: Iterator for all entries"""
     return iter(self.entries)
   
   def get_EntriesIterPick(self, idxpick):
-    """PICK: entries according as requested by list of idx"""
-    return (self.entries[idx] for idx in idxpick)
+    """PICK: entries according as requested by list of idx (rows of the grid)"""
+    shown = self.ShownEntries()
+    return (shown[idx] for idx in idxpick)
+  
+  def get_EntriesIterShown(self, markedonly=False):
+    """SHOWN: the entries passing the filter, in the order of the grid [only marked ones]"""
+    if markedonly:
+      return (entry for entry in self.ShownEntries() if entry.getMark())
+    return iter(self.ShownEntries())
 
   def get_EntriesIterMarked(self):
     """MARKED: only marked entries [x]"""
+    if self.columnar: return self.entries.iterMarked()
     return (entry for entry in self.entries if entry.getMark())
   
   def hasMarkedEntries(self):
     """predicate: does the DIR have any marked files at all ?"""
-    for _ in self.get_EntriesIterMarked():
-      return True               #yes, exit on the first hit
-                                #  (this is not inefficient as get_EntriesIterMarked 
-    return False                #   is a generator, and not a list)
+    return self.marks.nummark > 0       #the bits count themselves
 
   def countMarkedEntries(self):
     """3 numbers: marked files, marked anything and grand total ignoring marks"""
-    numfile = nummark = 0
+    numfile,nummark = self.marks.Counts()
+    return (numfile, nummark, len(self.entries))
+  
+  def countMarkedHidden(self):
+    """marked entries the filter hides: the main operations only see the rows shown"""
+    if not self.marks.nummark: return 0
+    positions = self.RowPositions()
+    if positions is None: return 0                  #no filter
+    return self.marks.nummark - self.marks.CountsIn(self.marks.Mask(positions))[1]
+  
+  #===== BULK MARKS: masks over the mark bits, no FileData asked
+  def RowPositions(self, rows=None):
+    """the positions (EntryIndex, mark bits) of rows of the grid, None: all rows shown"""
+    shown = self.ShownEntries()
+    if rows is None:
+      if shown is self.entries: return None         #no filter: everything
+      rows = range(len(shown))
+    if self.columnar:
+      order = shown.order
+      return [ order[row] for row in rows ]         #the raw index is the position
+    return [ shown[row].mypos for row in rows ]
+  
+  def MarkRows(self, rows, markmode):
+    """rows of the grid (None: all shown): 1 mark, 0 unmark, -1 toggle"""
+    self.marks.Apply( self.marks.Mask(self.RowPositions(rows)), markmode )
+    self.SortKeysChanged("mark")
+  
+  def MarkMatching(self, rule, markmode=1, invert=False, rows=None):
+    """the entries passing rule (a rowfilter.RowFilter: severities, a stamp in the name,
+      extensions, a name regex...), or with invert those NOT passing it,
+      only among rows of the grid (None: all shown): 1 mark, 0 unmark, -1 toggle
+      returns the number of entries changed"""
+    if self.filterindex is None: return 0
+    
+    with perftrace.Span("MarkMatching"):
+      if self.columnar:
+        views = self.entries.views
+        outputof = lambda rawidx: getattr(views.get(rawidx), "col_out", None)
+      else:
+        outputof = lambda entry: entry.col_out
+      
+      marks = self.marks
+      mask  = marks.Mask( self.filterindex.Match(rule, outputof) )
+      scope = marks.Mask( self.RowPositions(rows) )
+      mask  = (scope & ~mask) if invert else (scope & mask)
+      
+      before = int.from_bytes(marks.bits, "little")
+      marks.Apply(mask, markmode)
+      changed = _popcount( before ^ int.from_bytes(marks.bits, "little") )
+      perftrace.Count("marked", changed)
+    
+    self.SortKeysChanged("mark")
+    return changed
+  
+  #BATCH ACTIONS: the same as FileData.ActionAnalyse/ActionColourise,
+  #  but one CompareEpochColumns for all given entries
+  def ActionAnalyseBatch(self, entries, coldesc1,coldesc2):
+    files = [entry for entry in entries if entry.getType()=='F']
+    perftrace.Count("files", len(files))
+    
+    epochs1 = ColumnEpochs(files, "col_"+coldesc1.name)
+    epochs2 = ColumnEpochs(files, "col_"+coldesc2.name)
+    
+    for entry,result in zip(files, CompareEpochColumns(epochs1,epochs2)):
+      if result is None:
+        entry.SetOutput(None)   #one of them has no stamp
+      else:
+        severity,seconds = result
+        entry.SetOutput( (severity, entry.myseveritycolours[severity], seconds) )
+  
+  def ActionColouriseBatch(self, entries, coldesc1,coldesc2):
+    files = [entry for entry in entries if entry.getType()=='F']
+    perftrace.Count("files", len(files))
     
-    for entry in self.get_EntriesIterMarked():
-      nummark += 1
-      if entry.getType()=='F': numfile += 1
+    colname1 = "col_"+coldesc1.name
+    epochs1  = ColumnEpochs(files, colname1)
     
-    return (numfile, nummark, len(self.entries))
+    if coldesc2:                #just that ONE destination column
+      colnames2 = [ "col_"+coldesc2.name ]
+    else:                       #all other Timestamps (except coldesc1, the source)
+      colnames2 = [ colname for colname in FileData.allstampnames if colname!=colname1 ]
+    
+    for colname2 in colnames2:
+      epochs2 = ColumnEpochs(files, colname2)
+      
+      #no stamp on either side leaves the colour as it is (result None)
+      for entry,result in zip(files, CompareEpochColumns(epochs1,epochs2)):
+        if result is None: continue
+        entry._getCellValueCol(colname2).setActionColour( entry.myseveritycolours[result[0]] )
 
   #the main DIRECTORY handles my data file that may be there
+  #DATA FILE FORMAT:
+  #  0.1 one line per file "stamp<TAB>filename", sorted by filename
+  #  0.2 the same compact part, then a JOURNAL of the stamps changed since:
+  #      "#journal", records like above, each append closed by "#commit <count>"
+  #      a later record wins; records without their commit line are ignored
+  #      there is no record for "no stamp": a stamp gone (file deleted, stamp cleared)
+  #      means compacting the file
+  #  ! readers of 0.1 ignore the comments and also let later lines win, but they
+  #    apply an append cut off before its commit line too (0.2 drops it)
+  DATAFILE_VERSION = "0.2"
+  
   def readMyFile(self):
-    self.mydatafile_dict = {}
-    mydatafname = os.path.join(self.dirpath, config.MYFILENAME_DATA)
-    exists = os.path.isfile(mydatafname)
-    
-    self.has_mydatafile = exists
-    if exists:
-      #read with newline=None: universal newlines are default in PY3,
-      #  we always write \n but maybe a windows editor messed it up
-      try:
-        with open(mydatafname, "rt", encoding="utf8") as mydatafile:
-          for line in mydatafile:
-            line = line.strip()
-            if not line: continue         #empty lines (from outside editing...)
-            if line[0]=='#': continue     #ignore our comment, this is for different files formats in the future
+    with perftrace.Span("readMyFile"):
+      self.mydatafile_dict = {}
+      self.mydatafile_parsed = {}         #stamp string -> struct_time, None for errors
+      self.mydatafile_version = None      #None: unknown format, the next write compacts
+      self.mydatafile_counts = (0,0)      #records in the (compact part, journal)
+      mydatafname = os.path.join(self.dirpath, config.MYFILENAME_DATA)
+      exists = os.path.isfile(mydatafname)
+      
+      self.has_mydatafile = exists
+      if exists:
+        #read with newline=None: universal newlines are default in PY3,
+        #  we always write \n but maybe a windows editor messed it up
+        try:
+          with open(mydatafname, "rt", encoding="utf8") as mydatafile:
+            compact = 0
+            journal = 0
+            pending = None                #journal records not committed yet, None: compact part
             
-            timestamp, filename = line.split('\t')
+            for line in mydatafile:
+              line = line.strip()
+              if not line: continue         #empty lines (from outside editing...)
+              if line[0]=='#':
+                #our comments carry the file format
+                if line.startswith("#timestamper data file, fileversion "):
+                  self.mydatafile_version = line.rsplit(" ",1)[1]
+                elif line=="#journal" and pending is None:
+                  pending = {}
+                elif line.startswith("#commit ") and pending is not None:
+                  self.mydatafile_dict.update(pending)
+                  journal += len(pending)
+                  pending = {}
+                continue
+              
+              try:
+                timestamp, filename = line.split('\t')
+              except ValueError:          #an append that was cut off, (or outside editing)
+                continue
+              
+              #just store it and give it to the FileData objects later
+              if pending is None:
+                self.mydatafile_dict[filename] = timestamp
+                compact += 1
+              else:
+                pending[filename] = timestamp
             
-            #just store it and give it to the FileData objects later
-            self.mydatafile_dict[filename] = timestamp
-      
-      except OSError as ex:     #can't read my own datafile
-        ##mydatafile_dict remains {}
+            if pending:                   #an append without commit, write it all new next time
+              self.mydatafile_version = None
+            self.mydatafile_counts = (compact, journal)
+            perftrace.Count("datafile records", compact+journal)
+          
+          #all stamps parsed at once, the FileData pick theirs from that
+          stamps = list(set(self.mydatafile_dict.values()))
+          self.mydatafile_parsed = dict(zip(stamps, datastamp.strptimeMany(stamps, config.DATA_TIMESTAMP_FORMAT)))
         
-        return "cannot read my datafile: %s" % str(ex)
-          ##FUTURE: maybe this could make the line for my datafile red ?
-    
-    return None         #OK, no message
+        except OSError as ex:     #can't read my own datafile
+          ##mydatafile_dict remains {}
+          
+          return "cannot read my datafile: %s" % str(ex)
+            ##FUTURE: maybe this could make the line for my datafile red ?
+      
+      return None         #OK, no message
   
   def writeMyFile(self):
-    ##NO NEED for the old self.mydatafile...
+    """the datafile column into my datafile: only the changed stamps are appended
+      to the journal, the whole file is rewritten when that is too long"""
+    with perftrace.Span("writeMyFile"):
+      ##NO NEED for the old self.mydatafile...
+      
+      #1.the STAMPS as they will be in the file are exactly the TS5/stamp in datafile column
+      #  Dummies and Stamp-Proxies will return None for "nothing"
+      stamps = {}
+      for entry in self.entries:
+        stamp = entry.getTs5DatafileStamp()
+        if stamp: stamps[entry.getName()] = stamp
+      
+      #a directory read only in part (cancelled, failed) knows nothing about the rest:
+      #  the names without FileData keep their stamps, only a complete read drops one
+      known = self.mydatafile_dict or {}
+      if self.incomplete:
+        loaded = { entry.getName() for entry in self.entries }
+        for name,stamp in known.items():
+          if name not in loaded: stamps[name] = stamp
+      
+      changed = [(name,stamp) for name,stamp in stamps.items() if known.get(name)!=stamp]
+      removed = any( name not in stamps for name in known )
+      
+      #2.APPEND if the file is there in the current version, nothing is to be removed
+      #  and the journal stays short
+      compact,journal = self.mydatafile_counts
+      if (self.has_mydatafile and self.mydatafile_version==self.DATAFILE_VERSION and not removed
+          and journal+len(changed) <= max(config.DATAFILE_JOURNAL_MAX, compact)):
+        if not changed: return None       #nothing new
+        error = self.appendMyFile(changed)
+        if error: return error
+        
+        known.update(changed)
+        self.mydatafile_counts = (compact, journal+len(changed))
+      
+      #3.else COMPACT: everything new
+      else:
+        error = self.compactMyFile(stamps)
+        if error: return error
+      
+      self.has_mydatafile = "New"         #member not used yet
+      return None         #OK, no message
+  
+  def appendMyFile(self, changed):
+    """changed stamps as one journal record block, with one write call"""
+    mydatafname = os.path.join(self.dirpath, config.MYFILENAME_DATA)
+    
+    lines = ["#journal\n"] if self.mydatafile_counts[1]==0 else []
+    lines.extend("%s\t%s\n" % (stamp,name) for name,stamp in changed)
+    lines.append("#commit %d\n" % len(changed))
+    
+    try:
+      with open(mydatafname, "at", encoding="utf8", newline='\n') as mydatafile:
+        mydatafile.write("".join(lines))
+    
+    except OSError as ex:       #cant write my own data file
+      return "cannot write my datafile: %s" % str(ex)
     
+    return None
+  
+  def compactMyFile(self, stamps):
+    """rewrite my datafile without journal, stamps is {filename: stamp}
+      ! written to a temporary file first, which then replaces the old one"""
     mydatafname = os.path.join(self.dirpath, config.MYFILENAME_DATA)
+    tempfname = mydatafname + ".tmp"
     
-    #1.sort a copy of my entries strictly according to filename/unicode/lower
-    sortedentries = sorted( self.entries, key=lambda entry: entry.getName().lower() )
+    #sort strictly according to filename/unicode/lower
+    sortednames = sorted( stamps, key=lambda name: name.lower() )
     
     #always write with UNIX line endings;
     #  Windows line endings are accepted but never written,
     #  this means less source code differences when crossing platforms
     try:
-      with open(mydatafname, "wt", encoding="utf8", newline='\n') as mydatafile:
+      with open(tempfname, "wt", encoding="utf8", newline='\n') as mydatafile:
         #header comment, fixed to this version
-        mydatafile.write("#timestamper data file, fileversion 0.1\n")
-        
-        for entry in sortedentries:
-          #the STAMP that will be written to the file is exactly the TS5/stamp in datafile column
-          stamp = entry.getTs5DatafileStamp()
-          
-          #Dummies and Stamp-Proxies will return None for "nothing"
-          if stamp:
-            line = "%s\t%s\n" % (stamp, entry.getName())
-            mydatafile.write(line)
+        mydatafile.write("#timestamper data file, fileversion %s\n" % self.DATAFILE_VERSION)
+        mydatafile.write("".join("%s\t%s\n" % (stamps[name], name) for name in sortednames))
+      
+      os.replace(tempfname, mydatafname)
     
     except OSError as ex:       #cant write my own data file
+      try:
+        os.remove(tempfname)
+      except OSError:
+        pass
       return "cannot write my datafile: %s" % str(ex)
       ##cant help it, after update the column will be as before
     
-    self.has_mydatafile = "New"         #member not used yet
-    return None         #OK, no message
+    self.mydatafile_dict = dict(stamps)
+    self.mydatafile_version = self.DATAFILE_VERSION
+    self.mydatafile_counts = (len(stamps), 0)
+    return None
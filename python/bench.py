@@ -0,0 +1,355 @@
+"""the BENCHMARK HARNESS: the hot paths of the timestamper, stage by stage,
+  headless (a mock grid instead of wx), with JSON baselines
+  
+  python3 bench.py [--files 1000,10000] [--mode utc] [--save FILE] [--compare FILE]
+  
+  o the directories are made by benchgen.py in a temporary directory and
+    TZ is fixed: the same work on every machine and every run
+  o every stage is the best of --repeat runs, each one on fresh objects
+    and with cold caches (like a directory seen for the first time)
+  o MEMORY: bytes per file (tracemalloc) with the directory loaded, and
+    with every cell asked once (all columns built)
+  o --save writes times and memory as a baseline, --compare lists every stage
+    slower than the baseline by more than --tolerance (memory: MEMTOLERANCE)
+    and exits with 1 then
+  ! a baseline is for one machine, times of different machines say nothing
+"""
+
+import os,sys,time,json,shutil,platform,tempfile,argparse,tracemalloc
+
+import basis
+import config
+import fnamestamp
+import mediaprefs
+import transfer
+import benchgen
+import rowfilter
+import dircache
+import timestamper_cli          #the columns (and colours as tuples) without wx
+
+Columns = timestamper_cli.CliColDict
+AllColumnNames = timestamper_cli.AllColumnNames
+
+BASELINE_VERSION = 1
+NOISE = 0.002           #seconds: a stage this much slower is no regression, whatever the ratio
+MEMTOLERANCE = 0.05     #memory has no noise, only what python itself changes
+
+#-------------------------------------------------
+#the MOCK GRID: what StamperGridTable does for the GRID, without the GRID
+
+class MockGrid:
+  """asks the cells of the rows on screen, like the GRID when it paints"""
+  
+  def __init__(self, dirdata, rows=40):
+    self.dirdata = dirdata
+    self.rows = rows            #the rows on screen
+    self.columns = timestamper_cli.CliColumns_ALL
+  
+  def Paint(self, firstrow=0):
+    lastrow = min(firstrow+self.rows, self.dirdata.get_EntriesLen())
+    for row in range(firstrow, lastrow):
+      entry = self.dirdata.get_Entry(row)
+      for cc in self.columns:
+        entry.getCellDisplay(cc.name, cc.proxyobj)
+  
+  def SortRefresh(self, sortcols):
+    """like StamperDirTable.SortRefresh: sort, then the first screen"""
+    self.dirdata.ApplySortMulti(sortcols)
+    self.Paint(0)
+  
+  def ScrollAll(self):
+    """page down through the whole directory: every cell once"""
+    for firstrow in range(0, self.dirdata.get_EntriesLen(), self.rows):
+      self.Paint(firstrow)
+
+#-------------------------------------------------
+#the STAGES: setup(dirpath) makes what the run needs (not timed), run(that) is timed
+
+def Cold():
+  """forget what the last run has left in the module caches"""
+  fnamestamp._memo.clear()
+  mediaprefs.Resolver.Forget()
+
+def Loaded(dirpath):
+  Cold()
+  dirdata = basis.DirectoryData(AllColumnNames)
+  dirdata.GotoDir(dirpath)
+  return dirdata
+
+def Files(dirdata):
+  return [entry for entry in dirdata.get_EntriesIterAll() if entry.getType()=='F' and entry.getName()!=config.MYFILENAME_DATA]
+
+def sortCols(*spec):
+  return [ (name, Columns[name].proxyobj, reverse) for name,reverse in spec ]
+
+def setupScandir(dirpath):
+  return dirpath
+
+def runScandir(dirpath):
+  #the floor: what os.scandir and the stats alone cost
+  with os.scandir(dirpath) as it:
+    for entry in it: entry.stat()
+
+def setupFileData(dirpath):
+  Cold()
+  dirdata = basis.DirectoryData(AllColumnNames)
+  dirdata.PrepareDir(dirpath)
+  with os.scandir(dirpath) as it:
+    direntries = list(it)
+  for direntry in direntries: direntry.stat()       #the stats are kept in the os.DirEntry
+  return dirdata,direntries
+
+def runFileData(args):
+  dirdata,direntries = args
+  return [basis.FileData(dirdata, direntry) for direntry in direntries]
+
+def setupGotoDir(dirpath):
+  Cold()
+  return dirpath, basis.DirectoryData(AllColumnNames)
+
+def runGotoDir(args):
+  dirpath,dirdata = args
+  dirdata.GotoDir(dirpath)
+
+def runSortName(dirdata):
+  dirdata.ApplySortMulti( sortCols(("ftype",False), ("name",False)) )
+
+def runSortStamp(dirdata):
+  #builds the main stamp of every file on the way
+  dirdata.ApplySortMulti( sortCols(("ts1_modloc",True), ("name",False)) )
+
+def setupGrid(dirpath):
+  return MockGrid( Loaded(dirpath) )
+
+def runSortRefresh(grid):
+  grid.SortRefresh( sortCols(("ts3_winnew",False)) )
+
+def runScrollAll(grid):
+  grid.ScrollAll()
+
+#the FILTER bar: typed letter by letter, every keystroke repaints the first screen
+FilterKeystrokes = [ "i", "im", "img", "img_", "img_ .jpg", "img_ .jpg,.mp4", "", ".mp4", "type:d", "" ]
+
+def runFilter(grid):
+  for text in FilterKeystrokes:
+    grid.dirdata.SetFilter( rowfilter.ParseFilter(text)[0] )
+    grid.Paint(0)
+
+#BULK MARKS by rules, on an analysed directory (the severities are there)
+MarkRules = [ "sev:dst+", ".jpg", "has:fname", "re:^IMG_\\d+", "not has:fname .jpg" ]
+
+def setupMarks(dirpath):
+  dirdata = Loaded(dirpath)
+  dirdata.ActionAnalyseBatch(Files(dirdata), Columns["ts1_modloc"], Columns["ts4_fname"])
+  return dirdata
+
+def runMarks(dirdata):
+  for text in MarkRules:
+    words = text.split()
+    invert = words[0]=="not"
+    dirdata.MarkMatching(rowfilter.ParseFilter(" ".join(words[invert:]))[0], 1, invert)
+    dirdata.countMarkedEntries()
+    dirdata.MarkRows(None, 0)
+
+#BACK to a directory seen before: from the cache, revalidated (what the GUI does instead of GotoDir)
+def setupRevisit(dirpath):
+  cache = dircache.DirectoryCache()
+  signature = dircache.Signature(dirpath)
+  cache.Put(dirpath, Loaded(dirpath), signature)
+  return cache,dirpath
+
+def runRevisit(args):
+  cache,dirpath = args
+  assert cache.Take(dirpath), "the directory has changed"
+
+def setupReadMyFile(dirpath):
+  Cold()
+  dirdata = basis.DirectoryData(AllColumnNames)
+  dirdata.PrepareDir(dirpath)
+  return dirdata
+
+def runReadMyFile(dirdata):
+  dirdata.readMyFile()
+
+def setupWriteMyFile(dirpath):
+  dirdata = Loaded(dirpath)
+  for entry in Files(dirdata): entry.col_ts5_datafile
+  dirdata.mydatafile_version = None     #the whole file new, not just the journal
+  return dirdata
+
+def runWriteMyFile(dirdata):
+  dirdata.writeMyFile()
+
+def setupFiles(dirpath):
+  dirdata = Loaded(dirpath)
+  return dirdata, Files(dirdata)
+
+def runAnalyse(args):
+  dirdata,files = args
+  dirdata.ActionAnalyseBatch(files, Columns["ts1_modloc"], Columns["ts4_fname"])
+
+def runColourise(args):
+  dirdata,files = args
+  dirdata.ActionColouriseBatch(files, Columns["ts1_modloc"], None)
+
+def runTransfer(args):
+  #the filename stamps into the mtimes: every run sets the same ones again
+  dirdata,files = args
+  transfer.TransferBatch().Run(files, Columns["ts4_fname"], Columns["ts1_modloc"])
+  
+  ##ORDER: transfer changes the mtimes, it is the last one
+Stages = [
+  ("scandir",     setupScandir,     runScandir),
+  ("filedata",    setupFileData,    runFileData),
+  ("gotodir",     setupGotoDir,     runGotoDir),
+  ("sort-name",   Loaded,           runSortName),
+  ("sort-stamp",  Loaded,           runSortStamp),
+  ("sortrefresh", setupGrid,        runSortRefresh),
+  ("scroll-all",  setupGrid,        runScrollAll),
+  ("filter",      setupGrid,        runFilter),
+  ("mark-rules",  setupMarks,       runMarks),
+  ("revisit",     setupRevisit,     runRevisit),
+  ("readmyfile",  setupReadMyFile,  runReadMyFile),
+  ("writemyfile", setupWriteMyFile, runWriteMyFile),
+  ("analyse",     setupFiles,       runAnalyse),
+  ("colourise",   setupFiles,       runColourise),
+  ("transfer",    setupFiles,       runTransfer),
+]
+StageNames = [name for name,setup,run in Stages]
+
+def Timed(setup, run, dirpath, repeat):
+  """the best of some runs (the machine does other things too)"""
+  best = None
+  for _ in range(repeat):
+    args = setup(dirpath)
+    start = time.perf_counter()
+    run(args)
+    elapsed = time.perf_counter()-start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+#-------------------------------------------------
+#MEMORY
+
+def MemoryPerFile(dirpath, count):
+  """bytes per file: the directory loaded, then with all columns built"""
+  Cold()
+  tracemalloc.start()
+  try:
+    start = tracemalloc.get_traced_memory()[0]
+    dirdata = basis.DirectoryData(AllColumnNames)
+    dirdata.GotoDir(dirpath)
+    loaded = tracemalloc.get_traced_memory()[0]
+    MockGrid(dirdata).ScrollAll()
+    built = tracemalloc.get_traced_memory()[0]
+  finally:
+    tracemalloc.stop()
+  return { "loaded": (loaded-start)/count, "columns": (built-start)/count }
+
+#-------------------------------------------------
+#BASELINES
+
+def Compare(basevalues, values, tolerance, noise, format):
+  """lines for the report and the number of regressions: values like baseline["times"]"""
+  lines = []
+  worse = 0
+  for count,stages in values.items():
+    basestages = basevalues.get(count, {})
+    for name,now in stages.items():
+      base = basestages.get(name)
+      if base is None: continue
+      ratio = now/base if base else float("inf")
+      regression = ratio > 1+tolerance and now-base > noise
+      worse += regression
+      lines.append(("%8s %-12s " + format + " " + format + " %6.2fx%s") % (count, name, base, now, ratio, "  WORSE" if regression else ""))
+  return lines, worse
+
+def setTimezone(tzname):
+  os.environ["TZ"] = tzname
+  if hasattr(time, "tzset"): time.tzset()       ##not on Windows: the TZ of the machine then
+
+def countList(text):
+  """argparse type: comma separated numbers of files"""
+  try:
+    return [int(num) for num in text.split(",") if num.strip()]
+  except ValueError:
+    raise argparse.ArgumentTypeError("not a list of numbers: '%s'" % text)
+
+def stageList(text):
+  names = [name.strip() for name in text.split(",") if name.strip()]
+  for name in names:
+    if name not in StageNames:
+      raise argparse.ArgumentTypeError("unknown stage '%s'" % name)
+  return names
+
+def MakeArgParser():
+  parser = argparse.ArgumentParser(prog="bench.py", description="timestamper benchmark: the hot paths stage by stage")
+  parser.add_argument("--files",  type=countList, default=[1000,10000], metavar="N,N,...", help="directory sizes (default 1000,10000)")
+  parser.add_argument("--mode",   choices=benchgen.MODES, default="localdst", help="timestampmode of the directories (default localdst)")
+  parser.add_argument("--stages", type=stageList, default=StageNames, metavar="STAGE,...", help="from: %s" % ",".join(StageNames))
+  parser.add_argument("--repeat", type=int, default=3, help="runs per stage, the best counts (default 3)")
+  parser.add_argument("--tz",     default="Europe/Berlin", help="TZ for the whole run (default Europe/Berlin)")
+  parser.add_argument("--save",    metavar="FILE", help="write the times as a baseline")
+  parser.add_argument("--compare", metavar="FILE", help="compare the times with a baseline")
+  parser.add_argument("--tolerance", type=float, default=0.4, help="slower than the baseline by this is a regression (default 0.4, timing noise is about 0.2)")
+  return parser
+
+def main(argv):
+  args = MakeArgParser().parse_args(argv)
+  setTimezone(args.tz)
+  
+  baseline = None
+  if args.compare:
+    try:
+      with open(args.compare, "rt") as basefile:
+        baseline = json.load(basefile)
+    except (OSError, ValueError) as ex:
+      sys.stderr.write("%s: %s\n" % (args.compare, str(ex)))
+      return 2
+    if baseline.get("version")!=BASELINE_VERSION or baseline.get("mode")!=args.mode or baseline.get("tz")!=args.tz:
+      sys.stderr.write("%s: made with other settings (version, --mode or --tz)\n" % args.compare)
+      return 2
+  
+  stages = [stage for stage in Stages if stage[0] in args.stages]
+  times = {}
+  memory = {}
+  workdir = tempfile.mkdtemp(prefix="timestamper-bench-")
+  try:
+    for count in args.files:
+      dirpath = os.path.join(workdir, "%d-%s" % (count, args.mode))
+      start = time.perf_counter()
+      benchgen.Generate(dirpath, count, args.mode)
+      print("%d files (%s), made in %.1fs" % (count, args.mode, time.perf_counter()-start))
+      
+      times[str(count)] = stagetimes = {}         #str: like it comes back from JSON
+      for name,setup,run in stages:
+        elapsed = stagetimes[name] = Timed(setup, run, dirpath, args.repeat)
+        print("  %-12s %9.4fs %8.2fus/file" % (name, elapsed, elapsed*1e6/count))
+      
+      memory[str(count)] = bytesperfile = MemoryPerFile(dirpath, count)
+      print("  memory       %9.0fB/file loaded, %.0fB/file with all columns" % (bytesperfile["loaded"], bytesperfile["columns"]))
+  
+  finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+  
+  if args.save:
+    result = { "version": BASELINE_VERSION, "mode": args.mode, "tz": args.tz, "repeat": args.repeat,
+               "python": platform.python_version(), "machine": platform.platform(), "made": time.strftime("%Y-%m-%d %H:%M:%S"),
+               "times": times, "memory": memory }
+    with open(args.save, "wt") as savefile:
+      json.dump(result, savefile, indent=1, sort_keys=True)
+    print("baseline written to %s" % args.save)
+  
+  if baseline:
+    lines,slower = Compare(baseline["times"], times, args.tolerance, NOISE, "%9.4fs")
+    memlines,bigger = Compare(baseline.get("memory", {}), memory, MEMTOLERANCE, 0, "%9.0fB")
+    print("\n%8s %-12s %10s %10s %7s" % ("files", "stage", "baseline", "now", "ratio"))
+    for line in lines+memlines: print(line)
+    if slower or bigger:
+      print("%d stages slower, %d memory values bigger than %s" % (slower, bigger, args.compare))
+      return 1
+    print("nothing worse than %s" % args.compare)
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,66 @@
+"""BENCHMARK for fnamestamp: the scanner (literals, the prefilter from
+  fnamestamp.PREFILTER_MINPATTERNS patterns on) and the memo against the plain
+  loop over all patterns one by one (like CellObjectStampFname did it),
+  with more and more patterns registered
+  
+  python3 bench_fnamestamp.py [number of names]
+  
+  o the names are synthetic (benchgen.MakeNames): mostly camera names
+    without a stamp, some of every built-in pattern, some with wrong dates
+  o every name is checked: Recognize must give what the loop gives
+  ! scanner: new names, memo: the same names again (a directory seen before);
+    the memo is what makes Recognize fast, the scanner is about the loop
+"""
+
+import sys,time
+
+import fnamestamp
+import benchgen
+
+def ExtraPatterns(count):
+  """made-up vendor patterns, like more and more cameras would need"""
+  for num in range(count):
+    fnamestamp.Register("vendor%d" % num, "VND%d_([0-9]{4})([0-9]{2})([0-9]{2})T([0-9]{2})([0-9]{2})([0-9]{2})" % num,
+                        fnamestamp._convertFull, priority=60, minrun=8, literal="VND%d_" % num)
+
+def Timed(function, names, repeat=3):
+  """the best of some runs (the machine does other things too)"""
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    results = [function(name) for name in names]
+    elapsed = time.perf_counter()-start
+    best = elapsed if best is None else min(best, elapsed)
+  return best, results
+
+def main():
+  count = int(sys.argv[1]) if len(sys.argv)>1 else 100000
+  names = benchgen.MakeNames(count)
+  distinct = set(names)
+  
+  print("%d names (%d distinct)" % (len(names), len(distinct)))
+  print("%8s %10s %10s %10s %8s %8s" % ("patterns", "loop", "scanner", "memo", "x scan", "x memo"))
+  
+  registered = 0
+  for extra in [0, 6, 18, 42]:
+    ExtraPatterns(extra)                #the same names again are replaced, not added
+    registered = len(fnamestamp.Patterns)
+    
+    tloop,expected = Timed(fnamestamp.RecognizeList, names)
+    tscan,results  = Timed(fnamestamp._recognize, names)
+    tmemo,memoized = Timed(fnamestamp.Recognize, names)        #the first run fills the memo,
+                                                               #  then like opening the directory again
+    
+    if results!=expected or memoized!=expected:
+      bad = [name for name,a,b in zip(names,results,expected) if a!=b]
+      print("DIFFERENT results for %d names, eg. %r" % (len(bad), bad[:3]))
+      return 1
+    
+    print("%8d %9.3fs %9.3fs %9.3fs %7.1fx %7.1fx" % (registered, tloop, tscan, tmemo, tloop/tscan, tloop/tmemo))
+  
+  found = sum(1 for result in expected if result)
+  print("same results everywhere, %d names with a stamp" % found)
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
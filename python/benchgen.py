@@ -0,0 +1,150 @@
+"""the BENCHMARK DIRECTORIES: synthetic media directories, always the same
+  for the same arguments (bench.py makes its own, or by hand to try the GUI)
+  
+  python3 benchgen.py DIR [number of files] [utc|local0|localdst]
+  
+  o file names like cameras and phones make them: mostly without a stamp,
+    some of every built-in pattern of fnamestamp, some with wrong dates
+  o mtimes spread over some years, a share of them within hours of a DST
+    switch (EU rules: last Sunday of March and October, 01:00 UTC)
+  o a datafile with stamps for a share of the files, a mediaprefs file
+    with the timestampmode, a few subdirectories
+  ! the files are empty, the timestamper never reads them
+"""
+
+import os,sys,time,random,calendar
+
+import basis
+import config
+
+MODES = ["utc", "local0", "localdst"]
+
+YEARS = range(2018, 2026)       #the mtimes are in these years
+
+#-------------------------------------------------
+#NAMES
+
+def MakeNames(count, seed=1):
+  """file names like cameras and phones make them (there can be the same ones)"""
+  rnd = random.Random(seed)
+  def stamp(): return "20%02d%02d%02d" % (rnd.randint(0,30), rnd.randint(1,12), rnd.randint(1,28))
+  def clock(): return "%02d%02d%02d" % (rnd.randint(0,23), rnd.randint(0,59), rnd.randint(0,59))
+  makers = [
+    lambda: "DSC%05d.JPG" % rnd.randint(0,99999),
+    lambda: "IMG_%04d.JPG" % rnd.randint(0,9999),
+    lambda: "GX01%04d.MP4" % rnd.randint(0,9999),
+    lambda: "Holiday photo %d.jpg" % rnd.randint(0,999),
+    lambda: "notes.txt",
+    lambda: "%s_%s.jpg" % (stamp(), clock()),
+    lambda: "Screenshot_%s_%s_Some App.jpg" % (stamp(), clock()),
+    lambda: "Screenshot %s-%s-%s at %s-%s-%s.png" % (stamp()[:4], stamp()[4:6], stamp()[6:], "12", "34", "56"),
+    lambda: "PXL_%s_%s%03d.jpg" % (stamp(), clock(), rnd.randint(0,999)),
+    lambda: "IMG-%s-WA%04d.jpg" % (stamp(), rnd.randint(0,9999)),
+    lambda: "DJI_%s%s_%04d_D.JPG" % (stamp(), clock(), rnd.randint(0,9999)),
+    lambda: "signal-%d.jpg" % rnd.randint(1000000000000, 1999999999999),
+    lambda: "%s_%s.jpg" % (stamp()[:6]+"38", clock()),                #wrong date
+  ]
+  weights = [30,20,10,10,5, 5,4,3,3,3,2,2,3]
+  return [rnd.choices(makers, weights)[0]() for _ in range(count)]
+
+def UniqueNames(names):
+  """the same names made different: IMG_0001.JPG, IMG_0001~1.JPG, ..."""
+  seen = set()
+  unique = []
+  for name in names:
+    stem,extn = os.path.splitext(name)
+    num = 0
+    while name in seen or name==config.MYFILENAME_DATA:
+      num += 1
+      name = "%s~%d%s" % (stem, num, extn)
+    seen.add(name)
+    unique.append(name)
+  return unique
+
+#-------------------------------------------------
+#MTIMES
+
+def DstSwitches():
+  """the DST switches of YEARS in seconds (EU: last Sunday of March/October, 01:00 UTC)"""
+  switches = []
+  for year in YEARS:
+    for month in [3,10]:
+      lastday = calendar.monthrange(year, month)[1]
+      sunday = lastday - (calendar.weekday(year, month, lastday)+1) % 7
+      switches.append( calendar.timegm((year, month, sunday, 1, 0, 0)) )
+  return switches
+
+def MakeMtimes(count, rnd, dstshare):
+  """whole seconds: dstshare of them within 3 hours of a DST switch, the others anywhere in YEARS"""
+  first = calendar.timegm((YEARS[0], 1, 1, 0, 0, 0))
+  last  = calendar.timegm((YEARS[-1]+1, 1, 1, 0, 0, 0))
+  switches = DstSwitches()
+  
+  mtimes = []
+  for _ in range(count):
+    if rnd.random() < dstshare:
+      mtimes.append( rnd.choice(switches) + rnd.randint(-3*3600, 3*3600) )
+    else:
+      mtimes.append( rnd.randint(first, last) )
+  return mtimes
+
+#-------------------------------------------------
+#the DIRECTORY
+
+def Generate(dirpath, count, mode="utc", seed=1, dstshare=0.2, datashare=0.3):
+  """make the directory dirpath with count files (and count//1000+1 subdirectories),
+    returns the names of the files"""
+  assert mode in MODES, "timestampmode must be one of %s" % ",".join(MODES)
+  rnd = random.Random(seed)
+  names  = UniqueNames( MakeNames(count, seed) )
+  mtimes = MakeMtimes(count, rnd, dstshare)
+  
+  os.makedirs(dirpath, exist_ok=True)
+  for num in range(count//1000 + 1):
+    os.makedirs(os.path.join(dirpath, "subdir%03d" % num), exist_ok=True)
+  
+  with open(os.path.join(dirpath, config.MYFILENAME_MEDIAPREFS), "wt") as prefsfile:
+    prefsfile.write("timestampmode=%s\n" % mode)
+  
+  #the FILES: empty, the mtime set through the open file (no second path lookup)
+  dirfd = os.open(dirpath, os.O_RDONLY)
+  try:
+    for name,mtime in zip(names, mtimes):
+      fd = os.open(name, os.O_WRONLY|os.O_CREAT|os.O_TRUNC, 0o644, dir_fd=dirfd)
+      try:
+        os.utime(fd, (mtime, mtime))
+      finally:
+        os.close(fd)
+  finally:
+    os.close(dirfd)
+  
+  #the DATAFILE: the mtime, sometimes an hour off (like a FAT stamp seen in the wrong mode)
+  lines = ["#timestamper data file, fileversion %s\n" % basis.DirectoryData.DATAFILE_VERSION]
+  for name,mtime in sorted(zip(names, mtimes), key=lambda nm: nm[0].lower()):
+    if rnd.random() < datashare:
+      stamp = time.strftime(config.DATA_TIMESTAMP_FORMAT, time.localtime(mtime + rnd.choice([0,0,0,3600,-3600])))
+      lines.append("%s\t%s\n" % (stamp, name))
+  with open(os.path.join(dirpath, config.MYFILENAME_DATA), "wt", encoding="utf8", newline='\n') as datafile:
+    datafile.write("".join(lines))
+  
+  return names
+
+def main():
+  if len(sys.argv) < 2:
+    print(__doc__)
+    return 2
+  
+  dirpath = sys.argv[1]
+  count = int(sys.argv[2]) if len(sys.argv)>2 else 10000
+  mode  = sys.argv[3] if len(sys.argv)>3 else "utc"
+  if mode not in MODES:
+    print("timestampmode must be one of %s" % ",".join(MODES))
+    return 2
+  
+  start = time.perf_counter()
+  Generate(dirpath, count, mode)
+  print("%s: %d files (%s) in %.1fs" % (dirpath, count, mode, time.perf_counter()-start))
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
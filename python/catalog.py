@@ -0,0 +1,182 @@
+"""the CATALOG: all stamp columns of a whole archive in one SQLite file,
+  one row per file, so questions across all directories don't need a GotoDir each
+  
+  o every stamp is stored as basis.StampEpoch (seconds of the displayed date,
+    no timezone), a day is simply a range of 86400 of them
+  o the severity of every stamp against the MAIN COLUMN ts1_modloc is stored
+    as well (the number of basis.SEVERITY_NAMES, like ANALYSE would say)
+  o indexes on the directory path, every stamp and every severity
+  o updated per directory: a signature over the EntrySignatures and the settings
+    tells if anything changed since the last scan, if not the directory is skipped
+"""
+
+import os,hashlib,datetime
+
+try:
+  import sqlite3
+except ImportError:             #python built without it, no catalog then
+  sqlite3 = None
+
+import basis
+import config
+import treescan
+import tzkey                    #ZoneKey
+
+SCHEMA_VERSION = 1
+
+MAIN_STAMP = "ts1_modloc"
+STAMPS = ["ts1_modloc", "ts1_modgmt", "ts2_linux", "ts3_winnew", "ts3_winold", "ts4_fname", "ts5_datafile"]
+SEVERITIES = [name for name in STAMPS if name!=MAIN_STAMP]     #columns sev_<name>
+
+def DefaultPath():
+  return os.path.join(os.path.expanduser("~"), ".timestamper.catalog.sqlite")
+
+#-------------------------------------------------
+#EPOCHS <-> TEXT, in the same units as basis.StampEpoch
+
+def DayRange(text):
+  """"2025-12-14" -> (first second, first second of the next day)"""
+  start = datetime.date.fromisoformat(text).toordinal() * 86400
+  return (start, start+86400)
+
+def EpochText(epoch):
+  if epoch is None: return ""
+  days,seconds = divmod(epoch, 86400)
+  stamp = datetime.datetime.fromordinal(days) + datetime.timedelta(seconds=seconds)
+  return stamp.strftime("%Y-%m-%d %H:%M:%S")
+
+def SeverityNumber(text):
+  """"3", "3:dst" or "dst" -> 3"""
+  for num,name in basis.SEVERITY_NAMES.items():
+    if text in (str(num), name, name.split(":",1)[1]): return num
+  raise ValueError("unknown severity '%s'" % text)
+
+#-------------------------------------------------
+
+class Catalog:
+  def __init__(self, dbpath=None):
+    if sqlite3 is None:
+      raise RuntimeError("this python has no sqlite3, no catalog possible")
+    
+    self.dbpath = dbpath or DefaultPath()
+    try:
+      self.db = sqlite3.connect(self.dbpath)
+      self.db.execute("PRAGMA journal_mode=WAL")
+      self.db.execute("PRAGMA synchronous=NORMAL")
+      self.CreateSchema()
+    except sqlite3.Error as ex:
+      raise RuntimeError("cannot open catalog %s: %s" % (self.dbpath, str(ex)))
+  
+  def Close(self):
+    self.db.close()
+  
+  def CreateSchema(self):
+    version = self.db.execute("PRAGMA user_version").fetchone()[0]
+    if version==SCHEMA_VERSION: return
+    if version!=0:
+      raise RuntimeError("catalog %s has schema version %d, not %d" % (self.dbpath, version, SCHEMA_VERSION))
+    
+    stampcols = "".join(", %s INTEGER" % name for name in STAMPS)
+    sevcols   = "".join(", sev_%s INTEGER" % name for name in SEVERITIES)
+    with self.db:
+      self.db.execute("CREATE TABLE dirs (dirid INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, signature TEXT)")
+      self.db.execute("CREATE TABLE files (dirid INTEGER NOT NULL, name TEXT NOT NULL, bytes INTEGER%s%s, PRIMARY KEY (dirid,name)) WITHOUT ROWID" % (stampcols,sevcols))
+      for name in STAMPS:
+        self.db.execute("CREATE INDEX files_%s ON files (%s)" % (name,name))
+      for name in SEVERITIES:
+        self.db.execute("CREATE INDEX files_sev_%s ON files (sev_%s)" % (name,name))
+      self.db.execute("PRAGMA user_version=%d" % SCHEMA_VERSION)
+  
+  #===== UPDATE
+  @staticmethod
+  def DirSignature(dirdata):
+    """changes whenever a stamp of the directory might have changed:
+      any entry (the datafile is one of them), the mediaprefs, DST now, the TZ"""
+    entries = sorted( (entry.getName(), entry.mysignature) for entry in dirdata.get_EntriesIterAll() )
+    settings = (dirdata.fsutc, dirdata.dstnow, tzkey.ZoneKey)
+    return hashlib.sha1(repr((settings, entries)).encode("utf8", "surrogateescape")).hexdigest()
+  
+  def UpdateDir(self, dirdata):
+    """one directory from GotoDir into the catalog (no commit),
+      returns False if it was unchanged"""
+    dirpath = os.path.abspath(dirdata.dirpath)
+    signature = self.DirSignature(dirdata)
+    
+    row = self.db.execute("SELECT dirid,signature FROM dirs WHERE path=?", (dirpath,)).fetchone()
+    if row and row[1]==signature: return False
+    
+    if row:
+      dirid = row[0]
+      self.db.execute("DELETE FROM files WHERE dirid=?", (dirid,))
+      self.db.execute("UPDATE dirs SET signature=? WHERE dirid=?", (signature,dirid))
+    else:
+      dirid = self.db.execute("INSERT INTO dirs (path,signature) VALUES (?,?)", (dirpath,signature)).lastrowid
+    
+    files = [entry for entry in dirdata.get_EntriesIterAll()
+             if entry.getType()=='F' and entry.getName()!=config.MYFILENAME_DATA]
+    
+    #the stamps of all files at once, EPOCH_ERROR is stored like a missing stamp
+    epochs = {}
+    for name in STAMPS:
+      epochs[name] = [None if epoch is basis.EPOCH_ERROR else epoch
+                      for epoch in basis.ColumnEpochs(files, "col_"+name)]
+    
+    severities = {}
+    for name in SEVERITIES:
+      severities[name] = [None if result is None else int(result[0].split(":")[0])
+                          for result in basis.CompareEpochColumns(epochs[name], epochs[MAIN_STAMP])]
+    
+    rows = zip( [dirid]*len(files), [entry.getName() for entry in files], [entry.mystat.st_size for entry in files],
+                *[epochs[name] for name in STAMPS], *[severities[name] for name in SEVERITIES] )
+    self.db.executemany("INSERT INTO files VALUES (%s)" % ",".join("?" * (3+len(STAMPS)+len(SEVERITIES))), rows)
+    return True
+  
+  def UpdateTree(self, rootpath, AllColumnNames, maxworkers=4, report=None):
+    """all directories below rootpath (treescan), directories that are gone are removed
+      report(dirpath, errormessage, changed) is called for every directory
+      returns (directories, changed)"""
+    rootpath = os.path.abspath(rootpath)
+    seen = set()
+    numdirs = numchanged = 0
+    
+    with self.db:               #ONE transaction for the whole tree
+      for dirdata,errormessage in treescan.ScanTree(rootpath, AllColumnNames, maxworkers=maxworkers):
+        dirpath = os.path.abspath(dirdata.dirpath)
+        seen.add(dirpath)
+        
+        #a directory that can't be read keeps what the catalog knew
+        changed = False if errormessage else self.UpdateDir(dirdata)
+        numdirs += 1
+        numchanged += changed
+        if report: report(dirpath, errormessage, changed)
+      
+      #the directories of that tree the scan did not find any more
+      prefix = rootpath.rstrip(os.sep) + os.sep
+      for dirid,dirpath in self.db.execute("SELECT dirid,path FROM dirs WHERE path=? OR substr(path,1,?)=?",
+                                           (rootpath, len(prefix), prefix)).fetchall():
+        if dirpath not in seen:
+          self.db.execute("DELETE FROM files WHERE dirid=?", (dirid,))
+          self.db.execute("DELETE FROM dirs WHERE dirid=?", (dirid,))
+    
+    return (numdirs, numchanged)
+  
+  #===== QUERIES
+  def Query(self, where, params=()):
+    """GENERATOR over (path, bytes, {stamp: epoch}) for all files matching an SQL condition"""
+    cursor = self.db.execute("SELECT dirs.path, files.name, files.bytes, %s FROM files JOIN dirs USING (dirid) WHERE %s"
+                             % (",".join("files."+name for name in STAMPS), where), params)
+    for row in cursor:
+      yield os.path.join(row[0], row[1]), row[2], dict(zip(STAMPS, row[3:]))
+  
+  def FindDate(self, daytext, stamps=None):
+    """all files with a stamp on that day, in any of the stamps (default: all)"""
+    start,end = DayRange(daytext)
+    stamps = stamps or STAMPS
+    where  = " OR ".join("(%s>=? AND %s<?)" % (name,name) for name in stamps)
+    return self.Query(where, (start,end) * len(stamps))
+  
+  def FindSeverity(self, stamp, severities):
+    """all files where that stamp compares to ts1_modloc with one of the severities (numbers)"""
+    if stamp not in SEVERITIES:
+      raise ValueError("no severities stored for '%s'" % stamp)
+    return self.Query("sev_%s IN (%s)" % (stamp, ",".join("?"*len(severities))), tuple(severities))
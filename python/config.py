@@ -38,6 +38,48 @@ GUI_BYTES_FORMAT = "{:,}"
   #  ->will then be changed to '.'
 GUI_BYTES_SEPARATOR = "."
 
+  #COLUMNAR storage of the directory in the GUI (basis.ColumnarEntries):
+  #  arrays instead of one FileData per entry, FileData made only for the rows shown/used
+  #  => much less memory for directories with hundreds of thousands of entries
+COLUMNAR_DIRECTORIES = False
+
+  #TRANSFER of mtimes (transfer.TransferBatch): files set at the same time,
+  #  and one more os.stat per file afterwards to check the result
+TRANSFER_WORKERS = 8
+TRANSFER_VERIFY  = True
+  #...the mtime read back may differ by less than this (seconds): FAT/exFAT keep even seconds only
+TRANSFER_VERIFY_RESOLUTION = 2
+
+  #DATA FILE journal (fileversion 0.2): a transfer to the datafile column only appends
+  #  the changed stamps; the file is rewritten (compacted) when the journal has more records
+  #  than this, or more than the compact part of the file
+DATAFILE_JOURNAL_MAX = 500
+
+  #STAMP CACHE of the GUI (stampcache.StampCache): the stamp columns of the files,
+  #  kept between runs (key: inode, size, mtime, timestampmode, TZ...)
+  #  "" is the default file in the user's cache dir, None switches it off
+STAMPCACHE_FILE       = ""
+STAMPCACHE_MAXENTRIES = 200000
+
+  #JOBS of the GUI (jobs.JobRunner): loading a directory and the main operations
+  #  run in a worker thread, in chunks of this many entries (progress, cancel, partial results)
+JOB_CHUNK = 2000
+  #  a directory is shown after this many entries already (about one screenful), sorted
+JOB_FIRSTCHUNK = 100
+
+  #DIRECTORY CACHE of the GUI (dircache.DirectoryCache): the last directories shown are kept
+  #  with entries, marks and sort order, going back to one of them needs no reading
+  #  (if its mtime, datafile and mediaprefs are unchanged); this many directories/entries in all
+DIRCACHE_DIRS    = 10
+DIRCACHE_ENTRIES = 300000
+
+  #PERFORMANCE TRACE (perftrace.py): timing spans and counters around GotoDir, sorting,
+  #  the datafile and the actions, a summary in the status bar (or stderr);
+  #  also switched on by the environment: TIMESTAMPER_TRACE=1 (or =DIR for PERFTRACE_DIR)
+  #  PERFTRACE_DIR: a JSON trace per operation is written there (None: no files)
+PERFTRACE     = False
+PERFTRACE_DIR = None
+
   #COLOURS for special entries/columns...
 GUI_COLOUR_DIR   = (255,236,145)	#Directory: yellowish, like Icon in Explorer
 GUI_COLOUR_OTHER = (200,200,200)	#Other non-File: Grey
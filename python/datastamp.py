@@ -0,0 +1,53 @@
+"""the STAMP PARSER for config.DATA_TIMESTAMP_FORMAT: time.strptime
+  for the one format of the datafile, read for every file on every GotoDir
+  
+  "%Y-%m-%d %H:%M:%S" has every field at a fixed offset, and exactly that
+  layout is ISO 8601 as well, which datetime.fromisoformat reads in C
+  ! results are identical to time.strptime: everything else (other formats,
+    "2025-3-1 1:02:03", leap seconds, errors) still goes to time.strptime
+  ! there is no formatter here: time.strftime is C already and faster than
+    any python formatting of the 6 fields
+"""
+
+import time,datetime
+
+FIXED_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def _parseFixed(text):
+  """the fast path: struct_time, or None if only time.strptime can tell"""
+  if len(text)!=19 or not text.isascii(): return None
+  if text[4]!='-' or text[7]!='-' or text[10]!=' ' or text[13]!=':' or text[16]!=':': return None
+  
+  #exactly this layout is also ISO 8601, which datetime reads in C
+  try:
+    return datetime.datetime.fromisoformat(text).timetuple()
+      #like time.strptime: isdst -1, no zone
+  except ValueError:            #leap seconds, signs or spaces in the numbers...
+    return None
+
+#-------------------------------------------------
+#drop-in for the time module functions
+
+def strptime(text, format):
+  """time.strptime(text, format), raises ValueError just like it"""
+  if format==FIXED_FORMAT:
+    structtime = _parseFixed(text)
+    if structtime is not None: return structtime
+  
+  return time.strptime(text, format)
+
+def strptimeMany(texts, format):
+  """strptime for a whole list of texts (eg. all of a datafile),
+    returns a list with None where strptime raises ValueError"""
+  results = []
+  fixed = (format==FIXED_FORMAT)
+  
+  for text in texts:
+    structtime = _parseFixed(text) if fixed else None
+    if structtime is None:
+      try:
+        structtime = time.strptime(text, format)
+      except ValueError:
+        pass
+    results.append(structtime)
+  return results
@@ -0,0 +1,80 @@
+"""the DIRECTORY CACHE of the GUI: the last directories shown, as they were
+  (basis.DirectoryData with entries, marks, outputs and sort order), so going
+  back to one of them (Go Up, a subdirectory seen a moment ago) is instant
+  
+  o LRU: at most config.DIRCACHE_DIRS directories and config.DIRCACHE_ENTRIES
+    entries in all, the one used longest ago goes first
+  o REVALIDATED when taken: the Signature of the directory (its mtime, the
+    mtimes of its datafile and of the nearest mediaprefs file, DST now, the TZ)
+    must be the one from before it was read, else it is read again
+  ! the mtime of a directory changes with its entries (new, deleted, renamed),
+    not with the mtime of a file set by another program: Refresh reads it again
+"""
+
+import os,time,collections
+
+import config
+import mediaprefs
+import tzkey                    #ZoneKey
+
+def _mtime(path):
+  try:
+    return os.stat(path).st_mtime_ns
+  except OSError:
+    return None
+
+def Signature(dirpath):
+  """what tells cheaply whether a DirectoryData of dirpath is still the same,
+    taken BEFORE reading it (a change while reading makes it outdated at once)"""
+  prefspath = mediaprefs.Resolver.NearestFile(dirpath)
+  return ( _mtime(dirpath), _mtime(os.path.join(dirpath, config.MYFILENAME_DATA)),
+           prefspath, prefspath and _mtime(prefspath),
+           time.localtime().tm_isdst, tzkey.RevalidateZone() )
+
+class DirectoryCache:
+  """the DirectoryData of some directories by absolute path, the newest last"""
+  
+  def __init__(self, maxdirs=None, maxentries=None):
+    self.maxdirs    = config.DIRCACHE_DIRS    if maxdirs    is None else maxdirs
+    self.maxentries = config.DIRCACHE_ENTRIES if maxentries is None else maxentries
+    self.items = collections.OrderedDict()      #abspath -> (dirdata, signature, state), the newest last
+    self.numentries = 0
+  
+  def __len__(self): return len(self.items)
+  
+  def Put(self, dirpath, dirdata, signature, state=None):
+    """keep dirdata (signature from before reading it), state: what the GUI wants back
+      with it (its sort order), the oldest ones go if there are too many
+      ! a dirdata read only in part (incomplete, cancelled) is never kept"""
+    self.Forget(dirpath)
+    if dirdata.incomplete: return                               #read it again next time
+    size = dirdata.get_EntriesLenAll()
+    if not self.maxdirs or size > self.maxentries: return       #too big for the cache
+    
+    self.items[os.path.abspath(dirpath)] = (dirdata, signature, state)
+    self.numentries += size
+    
+    while len(self.items) > self.maxdirs or self.numentries > self.maxentries:
+      oldpath,(olddata,oldsignature,oldstate) = self.items.popitem(last=False)
+      self.numentries -= olddata.get_EntriesLenAll()
+  
+  def Take(self, dirpath):
+    """(dirdata, signature, state) for dirpath if nothing changed since, else None;
+      it is no longer in the cache then (it is shown, Put it back when leaving)"""
+    item = self.Forget(dirpath)
+    if item is None: return None
+    
+    dirdata,signature,state = item
+    if Signature(dirpath) != signature: return None             #outdated, read again
+    return item
+  
+  def Forget(self, dirpath=None):
+    """dirpath is no longer cached (None: nothing is), returns what it was"""
+    if dirpath is None:
+      self.items.clear()
+      self.numentries = 0
+      return None
+    
+    item = self.items.pop(os.path.abspath(dirpath), None)
+    if item: self.numentries -= item[0].get_EntriesLenAll()
+    return item
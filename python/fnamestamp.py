@@ -0,0 +1,170 @@
+"""the FILENAME STAMPS: which stamp (if any) a file name carries, for ts4_fname
+
+  o a REGISTRY of patterns with priorities (Register), the built-in ones below
+  o the result is remembered per name (the same names come again and again):
+    THIS is the speedup, a directory seen again costs a dict lookup per name
+  o the scan of a new name: the patterns in order, skipped without a search
+    if the name lacks their literal ("PXL_", "-WA");
+    from PREFILTER_MINPATTERNS patterns on, a PREFILTER first: one findall for
+    the runs of digits, only the patterns that can live with the longest run
+    are searched at all (DSC01234.JPG: none of a 14 digit pattern)
+    ! measured with bench_fnamestamp.py: with the 6 built-in patterns the
+      prefilter costs more than it saves (0.8x of the plain loop, the findall
+      alone is about as expensive as 6 searches), it pays from about 24 on
+  ! the result is the same as searching the patterns one by one in order of
+    priority: the first pattern that matches anywhere in the name wins,
+    a wrong date then (2025-13-38) means no stamp at all
+  ! ONE combined regex (all patterns as alternatives) is slower than the loop:
+    python's re tries every alternative at every position of the name, but
+    searches a pattern that starts with a literal with a fast scan
+  ! GoPro names (GOPR0001, GX010001) have no date, so there is no pattern for them
+"""
+
+import re,time,datetime,hashlib
+
+import tzkey                    #ZoneKey
+
+#-------------------------------------------------
+#CONVERTERS: regex groups -> struct_time, ValueError if it is no valid stamp
+
+def _convertCentury(grps):
+  """[century or None, yy, MM, DD, HH, MM, SS]"""
+  century,year,month,day,hour,minute,second = grps
+  year = (century or "20") + year       #default century is 20xx
+  return datetime.datetime(int(year), int(month), int(day), int(hour), int(minute), int(second)).timetuple()
+
+def _convertFull(grps):
+  """[YYYY, MM, DD, HH, MM, SS], or just [YYYY, MM, DD]: midnight"""
+  return datetime.datetime(*map(int, grps)).timetuple()
+
+def _convertEpochMs(grps):
+  """[milliseconds since 1970], shown in local time like ts1_modloc"""
+  return time.localtime( int(grps[0]) // 1000 )
+
+#-------------------------------------------------
+#REGISTRY
+
+class FnamePattern:
+  def __init__(self, name, restring, convert, priority, minrun, literal):
+    self.name      = name
+    self.restring  = restring
+    self.regex     = re.compile(restring)
+    self.convert   = convert            #groups -> struct_time
+    self.priority  = priority           #higher is tried first
+    self.minrun    = minrun             #a name without this many digits in a row can't match
+    self.literal   = literal            #a name without this can't match (or None)
+
+Patterns = []           #sorted by priority
+
+_buckets = [[]]         #longest run of digits -> the Patterns possible with it, as (literal, search, convert)
+_prefilter = False      #are there enough patterns for the PREFILTER ?
+PatternsKey = ""        #changes with the patterns (stampcache: what was found with other ones is stale)
+
+PREFILTER_MINPATTERNS = 24
+
+def Register(name, restring, convert, priority=50, minrun=1, literal=None):
+  """add (or replace) a pattern, restring like for re.compile"""
+  global Patterns
+  Patterns = [pattern for pattern in Patterns if pattern.name!=name]
+  Patterns.append( FnamePattern(name, restring, convert, priority, minrun, literal) )
+  Patterns.sort(key=lambda pattern: -pattern.priority)         #stable: same priority in order of Register
+  _compile()
+
+def _compile():
+  global _buckets,_prefilter,PatternsKey
+  longest = max((pattern.minrun for pattern in Patterns), default=0)
+  _buckets = [ [(pattern.literal, pattern.regex.search, pattern.convert) for pattern in Patterns if pattern.minrun<=run]
+               for run in range(longest+1) ]
+    ##the last bucket has all the patterns
+  _prefilter = len(Patterns) >= PREFILTER_MINPATTERNS
+  PatternsKey = hashlib.sha1(repr([(pattern.name, pattern.restring, pattern.priority) for pattern in Patterns]).encode()).hexdigest()[:12]
+  _memo.clear()
+
+#-------------------------------------------------
+#the SCANNER
+
+_DIGITRUNS = re.compile("[0-9]+")
+MEMOMAX    = 200000      #names remembered, then start again
+
+_memo   = {}            #name -> struct_time or None
+_memotz = None          #the epoch patterns depend on the TZ: tzkey.ZoneKey of _memo
+
+def Recognize(fname):
+  """struct_time of the stamp in the name, None if there is none"""
+  global _memotz
+  if _memotz is not tzkey.ZoneKey or len(_memo) > MEMOMAX:
+    _memo.clear()
+    _memotz = tzkey.ZoneKey
+  
+  try:
+    return _memo[fname]
+  except KeyError:
+    structtime = _memo[fname] = _recognize(fname)
+    return structtime
+
+def _recognize(fname):
+  if _prefilter:
+    #PREFILTER: the patterns possible with the longest run of digits
+    runs = _DIGITRUNS.findall(fname)
+    if not runs: return None
+    bucket = _buckets[ min(max(map(len, runs)), len(_buckets)-1) ]
+  else:
+    bucket = _buckets[-1]
+  
+  for literal,search,convert in bucket:
+    if literal and literal not in fname: continue
+    m = search(fname)
+    if m:
+      try:
+        return convert(m.groups())
+      except (ValueError, OverflowError, OSError):      #filenames can have wrong dates 2025-13-38
+        return None                                     #like it wasn't there
+  return None
+
+def RecognizeList(fname):
+  """the slow reference: every pattern on its own in order of priority,
+    Recognize must give the same (bench_fnamestamp.py)"""
+  for pattern in Patterns:
+    m = pattern.regex.search(fname)
+    if m:
+      try:
+        return pattern.convert(m.groups())
+      except (ValueError, OverflowError, OSError):
+        return None
+  return None
+
+#-------------------------------------------------
+#the BUILT-IN PATTERNS
+
+_RESTR_NUM6_PURE  = "([0-9]{2})([0-9]{2})([0-9]{2})"
+_RESTR_NUM6_MINUS = "([0-9]{2})-([0-9]{2})-([0-9]{2})"
+
+  #Pixel: PXL_20251214_120000123.jpg (milliseconds after the seconds)
+Register("pixel", "PXL_([0-9]{4})([0-9]{2})([0-9]{2})_([0-9]{2})([0-9]{2})([0-9]{2})",
+         _convertFull, priority=110, minrun=8, literal="PXL_")
+  
+  #yyYYMMDD -_ HHMMSS
+  #o Samsung Fotos: 20251214_120000.jpg
+  #o Samsung Shots: Screenshot_20251214_120000_Program Name.jpg
+  #o Foto Rename: phoneprefix-251214-120000 Content description.jpg
+Register("num6-num6", "(19|20|21)?%s[_-]%s" % ((_RESTR_NUM6_PURE,)*2),
+         _convertCentury, priority=100, minrun=6)
+  
+  #yyYY-MM-DD xxxxxxx HH-MM-SS
+  #o XFCE FX Shot: Screenshot 2026-01-12 at 15-57-36 Startpage.png
+  #o XFCE dom0 Shot: Screenshot_2026-01-10_21-57-04.png
+Register("minus6-minus6", "(19|20|21)?%s.*%s" % ((_RESTR_NUM6_MINUS,)*2),
+         _convertCentury, priority=90, minrun=2, literal="-")
+  
+  #DJI drones: DJI_20251214120000_0001_D.JPG
+Register("dji", "DJI_([0-9]{4})([0-9]{2})([0-9]{2})([0-9]{2})([0-9]{2})([0-9]{2})",
+         _convertFull, priority=80, minrun=14, literal="DJI_")
+  
+  #WhatsApp: IMG-20251214-WA0001.jpg, VID-20251214-WA0001.mp4 (date only)
+Register("whatsapp", "(?:IMG|VID|AUD|PTT|STK|DOC)-([0-9]{4})([0-9]{2})([0-9]{2})-WA[0-9]+",
+         _convertFull, priority=70, minrun=8, literal="-WA")
+  
+  #milliseconds since 1970 (Signal, Telegram, browsers): 1765710000000.jpg
+  #  13 digits starting with 1 are 2001..2033, anything longer is no such number
+Register("epoch-ms", "(?<![0-9])(1[0-9]{12})(?![0-9])",
+         _convertEpochMs, priority=10, minrun=13)
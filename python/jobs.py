@@ -0,0 +1,78 @@
+"""the JOB RUNNER: long basis work (GotoDir, Analyse, Colourise, Transfer)
+  in a worker thread, the GUI stays alive, shows progress and can cancel
+  
+  o a job is a STEP GENERATOR: it works in chunks and yields
+    (done, total, results) after each one, total None if not known yet,
+    results a list of what that chunk produced (or None);
+    what it returns is the result of the whole job
+  o everything for the GUI (progress, partial results, the end) goes through
+    post (wx.CallAfter in the GUI), so it runs in the GUI thread
+  o ONE job at a time: Start refuses (returns a message) while one runs,
+    it is only over when ondone has been called (in the GUI thread)
+  o Cancel: the worker stops at the next yield and closes the generator
+    (its finally blocks run), what the chunks did so far stays done
+  ! basis knows nothing of threads: it just offers generators (GotoDirSteps,
+    BatchSteps, TransferBatch.RunSteps) and RunSteps to use them without a job
+"""
+
+import sys,threading,traceback
+
+class Job:
+  def __init__(self, name, steps, onprogress, ondone):
+    self.name = name
+    self.steps = steps                  #the step generator
+    self.onprogress = onprogress        #onprogress(done, total, results)
+    self.ondone = ondone                #ondone(result, cancelled, error): error is a message or ""
+    self.cancelled = threading.Event()
+
+class JobRunner:
+  def __init__(self, post=None):
+    #post(function, *args) calls function in the GUI thread, default: right here
+    self.post = post or (lambda function, *args: function(*args))
+    self.job = None
+  
+  def Busy(self):
+    """the name of the running job, "" if there is none"""
+    return self.job.name if self.job else ""
+  
+  def Start(self, name, steps, onprogress=None, ondone=None):
+    """run steps in a worker thread, returns an error message if a job is running already"""
+    if self.job:
+      return "'%s' is still running, wait for it or cancel it first." % self.job.name
+    
+    self.job = Job(name, steps, onprogress, ondone)
+    threading.Thread(target=self._run, args=(self.job,), name="job "+name, daemon=True).start()
+    return ""
+  
+  def Cancel(self):
+    if self.job: self.job.cancelled.set()
+  
+  #===== in the WORKER thread
+  def _run(self, job):
+    result = None
+    error = ""
+    try:
+      while True:
+        if job.cancelled.is_set():
+          job.steps.close()
+          break
+        try:
+          progress = next(job.steps)
+        except StopIteration as stop:
+          result = stop.value
+          break
+        self.post(self._progress, job, progress)
+    
+    except Exception as ex:             #a bug or an unexpected OSError: tell the user, keep the GUI
+      traceback.print_exc(file=sys.stderr)
+      error = "%s failed: %s" % (job.name, str(ex))
+    
+    self.post(self._done, job, result, error)
+  
+  #===== in the GUI thread
+  def _progress(self, job, progress):
+    if job.onprogress: job.onprogress(*progress)
+  
+  def _done(self, job, result, error):
+    self.job = None                     #free for the next job, even from ondone
+    if job.ondone: job.ondone(result, job.cancelled.is_set(), error)
@@ -0,0 +1,94 @@
+"""the MEDIAPREFS RESOLVER: the settings of config.MYFILENAME_MEDIAPREFS
+  for a directory, from the nearest such file up the directory tree
+  
+  o per directory: which prefs file is the nearest one (or none at all),
+    a directory asks its parent's answer, not the filesystem again
+    -> a tree scan looks once into every directory, the parents are known
+  o per prefs file: the parsed settings, parsed again if its mtime changed
+  o answers older than RECHECK seconds are looked up again: a prefs file
+    created (or deleted) meanwhile is seen by the next directory after that
+  ! Forget() when the user wants to see changes now (Refresh)
+"""
+
+import os,time,threading
+
+import config
+
+class MediaPrefsResolver:
+  RECHECK = 2.0                 #seconds an answer is trusted without asking the filesystem
+  MEMOMAX = 100000              #directories remembered, then start again
+  
+  def __init__(self):
+    self.lock = threading.Lock()        #treescan resolves in several threads
+    self.Forget()
+  
+  def Forget(self):
+    """forget everything, the next Settings asks the filesystem again"""
+    self.nearest = {}           #dirpath -> (nearest prefs file or None, time checked)
+    self.files   = {}           #prefs file -> (mtime_ns or None, settings, time checked)
+  
+  def Settings(self, dirpath):
+    """the settings for dirpath as a dict (empty if there is no prefs file)
+      ! the dict is shared, don't change it"""
+    now = time.monotonic()
+    with self.lock:
+      if len(self.nearest) > self.MEMOMAX: self.Forget()
+      inipath = self.Nearest(os.path.abspath(dirpath), now)
+      if inipath is None: return {}
+      return self.ParsedFile(inipath, now)
+  
+  def NearestFile(self, dirpath):
+    """path of the prefs file for dirpath, None if there is none"""
+    with self.lock:
+      return self.Nearest(os.path.abspath(dirpath), time.monotonic())
+  
+  def Nearest(self, dirpath, now):
+    """path of the prefs file for dirpath (absolute), None if there is none up to the root"""
+    known = self.nearest.get(dirpath)
+    if known and now-known[1] < self.RECHECK: return known[0]
+    
+    inipath = os.path.join(dirpath, config.MYFILENAME_MEDIAPREFS)
+    if not os.path.isfile(inipath):
+      parentpath = os.path.dirname(dirpath)
+      #we have reached root without finding anything
+      inipath = None if parentpath==dirpath else self.Nearest(parentpath, now)
+    
+    self.nearest[dirpath] = (inipath, now)
+    return inipath
+  
+  def ParsedFile(self, inipath, now):
+    known = self.files.get(inipath)
+    if known and now-known[2] < self.RECHECK: return known[1]
+    
+    try:
+      mtime = os.stat(inipath).st_mtime_ns
+    except OSError:             #gone since Nearest: no settings (until RECHECK)
+      mtime = None
+    
+    if known and known[0]==mtime:
+      settings = known[1]
+    else:
+      settings = self.ReadFile(inipath) if mtime is not None else {}
+    self.files[inipath] = (mtime, settings, now)
+    return settings
+  
+  @staticmethod
+  def ReadFile(inipath):
+    settings = {}
+    try:
+      with open(inipath,"rt") as inifile:
+        for line in inifile:
+          #strip spaces, ignore empty lines and comments
+          line = line.strip()
+          if not line: continue
+          if line[0]=='#': continue
+          
+          key,value = line.split('=')
+          settings[key]=value
+    
+    except OSError:             #cant read my own INI
+      pass                      #settings remain {}, no need to try again
+    return settings
+
+#the resolver for all directories (GUI, command line, treescan)
+Resolver = MediaPrefsResolver()
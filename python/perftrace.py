@@ -0,0 +1,129 @@
+"""the PERFORMANCE TRACE: timing spans and counters around the hot paths
+  (GotoDir, readMyFile, sorting, the actions, the refresh of the GUI)
+  
+  switched on by the environment: TIMESTAMPER_TRACE=1, or =DIR to write
+  the traces into DIR as well; or by config.PERFTRACE/PERFTRACE_DIR
+  
+  o with Span("name"): the outermost span of a thread is an OPERATION,
+    the spans inside it and the Count("name", num) are collected in it
+  o at the end of an operation a one line summary goes to Report
+    (the GUI: its status bar, else stderr) and with a directory a JSON
+    trace to a file of its own (Chrome trace events: chrome://tracing,
+    ui.perfetto.dev)
+  ! switched off, Span returns one shared object that does nothing and
+    Count returns at once: the cost is a call per stage, not per file
+  ! spans are per thread: a step generator keeps its span open over the yields,
+    so it must run in one thread (jobs.py does) and be closed or run to its end
+"""
+
+import os,sys,time,json,threading
+
+import config
+
+_environ = os.environ.get("TIMESTAMPER_TRACE", "")
+Enabled  = bool(config.PERFTRACE) or _environ not in ("", "0")
+TraceDir = (_environ if _environ not in ("", "0", "1") else None) or config.PERFTRACE_DIR
+
+Report = None           #Report(summary) for every operation, in its thread (None: stderr)
+
+_local = threading.local()              #.operation: the open one of this thread
+
+class Operation:
+  """the spans and counters of one outermost span"""
+  
+  def __init__(self, name, args):
+    self.name     = name
+    self.args     = args
+    self.start    = time.perf_counter()
+    self.spans    = []          #(name, start, duration, depth), in the order they END
+    self.counters = {}
+    self.depth    = 0
+  
+  def Summary(self):
+    """one line: the operation, the stages right inside it (summed up by name), the counters"""
+    total = self.spans[-1][2]
+    stages = {}
+    for name,start,duration,depth in self.spans:
+      if depth==1: stages[name] = stages.get(name, 0.0) + duration
+    text = "%s %.3fs" % (self.name, total)
+    if stages:
+      text += ": " + ", ".join("%s %.3fs" % (name, duration) for name,duration in stages.items())
+    if self.counters:
+      text += " | " + ", ".join("%s %d" % (name, num) for name,num in self.counters.items())
+    return text
+  
+  def Trace(self):
+    """the operation as Chrome trace events, times in microseconds from its start"""
+    pid = os.getpid()
+    tid = threading.get_ident()
+    events = [ {"name":name, "ph":"X", "ts":round((start-self.start)*1e6, 1), "dur":round(duration*1e6, 1), "pid":pid, "tid":tid}
+               for name,start,duration,depth in self.spans ]
+    events[-1]["args"] = self.args
+    name,start,duration,depth = self.spans[-1]
+    end = (start-self.start+duration)*1e6
+    events.extend( {"name":name, "ph":"C", "ts":round(end, 1), "pid":pid, "tid":tid, "args":{"count":num}}
+                   for name,num in self.counters.items() )
+    return {"traceEvents":events, "displayTimeUnit":"ms", "otherData":{"operation":self.name, "summary":self.Summary()}}
+
+class _Span:
+  def __init__(self, name, args):
+    self.name = name
+    self.args = args
+  
+  def __enter__(self):
+    operation = getattr(_local, "operation", None)
+    self.isroot = operation is None
+    if self.isroot:
+      operation = _local.operation = Operation(self.name, self.args)
+    self.operation = operation
+    self.depth = operation.depth
+    operation.depth += 1
+    self.start = time.perf_counter()
+    return self
+  
+  def __exit__(self, *exc):
+    operation = self.operation
+    operation.spans.append( (self.name, self.start, time.perf_counter()-self.start, self.depth) )
+    operation.depth -= 1
+    if self.isroot:
+      if getattr(_local, "operation", None) is operation: _local.operation = None
+      _finish(operation)
+    return False
+
+class _NullSpan:
+  def __enter__(self): return self
+  def __exit__(self, *exc): return False
+
+_NULLSPAN = _NullSpan()
+
+def Span(name, **args):
+  """with Span("readMyFile"): ..., args go into the trace (outermost span only)"""
+  if not Enabled: return _NULLSPAN
+  return _Span(name, args)
+
+def Count(name, num=1):
+  """add num to a counter of the open operation (none open: nothing)"""
+  if not Enabled: return
+  operation = getattr(_local, "operation", None)
+  if operation: operation.counters[name] = operation.counters.get(name, 0) + num
+
+def Counted(name, function):
+  """function, counting its calls (only used when Enabled: no wrapper otherwise)"""
+  def counted(*args):
+    Count(name)
+    return function(*args)
+  return counted
+
+def _finish(operation):
+  summary = operation.Summary()
+  if Report: Report(summary)
+  else:      sys.stderr.write("trace: %s\n" % summary)
+  
+  if TraceDir:
+    filename = "trace-%s-%06d-%s.json" % (time.strftime("%Y%m%d-%H%M%S"), int(operation.start*1e6) % 1000000, operation.name)
+    try:
+      os.makedirs(TraceDir, exist_ok=True)
+      with open(os.path.join(TraceDir, filename), "wt") as tracefile:
+        json.dump(operation.Trace(), tracefile, default=str)
+    except OSError as ex:       #no trace, but no harm either
+      sys.stderr.write("trace: cannot write %s: %s\n" % (filename, str(ex)))
@@ -0,0 +1,101 @@
+"""the FILTER of the grid: only the rows with a text in the name, of some
+  extensions, some types or some severities in the output;
+  the same RULES mark entries in bulk (DirectoryData.MarkMatching)
+  
+  the filter bar takes words, all of them must match:
+    .mp4 .mov   (or *.mp4, or .mp4,.mov)   one of these extensions
+    type:F      (type:FD, F/D/x)           one of these types
+    sev:3,4     (sev:dst,hours)            the output (ANALYSE) has one of these severities
+    sev:dst+    (sev:3+)                   ... this severity or a worse one
+    has:fname                              a stamp in the name (ts4_fname)
+    re:REGEX                               the name matches (search, no case)
+    anything else                          the name contains it (no case, words with one blank)
+  
+  o the matching is done by basis.DirectoryData with its EntryIndex: names,
+    extensions and types are indexed while the directory loads
+  o one more letter typed only looks at the rows the last filter has let through
+"""
+
+import re
+
+import basis
+import catalog                  #SeverityNumber: "3", "3:dst" or "dst"
+
+FTYPES = { "f":"F", "d":"D", "x":"x" }
+
+class RowFilter:
+  """what a filter asks for, never changed once made (basis.EntryIndex keeps the last one)"""
+  __slots__ = ("text", "extns", "ftypes", "severities", "hasfname", "pattern", "regex")
+  
+  def __init__(self, text="", extns=(), ftypes=(), severities=(), hasfname=False, pattern=""):
+    """pattern: a regex for the names (raises re.error)"""
+    self.text       = text.lower()
+    self.extns      = frozenset(extn.lower() for extn in extns)
+    self.ftypes     = frozenset(ftypes)
+    self.severities = frozenset(severities)
+    self.hasfname   = hasfname
+    self.pattern    = pattern
+    self.regex      = re.compile(pattern, re.IGNORECASE) if pattern else None
+  
+  def __repr__(self):
+    return "<RowFilter %r ext=%s type=%s sev=%s fname=%s re=%r>" % (self.text, ",".join(sorted(self.extns)),
+                                                                     "".join(sorted(self.ftypes)), ",".join(map(str, sorted(self.severities))),
+                                                                     self.hasfname, self.pattern)
+  
+  def isEmpty(self):
+    return not (self.text or self.extns or self.ftypes or self.severities or self.hasfname or self.pattern)
+  
+  def Narrows(self, other):
+    """does every row passing me pass other too, and only the name says which ?
+      (all the rest the same, my text contains the other's: one more letter typed)"""
+    return (other.text in self.text and self.extns==other.extns
+            and self.ftypes==other.ftypes and self.severities==other.severities
+            and self.hasfname==other.hasfname and self.pattern==other.pattern)
+
+def ParseFilter(text):
+  """the filter bar -> (RowFilter, errormessage), (None, "") for an empty one"""
+  words = []
+  extns = set()
+  ftypes = set()
+  severities = set()
+  hasfname = False
+  pattern = ""
+  
+  for word in text.split():
+    lword = word.lower()
+    
+    if lword.startswith("re:"):
+      pattern = word[3:]                #as typed: \D is not \d
+      continue
+    
+    if lword.startswith("type:"):
+      for char in lword[5:]:
+        if char not in FTYPES: return (None, "unknown type '%s' (F, D or x)" % char)
+        ftypes.add(FTYPES[char])
+    
+    elif lword.startswith("sev:"):
+      try:
+        for name in lword[4:].split(","):
+          if not name: continue
+          if name.endswith("+"):        #this one or worse
+            worst = catalog.SeverityNumber(name[:-1])
+            severities.update( num for num in basis.SEVERITY_NAMES if num>=worst )
+          else:
+            severities.add( catalog.SeverityNumber(name) )
+      except ValueError as ex:
+        return (None, str(ex))
+    
+    elif lword in ("has:fname", "has:ts4"):
+      hasfname = True
+    
+    elif lword.startswith(".") or lword.startswith("*."):
+      extns.update( "."+extn.lstrip("*.") for extn in lword.split(",") if extn.lstrip("*.") )
+    
+    else:
+      words.append(lword)
+  
+  try:
+    rowfilter = RowFilter(" ".join(words), extns, ftypes, severities, hasfname, pattern)
+  except re.error as ex:
+    return (None, "re:%s: %s" % (pattern, str(ex)))
+  return (None if rowfilter.isEmpty() else rowfilter, "")
@@ -0,0 +1,172 @@
+"""the STAMP CACHE: what the lazy column builders of FileData found for the files
+  (the structs of ts1..ts4), kept between runs in a small SQLite file
+  
+  o ONE record per directory (and settings: timestampmode, DST now, TZ, filename patterns),
+    in it one value per file, keyed by device, inode, size, mtime_ns and name
+  o GotoDir loads it with one SELECT and one marshal.loads before the first
+    entry, every chunk is hydrated before it is sorted or shown; the structs
+    are made only when a column is really built (FileData._cached)
+  o nothing is built for the cache: Store (when the directory is left) writes
+    the columns built meanwhile, with the files the directory has now;
+    a column never built is None in the value and built from scratch next time
+  o least recently used directories are thrown out above a maximum number of files
+  ! the os.stat per file is still needed, it is part of the key
+  ! ts5 is not cached, readMyFile parses the whole datafile at once anyway
+"""
+
+import os,marshal,threading
+
+try:
+  import sqlite3
+except ImportError:             #python built without it, no cache then
+  sqlite3 = None
+
+import basis
+import config
+import fnamestamp
+import tzkey                    #ZoneKey
+
+SCHEMA_VERSION = 1
+
+def DefaultPath():
+  cachedir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+  return os.path.join(cachedir, "timestamper", "stampcache.sqlite")
+
+def Open():
+  """the cache from config.STAMPCACHE_FILE, None if there is none (switched off, no sqlite3, error)"""
+  if config.STAMPCACHE_FILE is None or sqlite3 is None: return None
+  
+  dbpath = config.STAMPCACHE_FILE or DefaultPath()
+  try:
+    os.makedirs(os.path.dirname(dbpath), exist_ok=True)
+    return StampCache(dbpath, config.STAMPCACHE_MAXENTRIES)
+  except (OSError, sqlite3.Error):
+    return None                 #a cache is nice to have, never an error
+
+#-------------------------------------------------
+#KEYS and VALUES: plain tuples (marshal is fast and the file is only ours)
+
+def DirKey(dirdata):
+  return repr( (os.path.abspath(dirdata.dirpath), dirdata.fsutc, dirdata.dstnow, tzkey.ZoneKey, fnamestamp.PatternsKey) )
+
+def FileKey(entry):
+  mystat = entry.mystat
+  try:
+    return (mystat.st_dev, mystat.st_ino, mystat.st_size, mystat.st_mtime_ns, entry.getName())
+  except AttributeError:        #_fakeStat: no stat, no key
+    return None
+
+def _pack(entry):
+  """the columns of a FileData as a tuple like FileData.CacheableColumns,
+    only those built (or cached already), None for the others"""
+  values = []
+  packed = {}                   #columns that are the same stamp share one tuple (marshal stores it once)
+  cached = entry.mycached
+  for idx,colname in enumerate(basis.FileData.CacheableColumns):
+    if not entry.isColumnBuilt(colname):
+      values.append(cached[idx] if cached else None)
+      continue
+    
+    structtime = getattr(entry, colname).transferGet()
+    if structtime is None:
+      values.append(False)      #a dummy: no stamp
+    else:
+      value = tuple(structtime) + (structtime.tm_zone, structtime.tm_gmtoff)
+      values.append( packed.setdefault(value, value) )
+  return tuple(values)
+
+class StampCache:
+  def __init__(self, dbpath, maxentries):
+    self.dbpath = dbpath
+    self.maxentries = maxentries        #files, in all directories
+    self.lock = threading.Lock()        #one connection, GotoDir might run in a thread
+    
+    self.db = sqlite3.connect(dbpath, check_same_thread=False)
+    self.db.execute("PRAGMA journal_mode=WAL")
+    self.db.execute("PRAGMA synchronous=OFF")           #it's a cache: a lost write is a miss
+    if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+      with self.db:
+        self.db.execute("DROP TABLE IF EXISTS dirs")
+        self.db.execute("CREATE TABLE dirs (key TEXT PRIMARY KEY, files INTEGER, value BLOB, used INTEGER)")
+        self.db.execute("CREATE INDEX dirs_used ON dirs (used)")
+        self.db.execute("PRAGMA user_version=%d" % SCHEMA_VERSION)
+    
+    self.count,self.clock = self.db.execute("SELECT coalesce(sum(files),0), coalesce(max(used),0) FROM dirs").fetchone()
+  
+  def Close(self):
+    with self.lock:
+      self.db.close()
+  
+  def Load(self, dirdata):
+    """the record of the directory: {FileKey: value}, empty if there is none
+      (call it after PrepareDir: the settings are part of the key)"""
+    try:
+      with self.lock:
+        dirkey = DirKey(dirdata)
+        row = self.db.execute("SELECT value FROM dirs WHERE key=?", (dirkey,)).fetchone()
+        if row:
+          self.clock += 1
+          self.db.execute("UPDATE dirs SET used=? WHERE key=?", (self.clock, dirkey))
+          self.db.commit()
+    except sqlite3.Error:       #the cache is broken or locked: the lazy columns just build themselves
+      return {}
+    
+    try:
+      cached = marshal.loads(row[0]) if row else {}
+    except (EOFError, ValueError, TypeError):
+      cached = {}
+    return cached if type(cached) is dict else {}
+  
+  @staticmethod
+  def Hydrate(entries, cached):
+    """give the files their cached columns (cached from Load), nothing is built"""
+    for entry in entries:
+      if not entry.mylazy or entry.mycached: continue
+      key = FileKey(entry)
+      if key is None: continue
+      entry.mycached = cached.get(key)
+  
+  def Store(self, dirdata):
+    """the columns built in the directory (and the cached ones) for the next time,
+      only the files it has now; nothing is written if the record has it all"""
+    try:
+      with self.lock:
+        self._store(dirdata)
+    except sqlite3.Error:       #it's a cache: not written is a miss next time
+      pass
+  
+  def _store(self, dirdata):
+    dirkey = DirKey(dirdata)
+    row = self.db.execute("SELECT value FROM dirs WHERE key=?", (dirkey,)).fetchone()
+    try:
+      cached = marshal.loads(row[0]) if row else {}
+    except (EOFError, ValueError, TypeError):
+      cached = {}
+    if type(cached) is not dict: cached = {}
+    
+    values = {}
+    for entry in dirdata.get_EntriesIterAll():
+      if not entry.mylazy: continue
+      key = FileKey(entry)
+      if key is None: continue
+      
+      value = _pack(entry)
+      if any(field is not None for field in value): values[key] = value
+    
+    if values == cached: return           #nothing new, no file gone
+    
+    self.clock += 1
+    self.db.execute("INSERT OR REPLACE INTO dirs VALUES (?,?,?,?)", (dirkey, len(values), marshal.dumps(values), self.clock))
+    self.count += len(values) - len(cached)
+    self.Evict()
+    self.db.commit()
+  
+  def Evict(self):
+    """throw out the least recently used directories, down to 90% of maxentries files"""
+    if self.count <= self.maxentries: return
+    
+    target = self.maxentries*9//10
+    for key,files in self.db.execute("SELECT key,files FROM dirs ORDER BY used").fetchall():
+      if self.count <= target: break
+      self.db.execute("DELETE FROM dirs WHERE key=?", (key,))
+      self.count -= files
@@ -0,0 +1,125 @@
+"""REGRESSION TESTS for the datafile (fileversion 0.2, compact part and journal)
+
+  python3 -m unittest test_datafile
+"""
+
+import os,shutil,tempfile,unittest
+
+import basis
+import config
+import transfer
+import timestamper_cli          #the columns without wx
+
+Columns = timestamper_cli.CliColDict
+
+class TestDatafileJournal (unittest.TestCase):
+  """the journal only appends, a stamp gone must not stay in the file"""
+  
+  def setUp(self):
+    self.dirpath = tempfile.mkdtemp(prefix="timestamper-test-")
+    self.datafname = os.path.join(self.dirpath, config.MYFILENAME_DATA)
+  
+  def tearDown(self):
+    shutil.rmtree(self.dirpath, ignore_errors=True)
+  
+  def touch(self, name, mtime):
+    open(os.path.join(self.dirpath, name), "wb").close()
+    os.utime(os.path.join(self.dirpath, name), (mtime, mtime))
+  
+  def transferToDatafile(self):
+    """mtimes into the datafile column, then the datafile written (like the GUI)"""
+    dirdata = basis.DirectoryData(timestamper_cli.AllColumnNames)
+    dirdata.GotoDir(self.dirpath)
+    files = [entry for entry in dirdata.get_EntriesIterAll()
+             if entry.getType()=='F' and entry.getName()!=config.MYFILENAME_DATA]
+    transfer.TransferBatch().Run(files, Columns["ts1_modloc"], Columns["ts5_datafile"])
+    self.assertIsNone(dirdata.writeMyFile())
+  
+  def datafileNames(self):
+    """the names with a stamp when the datafile is read again"""
+    dirdata = basis.DirectoryData(timestamper_cli.AllColumnNames)
+    dirdata.dirpath = self.dirpath
+    self.assertIsNone(dirdata.readMyFile())
+    return set(dirdata.mydatafile_dict)
+  
+  def test_changed_stamp_is_appended(self):
+    self.touch("a.jpg", 1000000000)
+    self.touch("b.jpg", 1000000000)
+    self.transferToDatafile()
+    size = os.path.getsize(self.datafname)
+    
+    self.touch("a.jpg", 1100000000)
+    self.transferToDatafile()
+    with open(self.datafname, encoding="utf8") as datafile:
+      self.assertIn("#journal\n", datafile.read()[size:])
+    self.assertEqual(self.datafileNames(), {"a.jpg", "b.jpg"})
+  
+  def test_deleted_file_is_dropped(self):
+    self.touch("a.jpg", 1000000000)
+    self.touch("b.jpg", 1000000000)
+    self.transferToDatafile()
+    
+    os.remove(os.path.join(self.dirpath, "b.jpg"))
+    self.transferToDatafile()
+    self.assertEqual(self.datafileNames(), {"a.jpg"})
+    
+    #a new file of that name has no stamp from the old one
+    self.touch("b.jpg", 1200000000)
+    dirdata = basis.DirectoryData(timestamper_cli.AllColumnNames)
+    dirdata.GotoDir(self.dirpath)
+    entry = [entry for entry in dirdata.get_EntriesIterAll() if entry.getName()=="b.jpg"][0]
+    self.assertIsNone(entry.getTs5DatafileStamp())
+
+class TestCancelledLoad (unittest.TestCase):
+  """a GotoDir cancelled after the first chunk leaves the dirdata incomplete"""
+  
+  COUNT = 40
+  
+  def setUp(self):
+    self.dirpath = tempfile.mkdtemp(prefix="timestamper-test-")
+    for index in range(self.COUNT):
+      name = os.path.join(self.dirpath, "f%03d.jpg" % index)
+      open(name, "wb").close()
+      os.utime(name, (1000000000+index, 1000000000+index))
+  
+  def tearDown(self):
+    shutil.rmtree(self.dirpath, ignore_errors=True)
+  
+  def test_cancel_marks_incomplete(self):
+    dirdata = basis.DirectoryData(timestamper_cli.AllColumnNames)
+    steps = dirdata.GotoDirSteps(self.dirpath, chunksize=5)
+    next(steps)
+    steps.close()                       #what jobs.py does on Cancel
+    self.assertTrue(dirdata.incomplete)
+    self.assertLess(len(dirdata.entries), self.COUNT)
+    
+    #a full reload clears it
+    self.assertIsNone(dirdata.GotoDir(self.dirpath))
+    self.assertFalse(dirdata.incomplete)
+  
+  def test_cancelled_load_keeps_stamps(self):
+    dirdata = basis.DirectoryData(timestamper_cli.AllColumnNames)
+    dirdata.GotoDir(self.dirpath)
+    transfer.TransferBatch().Run(list(dirdata.get_EntriesIterAll()), Columns["ts1_modloc"], Columns["ts5_datafile"])
+    self.assertIsNone(dirdata.writeMyFile())
+    
+    #cancelled after the first chunk, a few stamps changed and written
+    for index in range(3):
+      name = os.path.join(self.dirpath, "f%03d.jpg" % index)
+      os.utime(name, (1100000000, 1100000000))
+    dirdata = basis.DirectoryData(timestamper_cli.AllColumnNames)
+    steps = dirdata.GotoDirSteps(self.dirpath, chunksize=5)
+    next(steps)
+    steps.close()
+    files = [entry for entry in dirdata.entries if entry.getType()=='F']
+    transfer.TransferBatch().Run(files, Columns["ts1_modloc"], Columns["ts5_datafile"])
+    self.assertIsNone(dirdata.writeMyFile())
+    
+    #the files never read still have their stamp
+    dirdata = basis.DirectoryData(timestamper_cli.AllColumnNames)
+    dirdata.dirpath = self.dirpath
+    self.assertIsNone(dirdata.readMyFile())
+    self.assertEqual(len([name for name in dirdata.mydatafile_dict if name.endswith(".jpg")]), self.COUNT)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,88 @@
+"""REGRESSION TESTS for the transfer engine (no GUI needed)
+
+  python3 -m unittest test_transfer
+"""
+
+import os,time,shutil,tempfile,unittest
+
+import basis
+import transfer
+import timestamper_cli          #the columns without wx
+
+Columns = timestamper_cli.CliColDict
+
+class TestTransferDstGap (unittest.TestCase):
+  """a stamp in the DST gap fails alone, the other files of the chunk are set"""
+  
+  NAMES = ["20230101_120000.jpg", "20230326_023000.jpg", "20230601_120000.jpg"]
+  GAP   = "20230326_023000.jpg"         #02:30 does not exist in Berlin that night
+  
+  def setUp(self):
+    if not hasattr(time, "tzset"): self.skipTest("needs time.tzset (not on Windows)")
+    self.oldtz = os.environ.get("TZ")
+    os.environ["TZ"] = "Europe/Berlin"
+    time.tzset()
+    
+    self.dirpath = tempfile.mkdtemp(prefix="timestamper-test-")
+    for name in self.NAMES:
+      open(os.path.join(self.dirpath, name), "wb").close()
+      os.utime(os.path.join(self.dirpath, name), (0, 86400))  #1970-01-02, none of the stamps
+  
+  def tearDown(self):
+    shutil.rmtree(self.dirpath, ignore_errors=True)
+    if self.oldtz is None: os.environ.pop("TZ", None)
+    else:                  os.environ["TZ"] = self.oldtz
+    time.tzset()
+  
+  def test_gap_fails_alone(self):
+    dirdata = basis.DirectoryData(timestamper_cli.AllColumnNames)
+    dirdata.GotoDir(self.dirpath)
+    files = [entry for entry in dirdata.get_EntriesIterAll() if entry.getType()=='F']
+    
+    results = transfer.TransferBatch().Run(files, Columns["ts4_fname"], Columns["ts1_modloc"])
+    byname = { result.entry.getName():result for result in results }
+    self.assertEqual(sorted(byname), sorted(self.NAMES))
+    
+    self.assertIs(byname[self.GAP].ok, False)
+    self.assertTrue(byname[self.GAP].reason)
+    self.assertEqual(os.stat(os.path.join(self.dirpath, self.GAP)).st_mtime, 86400)
+    
+    for name in self.NAMES:
+      if name==self.GAP: continue
+      self.assertIs(byname[name].ok, True, byname[name].reason)
+      mtime = os.stat(os.path.join(self.dirpath, name)).st_mtime
+      self.assertEqual(time.strftime("%Y%m%d_%H%M%S.jpg", time.localtime(mtime)), name)
+
+class TestVerifyResolution (unittest.TestCase):
+  """the double check after the transfer accepts the 2 seconds of FAT, not more"""
+  
+  class StampStandin:
+    def __init__(self, fullpath): self.fullpath = fullpath
+    _int2struct = staticmethod(time.localtime)
+  
+  def setUp(self):
+    self.dirpath = tempfile.mkdtemp(prefix="timestamper-test-")
+    self.path = os.path.join(self.dirpath, "a.jpg")
+    open(self.path, "wb").close()
+  
+  def tearDown(self):
+    shutil.rmtree(self.dirpath, ignore_errors=True)
+  
+  def verify(self, statint, mtime):
+    """the result of the double check for a transfer of statint, the file got mtime"""
+    os.utime(self.path, (mtime, mtime))
+    note = transfer._MtimeNote(transfer.TransferResult(None, True), self.StampStandin(self.path), statint, None)
+    transfer.TransferBatch()._verifyOne(note, {})
+    return note.result
+  
+  def test_fat_rounding_passes(self):
+    self.assertIs(self.verify(1000000001, 1000000000).ok, True)     #rounded down (Linux vfat)
+    self.assertIs(self.verify(1000000001, 1000000002).ok, True)     #rounded up (Windows)
+  
+  def test_other_mtime_fails(self):
+    result = self.verify(1000000001, 1000000005)
+    self.assertIs(result.ok, False)
+    self.assertIn("verify", result.reason)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,380 @@
+"""the command line flavour of the timestamper, no wxPython required:
+  list / analyse / colourise / transfer for one or many directories,
+  one output line per file as soon as it is read (no table in memory)"""
+
+import os,sys,fnmatch,argparse
+
+import basis
+import config
+import treescan
+import transfer
+import catalog
+
+def colourMaker(coltuple):
+  """there is no window library, colours simply remain tuples
+    (ActionColourise results are translated back via SeverityOfColour)"""
+  return coltuple
+
+basis.CellObject.colourMaker = colourMaker
+
+#----------------------------------------------------------------------
+#COLUMNS: the same names as in the GUI, but only what the command line needs
+
+class CliColumn:
+  """small brother of the GUI's ColumnDescription,
+    the FileData.Action... functions only need .name"""
+  
+  def __init__(self, name,heading, isstamp, istarget, proxyobj):
+    self.name     = name
+    self.heading  = heading or name
+    self.isstamp  = isstamp
+    self.istarget = istarget    #allowed as TRANSFER target ?
+    self.proxyobj = proxyobj
+
+cobjProxyString = basis.CellObjectProxyString()
+cobjProxyStamp  = basis.CellObjectProxyStamp()
+
+  ##must be the ACTIVE columns of the GUI, FileData asserts all of them
+CliColumns_ALL = [
+  CliColumn("mark",         None, False, False, basis.CellObjectProxyMarker()),
+  CliColumn("ftype",        None, False, False, cobjProxyString),
+  CliColumn("name",         None, False, False, cobjProxyString),
+  CliColumn("extn",         None, False, False, cobjProxyString),
+  CliColumn("bytes",        None, False, False, basis.CellObjectProxyBytes()),
+  CliColumn("out",          None, False, False, basis.CellObjectProxyOutput()),
+  CliColumn("ts1_modloc",   None, True,  True,  cobjProxyStamp),
+  CliColumn("ts1_modgmt",   None, True,  True,  cobjProxyStamp),
+  CliColumn("isdst",        None, False, False, basis.CellObjectProxyInt()),
+  CliColumn("ts2_linux",    None, True,  True,  cobjProxyStamp),
+  CliColumn("ts3_winnew",   None, True,  True,  cobjProxyStamp),
+  CliColumn("ts3_winold",   None, True,  True,  cobjProxyStamp),
+  CliColumn("ts4_fname",    None, True,  False, cobjProxyStamp),   #source only, would mean file rename
+  CliColumn("ts5_datafile", None, True,  True,  cobjProxyStamp),   #target: DirectoryData.writeMyFile afterwards
+]
+
+AllColumnNames = [cc.name for cc in CliColumns_ALL]
+CliColDict     = {cc.name:cc for cc in CliColumns_ALL}
+StampNames     = [cc.name for cc in CliColumns_ALL if cc.isstamp]
+
+#ActionColourise only leaves colours in the stamps, this is the way back to the severity
+SeverityOfColour = {coltuple:sev for sev,coltuple in config.GUI_COLOUR_SEVERITIES.items()}
+
+#----------------------------------------------------------------------
+#OUTPUT: one line per file, tab separated
+
+def cellText(entry, cc):
+  """display string for the cell, a possible colour is given as [severity]"""
+  text,colour = entry.getCellDisplay(cc.name, cc.proxyobj)
+  if colour and cc.isstamp:
+    text = "%s[%s]" % (text, SeverityOfColour.get(tuple(colour), "?"))
+  return text
+
+def writeLine(fields):
+  sys.stdout.write("\t".join(fields) + "\n")
+  sys.stdout.flush()            #STREAMING: every line as soon as we have it
+
+#----------------------------------------------------------------------
+#the DIRECTORY LOOP shared by all commands
+
+def iterDirectories(args):
+  """(dirdata, entry iterator) for every directory to work on:
+    the DIR arguments one by one, streaming straight from os.scandir,
+    or with --recursive all trees below them (treescan, several dirs at once)"""
+  if args.recursive:
+    for rootpath in args.dirs:
+      for dirdata,errormessage in treescan.ScanTree(rootpath, AllColumnNames, maxworkers=args.workers):
+        if errormessage:
+          sys.stderr.write("%s: %s\n" % (dirdata.dirpath, errormessage))
+        yield dirdata, dirdata.get_EntriesIterAll()
+  
+  else:
+    #ONE DirectoryData for all directories, they come one after the other
+    dirdata = basis.DirectoryData(AllColumnNames)
+    for dirpath in args.dirs:
+      errormessage = dirdata.PrepareDir(dirpath)
+      dirdata.incomplete = False        #until iterFiles fails
+      if errormessage:
+        sys.stderr.write("%s: %s\n" % (dirpath, errormessage))
+      yield dirdata, dirdata.IterDir()
+
+def iterFiles(dirdata, entries, pattern, allentries=None):
+  """stream (path,FileData) for all files in entries, filtered by a glob pattern
+    errors go to stderr, a failing directory yields nothing
+    allentries: a list to collect every entry, also those filtered out"""
+  dirpath = dirdata.dirpath
+  
+  try:
+    for entry in entries:
+      if allentries is not None: allentries.append(entry)
+      
+      #ACTIONS work only on files, the listing follows that
+      if entry.getType()!='F': continue
+      if entry.getName()==config.MYFILENAME_DATA: continue
+      if pattern and not fnmatch.fnmatch(entry.getName(), pattern): continue
+      
+      yield os.path.join(dirpath, entry.getName()), entry
+  
+  except OSError as ex:         #no access to the directory
+    dirdata.incomplete = True   #the datafile keeps the stamps of what was not listed
+    sys.stderr.write("%s: GotoDir fails: %s\n" % (dirpath, str(ex)))
+
+#----------------------------------------------------------------------
+#the COMMANDS
+
+def CmdList(args):
+  cols = [CliColDict[name] for name in args.columns]
+  if not args.noheader:
+    writeLine(["path","bytes"] + [cc.heading for cc in cols])
+  
+  for dirdata,entries in iterDirectories(args):
+    for path,entry in iterFiles(dirdata, entries, args.match):
+      writeLine([path, cellText(entry, CliColDict["bytes"])] + [cellText(entry, cc) for cc in cols])
+  return 0
+
+def CmdAnalyse(args):
+  cc1,cc2 = CliColDict[args.fromcol], CliColDict[args.tocol]
+  if not args.noheader:
+    writeLine(["path", cc1.heading, cc2.heading, "out"])
+  
+  for dirdata,entries in iterDirectories(args):
+    for path,entry in iterFiles(dirdata, entries, args.match):
+      entry.ActionAnalyse(cc1,cc2)
+      writeLine([path, cellText(entry,cc1), cellText(entry,cc2), cellText(entry, CliColDict["out"])])
+  return 0
+
+def CmdColourise(args):
+  cc1 = CliColDict[args.fromcol]
+  cc2 = CliColDict[args.tocol] if args.tocol else None
+    #no second column means colour all other stamps, like in the GUI
+  cols = [cc2] if cc2 else [CliColDict[name] for name in StampNames if name!=cc1.name]
+  if not args.noheader:
+    writeLine(["path", cc1.heading] + [cc.heading for cc in cols])
+  
+  for dirdata,entries in iterDirectories(args):
+    for path,entry in iterFiles(dirdata, entries, args.match):
+      entry.ActionColourise(cc1,cc2)
+      writeLine([path, cellText(entry,cc1)] + [cellText(entry,cc) for cc in cols])
+  return 0
+
+def CmdTransfer(args):
+  cc1,cc2 = CliColDict[args.fromcol], CliColDict[args.tocol]
+  if args.dryrun: return CmdTransferPlan(args, cc1,cc2)
+  
+  if not args.noheader:
+    writeLine(["path", cc1.heading, cc2.heading, "result"])
+  
+  batch = transfer.TransferBatch(maxworkers=args.workers, verify=not args.noverify)
+  
+  total = fail = 0
+  for dirdata,entries in iterDirectories(args):
+    #the DATAFILE holds all files of the directory, so this target needs the entries kept
+    kept = [] if cc2.name=="ts5_datafile" else None
+    
+    #ONE BATCH per directory, the lines follow when the whole directory is done
+    files  = list(iterFiles(dirdata, entries, args.match, kept))
+    before = [cellText(entry,cc2) for path,entry in files]
+    results = batch.Run([entry for path,entry in files], cc1,cc2)
+    
+    for (path,entry),text,res in zip(files,before,results):
+      #None: empty source is ignored silently, like in the GUI
+      if res.ok is None:
+        result = "skipped"
+      else:
+        total += 1
+        if res.ok: result = "ok"
+        else:
+          result = "FAILED"; fail += 1
+          sys.stderr.write("%s: %s\n" % (path, res.reason))
+      
+      writeLine([path, cellText(entry,cc1), text, result])
+    
+    if kept:
+      dirdata.entries = kept
+      error = dirdata.writeMyFile()
+      if error: sys.stderr.write("%s: %s\n" % (dirdata.dirpath, error))
+      dirdata.entries = []
+  
+  if fail:
+    sys.stderr.write("%d/%d transfers failed.\n" % (fail,total))
+  return 1 if fail else 0
+
+def CmdTransferPlan(args, cc1,cc2):
+  """transfer --dry-run: the TransferPlan of every directory, nothing is changed"""
+  if not args.noheader:
+    writeLine(transfer.TransferPlan.HEADING)
+  
+  fail = 0
+  for dirdata,entries in iterDirectories(args):
+    plan = transfer.TransferPlan([entry for path,entry in iterFiles(dirdata, entries, args.match)], cc1,cc2)
+    for fields in plan.Lines():
+      writeLine(fields)
+    fail += plan.Counts().get("fail", 0)
+  
+  if fail:
+    sys.stderr.write("%d transfers would fail.\n" % fail)
+  return 1 if fail else 0
+
+def openCatalog(args):
+  try:
+    return catalog.Catalog(args.db)
+  except RuntimeError as ex:    #no sqlite3, can't open the file
+    sys.stderr.write("catalog: %s\n" % str(ex))
+    return None
+
+def CmdCatalogUpdate(args):
+  cat = openCatalog(args)
+  if cat is None: return 2
+  
+  def report(dirpath, errormessage, changed):
+    if errormessage:
+      sys.stderr.write("%s: %s\n" % (dirpath, errormessage))
+    elif changed and not args.noheader:
+      writeLine([dirpath, "updated"])
+  
+  for rootpath in args.dirs:
+    numdirs,numchanged = cat.UpdateTree(rootpath, AllColumnNames, maxworkers=args.workers, report=report)
+    sys.stderr.write("%s: %d directories, %d updated\n" % (rootpath, numdirs, numchanged))
+  cat.Close()
+  return 0
+
+def writeCatalogRows(args, rows):
+  if not args.noheader:
+    writeLine(["path","bytes"] + catalog.STAMPS)
+  for path,size,epochs in rows:
+    writeLine([path, str(size)] + [catalog.EpochText(epochs[name]) for name in catalog.STAMPS])
+
+def CmdCatalogDate(args):
+  cat = openCatalog(args)
+  if cat is None: return 2
+  writeCatalogRows(args, cat.FindDate(args.day, args.stamps))
+  cat.Close()
+  return 0
+
+def CmdCatalogSeverity(args):
+  cat = openCatalog(args)
+  if cat is None: return 2
+  writeCatalogRows(args, cat.FindSeverity(args.stamp, args.severities))
+  cat.Close()
+  return 0
+
+#----------------------------------------------------------------------
+#ARGUMENTS and the main program
+
+def columnList(text):
+  """argparse type for --columns: comma separated column names"""
+  names = [name.strip() for name in text.split(",") if name.strip()]
+  for name in names:
+    if name not in StampNames+["isdst"]:
+      raise argparse.ArgumentTypeError("unknown column '%s'" % name)
+  return names
+
+def dayText(text):
+  """argparse type for a day: 2025-12-14"""
+  try:
+    catalog.DayRange(text)
+  except ValueError:
+    raise argparse.ArgumentTypeError("not a day (YYYY-MM-DD): '%s'" % text)
+  return text
+
+def severityList(text):
+  """argparse type: comma separated severities, as numbers or names (3, 3:dst, dst)"""
+  try:
+    return [catalog.SeverityNumber(name.strip()) for name in text.split(",") if name.strip()]
+  except ValueError as ex:
+    raise argparse.ArgumentTypeError(str(ex))
+
+def catalogStampList(text):
+  names = [name.strip() for name in text.split(",") if name.strip()]
+  for name in names:
+    if name not in catalog.STAMPS:
+      raise argparse.ArgumentTypeError("unknown column '%s'" % name)
+  return names
+
+def MakeArgParser():
+  parser = argparse.ArgumentParser(prog="timestamper_cli.py",
+                                   description="timestamper without GUI: one line per file, tab separated")
+  sub = parser.add_subparsers(dest="command", required=True)
+  
+  def addCommon(p):
+    p.add_argument("--match",    metavar="GLOB", help="only files matching this pattern (eg. '*.jpg')")
+    p.add_argument("--noheader", action="store_true", help="no heading line")
+    p.add_argument("-r","--recursive", action="store_true", help="all directories below DIR as well")
+    p.add_argument("--workers", type=int, default=4, help="threads: directories read at the same time with -r, files set at once by transfer (default 4)")
+  
+  targets = [cc.name for cc in CliColumns_ALL if cc.istarget]
+  
+  p = sub.add_parser("list", help="list all stamp columns")
+  p.add_argument("--columns", type=columnList, default=StampNames, metavar="COL,COL,...",
+                 help="comma separated, from: %s" % ",".join(StampNames+["isdst"]))
+  p.add_argument("dirs", nargs="+", metavar="DIR")
+  addCommon(p)
+  
+  p = sub.add_parser("analyse", help="compare 2 stamp columns, output like the *** column")
+  p.add_argument("fromcol", choices=StampNames)
+  p.add_argument("tocol",   choices=StampNames)
+  p.add_argument("dirs", nargs="+", metavar="DIR")
+  addCommon(p)
+  
+  p = sub.add_parser("colourise", help="compare one stamp column to one/all others, severities in [..]")
+  p.add_argument("fromcol", choices=StampNames)
+  p.add_argument("--to", dest="tocol", choices=StampNames)
+  p.add_argument("dirs", nargs="+", metavar="DIR")
+  addCommon(p)
+  
+  p = sub.add_parser("transfer", help="TRANSFER! stamps from one column to another")
+  p.add_argument("fromcol", choices=StampNames)
+  p.add_argument("tocol",   choices=targets)
+  p.add_argument("--noverify", action="store_true", help="no os.stat check of the new mtimes afterwards")
+  p.add_argument("-n","--dry-run", dest="dryrun", action="store_true",
+                 help="change nothing, list the plan: old/new stamp, severity, new mtime, reason")
+  p.add_argument("dirs", nargs="+", metavar="DIR")
+  addCommon(p)
+  
+  def addCatalog(p):
+    p.add_argument("--db", metavar="FILE", help="the catalog (default %s)" % catalog.DefaultPath())
+    p.add_argument("--noheader", action="store_true", help="no heading line")
+  
+  p = sub.add_parser("catalog-update", help="scan the trees below DIR into the catalog (only what changed)")
+  p.add_argument("dirs", nargs="+", metavar="DIR")
+  p.add_argument("--workers", type=int, default=4, help="threads: directories read at the same time (default 4)")
+  addCatalog(p)
+  
+  p = sub.add_parser("catalog-date", help="files of the catalog with a stamp on that day")
+  p.add_argument("day", type=dayText, metavar="YYYY-MM-DD")
+  p.add_argument("--stamps", type=catalogStampList, metavar="COL,COL,...",
+                 help="only these stamps, from: %s (default all)" % ",".join(catalog.STAMPS))
+  addCatalog(p)
+  
+  p = sub.add_parser("catalog-severity", help="files of the catalog where a stamp compares to %s like that" % catalog.MAIN_STAMP)
+  p.add_argument("stamp", choices=catalog.SEVERITIES)
+  p.add_argument("severities", type=severityList, metavar="SEV,SEV,...", help="eg. 3,4 or dst,hours")
+  addCatalog(p)
+  
+  return parser
+
+Commands = {
+  "list":      CmdList,
+  "analyse":   CmdAnalyse,
+  "colourise": CmdColourise,
+  "transfer":  CmdTransfer,
+  "catalog-update":   CmdCatalogUpdate,
+  "catalog-date":     CmdCatalogDate,
+  "catalog-severity": CmdCatalogSeverity,
+}
+
+def main(argv):
+  args = MakeArgParser().parse_args(argv)
+  
+  if getattr(args,"tocol",None) and args.fromcol==args.tocol:
+    sys.stderr.write("From and To are the same column\n")
+    return 2
+  
+  for dirpath in getattr(args,"dirs",[]):
+    if not os.path.isdir(dirpath):
+      sys.stderr.write("Path '%s' is not a directory\n" % dirpath)
+      return 2
+  
+  return Commands[args.command](args)
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
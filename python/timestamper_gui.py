@@ -2,6 +2,13 @@ import os,sys
 
 import basis
 import config
+import transfer
+import stampcache
+import mediaprefs
+import jobs
+import perftrace
+import rowfilter
+import dircache
 
 import wx			#THE wxPython WINDOW LIBRARY !
 import wx.grid			#the excel-like GRID is a submodule
@@ -11,6 +18,12 @@ PathLine = None                 #the TOP LINE showing the current PATH
 FatLabel = None                 #close to the path: is it FAT or NTFS ?
 TableGrid = None                #THE CORE: the GRID for 1 directory
 MainopText = None               #MAIN OPERATION preview left of the OP Buttons
+JobGauge = None                 #PROGRESS of the running job, next to the Cancel button
+FilterLine = None               #the FILTER of the grid rows, between marks and sort
+
+#the JOBS: GotoDir and the main operations run in a worker thread,
+#  everything for the GUI comes back through wx.CallAfter
+Jobs = jobs.JobRunner(post=wx.CallAfter)
 
 #----------------------------------------------------------------------
 #Simple ERROR-DIALOGS, ubiquitous in my code...
@@ -36,12 +49,41 @@ def QuestionDialog(level, message, yesdefault):
   dlg = wx.MessageDialog(MainWin, message,
                          MSG_Levelnames[level],
                          wx.YES_NO
-                         | ifop(yesdefault,wx.YES_DEFAULT,wx.NO_DEFAULT)
+                         | (wx.YES_DEFAULT if yesdefault else wx.NO_DEFAULT)
                          | MSG_Levelicons[level])
   ret = (dlg.ShowModal() == wx.ID_YES)
   dlg.Destroy()
   return ret
 
+def JobConflict():
+  "True (and a warning) if a job is running, no other operation may start then"
+  if Jobs.Busy():
+    LogMessageDialog(MSG_WARNG, "'%s' is still running, wait for it or Cancel it first." % Jobs.Busy())
+    return True
+  return False
+
+def StartJob(name, steps, ondone, onprogress=None):
+  """run the steps as a job: the gauge shows the progress, ondone(result, cancelled, error)
+    is called in the GUI thread (the gauge is reset before)"""
+  def progress(done, total, results):
+    if total:
+      JobGauge.SetRange(max(total,1))
+      JobGauge.SetValue(min(done,total))
+      MainWin.SetStatusText("%s: %d of %d" % (name, done, total))
+    else:
+      JobGauge.Pulse()
+      MainWin.SetStatusText("%s: %d" % (name, done))
+    if onprogress: onprogress(done, total, results)
+  
+  def finished(result, cancelled, error):
+    JobGauge.SetValue(0)
+    MainWin.SetStatusText("%s: cancelled" % name if cancelled else "")
+    if error: LogMessageDialog(MSG_ERROR, error)
+    ondone(result, cancelled, error)
+  
+  error = Jobs.Start(name, steps, progress, finished)
+  if error: LogMessageDialog(MSG_WARNG, error)
+
 #----------------------------------------------------------------------
 #important: THE MAIN COLUMN DESCRIPTION FOR THE GUI TABLE
 
@@ -179,6 +221,117 @@ AllColumnNames = [cd.name for cd in ColumnDescriptions]
 ColDescDict = {cd.name:(cdidx,cd) for cdidx,cd in enumerate(ColumnDescriptions)}
 
 
+#----------------------------------------------------------------------
+#The VIRTUAL TABLE behind the GRID: no cell is stored in the GRID,
+#  the GRID asks for the cells it paints and we ask basis.DirectoryData
+
+class StamperGridTable (wx.grid.GridTableBase):
+  """a wx.grid.GridTableBase reading directly from basis.DirectoryData,
+    so the cost of a repaint depends on the window height, not on the directory size"""
+  
+  def __init__(self, dirdata):
+    wx.grid.GridTableBase.__init__(self)
+    self.dirdata = dirdata
+    
+    #the number of rows the GRID currently knows about,
+    #  changes must be announced to the GRID with a GridTableMessage
+    self.numrows = 0
+    
+    #ONE SHARED ATTRIBUTE OBJECT per column: readonly, alignment and column colour
+    alignmap = { 'L':wx.ALIGN_LEFT, 'C':wx.ALIGN_CENTRE, 'R':wx.ALIGN_RIGHT }
+    self.colattrs = []
+    for coldesc in ColumnDescriptions:
+      attr = wx.grid.GridCellAttr()
+      attr.SetReadOnly(True)
+      attr.SetAlignment(alignmap[coldesc.align], wx.ALIGN_CENTRE)
+      if coldesc.colour:
+        attr.SetBackgroundColour(coldesc.colour)
+      self.colattrs.append(attr)
+    
+    #cells with their own colour (or line colour) share a clone per column and colour
+    #  key is (colnum, RGB-int of the colour)
+    self.colourattrs = {}
+    
+    #paint asks GetAttr and GetValue for the same cell, one display is enough
+    self.lastcell = (None,None,None)
+  
+  #===== the DISPLAY of a cell, as (string, colour)
+  def getCellDisplay(self, row,col):
+    lastrow,lastcol,display = self.lastcell
+    if row==lastrow and col==lastcol: return display
+    
+    try:
+      #the GRID may not have heard of a new size yet (or a job has just started a new list)
+      entry = self.dirdata.get_Entry(row) if row < self.dirdata.get_EntriesLen() else None
+    except IndexError:
+      entry = None
+    
+    if entry is None:
+      display = ("", None)
+    
+    else:
+      perftrace.Count("cells")
+      coldesc = ColumnDescriptions[col]
+      text,cell_colour = entry.getCellDisplay(coldesc.name, coldesc.proxyobj)
+      
+      #SET COLOUR by Priority ...
+        #PRIO 1: colour coming from this cell
+        #PRIO 2: line colour (Dirs,Special), if we are in the right columns
+        #PRIO 3: column colour, used for debug columns -> already in self.colattrs
+      if not cell_colour and col in [1,2]:
+        cell_colour = entry.line_colour
+      
+      display = (text, cell_colour)
+    
+    self.lastcell = (row,col,display)
+    return display
+  
+  #===== OVERRIDES of wx.grid.GridTableBase
+  def GetNumberRows(self): return self.numrows
+  def GetNumberCols(self): return len(ColumnDescriptions)
+  
+  def GetColLabelValue(self, col): return ColumnDescriptions[col].heading
+  
+  def IsEmptyCell(self, row,col): return not self.getCellDisplay(row,col)[0]
+  def GetValue(self, row,col):    return self.getCellDisplay(row,col)[0]
+  def SetValue(self, row,col, value): pass      #all cells are readonly
+  
+  def GetAttr(self, row,col, kind):
+    cell_colour = self.getCellDisplay(row,col)[1]
+    
+    if not cell_colour:
+      attr = self.colattrs[col]
+    
+    else:
+      key = (col, cell_colour.GetRGB())
+      attr = self.colourattrs.get(key)
+      if not attr:
+        attr = self.colattrs[col].Clone()
+        attr.SetBackgroundColour(cell_colour)
+        self.colourattrs[key] = attr
+    
+    ##the GRID will DecRef what it gets, the shared objects must survive that
+    attr.IncRef()
+    return attr
+  
+  #===== called after DirectoryData changed
+  def ResetView(self, grid):
+    """tell the GRID about the new number of rows and repaint what is visible"""
+    self.lastcell = (None,None,None)
+    
+    newrows = self.dirdata.get_EntriesLen()
+    
+    if newrows < self.numrows:
+      msg = wx.grid.GridTableMessage(self, wx.grid.GRIDTABLE_NOTIFY_ROWS_DELETED, newrows, self.numrows-newrows)
+      grid.ProcessTableMessage(msg)
+    elif newrows > self.numrows:
+      msg = wx.grid.GridTableMessage(self, wx.grid.GRIDTABLE_NOTIFY_ROWS_APPENDED, newrows-self.numrows)
+      grid.ProcessTableMessage(msg)
+    self.numrows = newrows
+    
+    grid.ForceRefresh()
+
+
 #----------------------------------------------------------------------
 #The CENTRAL Widget: the GRID displaying the current directory
 
@@ -190,17 +343,26 @@ class StamperDirTable (wx.grid.Grid):
     #my parent the GRID object
     wx.grid.Grid.__init__(self, parent,-1)
     
-    #COLUMNS are fix in basis, ROWS will change right away
-    self.CreateGrid(1, len(ColumnDescriptions))
+    #my DirectoryData: create empty and then my goto
+    self.stampcache = None if config.COLUMNAR_DIRECTORIES else stampcache.Open()    #None: no cache
+    self.dirdata = self.NewDirData()
+      #the data object does not call goto from init, that is my job
     
-    for colnum,coldesc in enumerate(ColumnDescriptions):
-      self.SetColLabelValue(colnum, coldesc.heading)
+    #COLUMNS are fix in basis, ROWS are asked from the virtual table
+    self.table = StamperGridTable(self.dirdata)
+    self.SetTable(self.table, True)
     
     self.dirpath        = None  #must be set, will be asserted
+    self.rowfilter      = None  #the FILTER bar, for every DirectoryData shown
+    
+    #the DIRS shown before (with marks and sort order), and the signature of mine
+    #  from before it was read (None: not read completely, it won't be cached)
+    self.dircache       = dircache.DirectoryCache()
+    self.dirsignature   = None
     
     #find the NAME Column for standard sort
-    self.sortcolIdx     = ColDescDict["name"][0]
-    self.sortReverse    = False
+    #  the sort order is a list of (column index, reverse), the first one is the main column
+    self.sortSpec       = [ (ColDescDict["name"][0], False) ]
     
     #===== GRID-EVENTS =====
       #Double Click is relevant on Directories
@@ -209,99 +371,120 @@ class StamperDirTable (wx.grid.Grid):
     
       #Label/Headline Click can still be sorting,
       #but must be on right click for column selection to work !
+      #  (with SHIFT: add the column as a further sort column)
     self.Bind(wx.grid.EVT_GRID_LABEL_RIGHT_CLICK, self.OnLabelSortClick)
-    
-    #===== FILL WITH DATA =====
-    
-    #my DirectoryData: create empty and then my goto
-    self.dirdata = basis.DirectoryData(AllColumnNames)
-      #the data object does not call goto from init, that is my job
 
-  def GotoDirGrid(self, dirpath, sortIdxAndRev):
+  def NewDirData(self):
+    dirdata = basis.DirectoryData(AllColumnNames, columnar=config.COLUMNAR_DIRECTORIES)
+    dirdata.stampcache = self.stampcache
+    return dirdata
+  
+  def LeaveDirData(self):
+    """my DirectoryData (read completely) is no longer shown: the stamps built for it
+      go into the stamp cache"""
+    self.dirdata.StoreStamps()
+  
+  def UseDirData(self, dirdata):
+    """show another DirectoryData (new or from the cache), with my filter"""
+    self.ClearSelection()
+    self.dirdata = self.table.dirdata = dirdata
+    dirdata.SetFilter(self.rowfilter)
+  
+  def GotoDirGrid(self, dirpath, sortspec, incremental=False, ondone=None):
     #remember what I am displaying (or use what was remembered)
-    if dirpath: self.dirpath = dirpath
-    else:       assert self.dirpath, "GotoDirGrid without a path is not possible the first time"
+    if not dirpath:
+      assert self.dirpath, "GotoDirGrid without a path is not possible the first time"
     
-    if not os.path.isdir(self.dirpath):
-      LogMessageDialog(MSG_ERROR, "Path '%s' is not a directory" % self.dirpath)
+    if not os.path.isdir(dirpath or self.dirpath):
+      LogMessageDialog(MSG_ERROR, "Path '%s' is not a directory" % (dirpath or self.dirpath))
       return    #no Update, do not destroy the current list with nonsense
     
-    #Update my data object =>
-    error = self.dirdata.GotoDir(self.dirpath)
-    if error: LogMessageDialog(MSG_ERROR, error)
+    oldpath = self.dirpath
+    if dirpath: self.dirpath = dirpath
     
     for col,cd in enumerate(ColumnDescriptions):
       self.SetColSize(col,cd.width)
     
-    #=> Refresh Display
-    self.SortRefresh(sortIdxAndRev)
+    #ANOTHER DIR: the one shown so far goes into the cache (if it was read completely),
+    #  the new one comes from there if nothing changed since (with its marks and sort order)
+    cached = None
+    if oldpath and os.path.abspath(self.dirpath)!=os.path.abspath(oldpath):
+      if self.dirsignature:
+        self.LeaveDirData()
+        self.dircache.Put(oldpath, self.dirdata, self.dirsignature, self.sortSpec)
+      cached = self.dircache.Take(self.dirpath)
+      self.UseDirData(cached[0] if cached else self.NewDirData())
+    
+    #Update my data object => as a JOB, STREAMING: the first screenful at once,
+    #  the rest merged in chunk by chunk, always in the current sort order
+    def loaded(error, cancelled, joberror):
+      if error: LogMessageDialog(MSG_ERROR, error)
+      
+      #only a DIR read completely may go into the cache later
+      self.dirsignature = None if (error or cancelled or joberror) else signature
+      
+      #=> Refresh Display (the DIR knows it is sorted already, unless cancelled)
+      self.SortRefresh(sortspec)
+      
+      #plus UTC is displayed outside the grid
+      FatLabel.SetLabel("win=%d utc=%d" % (int(basis.RUNNING_WIN), int(bool(self.dirdata.fsutc))))
+      if ondone: ondone()
+    
+    #from the CACHE: nothing to read
+    if cached:
+      dirdata,signature,cachedspec = cached
+      sortspec = sortspec or cachedspec
+      loaded(None, False, None)
+      return
     
-    #plus UTC is displayed outside the grid
-    FatLabel.SetLabel("win=%d utc=%d" % (int(basis.RUNNING_WIN), int(self.dirdata.fsutc)))
+    signature = dircache.Signature(self.dirpath)      #BEFORE reading: a change meanwhile is seen next time
+    self.dirsignature = None
+    steps = self.dirdata.GotoDirSteps(self.dirpath, incremental, sortcols=self.SortColumns(sortspec))
+    StartJob("Loading %s" % self.dirpath, steps, loaded,
+             lambda done,total,results: self.table.ResetView(self))
+      #incremental: only new/changed entries are rebuilt, marks survive
 
-  def SortRefresh(self, sortIdxAndRev):
-    #===== Set Sorting and Apply to DIR =====
-    if sortIdxAndRev:
-      self.sortcolIdx,self.sortReverse = sortIdxAndRev
-    self.sortcolDesc = ColumnDescriptions[self.sortcolIdx]
-    MainWin.SetStatusText("Sort: %s (%s)" % (self.sortcolDesc.heading, "Z..A" if self.sortReverse else "A..Z"))
-    
-    self.dirdata.ApplySort(self.sortcolDesc.name,self.sortcolDesc.proxyobj,self.sortReverse)
-    
-    #===== now Update the GRID contents from DIR =====
-    numrows = self.dirdata.get_EntriesLen()
-    
-    ##FAIL: this is the intention, but Create works only once
-    ##  self.CreateGrid(numrows, basis.COLNUM)
-    
-    #the COLUMNS will never change, but all ROWS are renewed
-    if self.GetNumberRows():    #no need for empty dirs
-      self.DeleteRows(0,-1)     #delete ALL rows
-    
-    if numrows:
-      self.AppendRows(numrows)  #create the new number
-    
-    #the DIR provides an iter, the COLUMNS provide the sequence, then the FILE is asked
-    for rownum,entry in enumerate(self.dirdata.get_EntriesIterAll()):
-      entry_name = entry.getName()
-      entry_type = entry.getType()
+  def SortColumns(self, sortspec):
+    """the sort order for DirectoryData: [(name,proxy,reverse),...] (None: the one I have)"""
+    return [ (ColumnDescriptions[col].name, ColumnDescriptions[col].proxyobj, reverse) for col,reverse in (sortspec or self.sortSpec) ]
+  
+  def SortRefresh(self, sortspec):
+    with perftrace.Span("SortRefresh"):
+      #===== Set Sorting and Apply to DIR =====
+      if sortspec:
+        self.sortSpec = sortspec
+      sortcols = [ (ColumnDescriptions[col],reverse) for col,reverse in self.sortSpec ]
+      MainWin.SetStatusText("Sort: " + ", ".join("%s (%s)" % (cd.heading, "Z..A" if reverse else "A..Z") for cd,reverse in sortcols))
       
-      for colnum,coldesc in enumerate(ColumnDescriptions):
-        #1.get a single cell value for the file
-        cellvalue = entry.getCellValue(coldesc.name)
-        
-        #2.format as string
-        if isinstance(cellvalue,basis.CellObject):      #a)ask the CellObject
-          cellstringex = cellvalue.getDisplay()
-        
-        else:                                           #b)give the value to the column's proxyobj
-          ##all columns have a proxyobj, as asserted on init
-          cellstringex = coldesc.proxyobj.getDisplay(cellvalue)
-        
-        if type(cellstringex)==type(()):                #CellObject may supply a colour
-          cellstringex,cell_colour = cellstringex
-        else:
-          cell_colour = None
+      #the DIR keeps its sort keys and does nothing if the order can't have changed (eg. new marks)
+      self.dirdata.ApplySortMulti(self.SortColumns(None))
+      
+      #===== now Update the GRID from DIR =====
+      #no cells to fill, the virtual table only announces the number of rows
+      #  and the GRID will ask for the cells it paints
+      with perftrace.Span("ResetView"):
+        self.table.ResetView(self)
+        if perftrace.Enabled: self.Update()
+          ##TRACE: paint right now, the cells asked are part of the refresh then
 
-        self.SetCellValue(rownum,colnum, cellstringex)
-        self.SetReadOnly (rownum,colnum, True)
-        
-        alignmap = { 'L':wx.ALIGN_LEFT, 'C':wx.ALIGN_CENTRE, 'R':wx.ALIGN_RIGHT }
-        self.SetCellAlignment(rownum,colnum, alignmap[coldesc.align], wx.ALIGN_CENTRE)
-        
-        #SET COLOUR by Priority ...
-          #PRIO 1: colour coming from this cell
-        if cell_colour:
-          self.SetCellBackgroundColour(rownum,colnum, cell_colour)
-        
-          #PRIO 2: line colour (Dirs,Special), if we are in the right columns
-        elif colnum in [1,2] and entry.line_colour:
-          self.SetCellBackgroundColour(rownum,colnum, entry.line_colour)
-        
-          #PRIO 3: column colour, used for debug columns
-        elif coldesc.colour:
-          self.SetCellBackgroundColour(rownum,colnum, coldesc.colour)
-        
+  def SetFilterText(self, text):
+    """the FILTER bar changed: only the rows passing it, nothing is read again
+      (the DIR matches its index, the GRID only hears of the new number of rows)"""
+    thefilter,error = rowfilter.ParseFilter(text)
+    if error:
+      MainWin.SetStatusText("Filter: %s" % error)
+      return
+    
+    self.ClearSelection()
+    self.rowfilter = thefilter
+    self.dirdata.SetFilter(thefilter)
+    self.table.ResetView(self)
+    
+    if thefilter:
+      MainWin.SetStatusText("Filter: %d of %d rows" % (self.dirdata.get_EntriesLen(), self.dirdata.get_EntriesLenAll()))
+    else:
+      MainWin.SetStatusText("")
+    MainWin.UpdateMainopText()          #marks hidden by the filter are not acted on
   
   #-------------------------------------------------
   #EVENTS...
@@ -310,6 +493,7 @@ class StamperDirTable (wx.grid.Grid):
     "Double Click is relevant on Directories and for the marker column"
     
     self.ClearSelection()
+    if JobConflict(): return
     
     col = event.GetCol()
     row = event.GetRow()
@@ -326,12 +510,11 @@ class StamperDirTable (wx.grid.Grid):
     ##else:
     ##  ignore for F=File and x=Other...
   
-  def SortItems(self, col,reverse):
-    "from main window Buttons or from local Event OnLabelSortClick"
+  def SortItems(self, sortspec):
+    "from main window Buttons or from local Event OnLabelSortClick, sortspec: [(col,reverse),...]"
     
     self.ClearSelection()
-    sortIdxAndRev = (col, reverse)
-    self.SortRefresh(sortIdxAndRev)
+    self.SortRefresh(sortspec)
       ##without reloading self.dirdata, the MARKER column
       ##must not be destroyed
 
@@ -348,19 +531,33 @@ class StamperDirTable (wx.grid.Grid):
       event.Skip(True)
       return
     
-    #new Column:  sort by this column A..Z       => col!=self.sortcolIdx
+    if JobConflict(): return
+    
+    #SHIFT: this column becomes a further sort column (or toggles if it is one already)
+    if event.ShiftDown():
+      sortspec = list(self.sortSpec)
+      for idx,(sortcol,reverse) in enumerate(sortspec):
+        if sortcol==col:
+          sortspec[idx] = (col, not reverse)
+          break
+      else:
+        sortspec.append( (col,False) )
+      self.SortItems(sortspec)
+      return
+    
+    #new Column:  sort by this column A..Z       => col!=main column
     #same Column: toggle A..Z and Z..A
-    #  translates to: if col!=self.sortcolIdx then False else not self.sortReverse
-    reverse = col==self.sortcolIdx and not self.sortReverse
-    self.SortItems(col,reverse)
+    #  translates to: if col!=main column then False else not its reverse
+    maincol,mainreverse = self.sortSpec[0]
+    reverse = col==maincol and not mainreverse
+    self.SortItems([ (col,reverse) ])
 
   def MarkSelectedRows(self, markmode, pickrows=None):
     if not pickrows:
       pickrows = self.GetSelectedRows()
-    entries = self.dirdata.get_EntriesIterPick(pickrows)
     
-    for entry in entries:
-      entry.ChangeMark(markmode)
+    #all rows at once: the marks are bits of the DIR
+    self.dirdata.MarkRows(pickrows, markmode)
     
     #Update without file refresh like for sorting
     self.SortRefresh(None)
@@ -369,6 +566,24 @@ class StamperDirTable (wx.grid.Grid):
     ##NOT MainDataReset !!
     MainWin.UpdateMainopText()
   
+  def MarkByRule(self, text, markmode=1):
+    """BULK MARKS: all rows shown (only the selected ones if there are) passing a rule
+      in the words of the filter bar, "not ..." marks those NOT passing it"""
+    words = text.split()
+    invert = words[:1]==["not"]
+    
+    rule,error = rowfilter.ParseFilter(" ".join(words[invert:]))
+    if error or not rule:
+      LogMessageDialog(MSG_WARNG, error or "No rule given.")
+      return
+    
+    pickrows = self.GetSelectedRows() or None
+    changed = self.dirdata.MarkMatching(rule, markmode, invert, pickrows)
+    
+    self.SortRefresh(None)
+    MainWin.SetStatusText("Mark: %d entries changed" % changed)
+    MainWin.UpdateMainopText()
+  
   #-------------------------------------------------
   #ACTIONS for THE MAIN FUNCTIONS
   
@@ -376,16 +591,20 @@ class StamperDirTable (wx.grid.Grid):
     return self.dirdata.hasMarkedEntries()
   
   def pickMarkIterator(self):
-    """pick one of 2 iterators to step over the [marked] files"""
+    """pick one of 2 iterators to step over the [marked] files,
+      only the rows shown: a filter narrows the operations too"""
     
     if self.dirdata.hasMarkedEntries():             #if there are Markers we iterate only those files
-      return self.dirdata.get_EntriesIterMarked()
+      return self.dirdata.get_EntriesIterShown(markedonly=True)
     
     else:                                           #Markers seem to be optional for this operation
-      return self.dirdata.get_EntriesIterAll()      #so we iterate all
+      return self.dirdata.get_EntriesIterShown()    #so we iterate all
   
   def markerCounts(self):
-    return "%d files/%d items of %d total" % self.dirdata.countMarkedEntries()
+    text = "%d files/%d items of %d total" % self.dirdata.countMarkedEntries()
+    hidden = self.dirdata.countMarkedHidden()
+    if hidden: text += ", %d hidden by filter" % hidden
+    return text
   
   def DeleteOutputs(self):
     """kill Output data from Grid for situations without a full reload"""
@@ -400,34 +619,58 @@ class StamperDirTable (wx.grid.Grid):
   def ActionAnalyse(self, coldesc1,coldesc2):
     self.DeleteOutputs()
     
-    fileiter = self.pickMarkIterator()
-    for file in fileiter:
-      file.ActionAnalyse(coldesc1,coldesc2)
-    
-    self.SortRefresh(None)
+    #batch comparisons over all [marked] files, as a JOB chunk by chunk
+    #  (the outputs of every chunk are shown right away)
+    StartJob("Analyse", basis.BatchSteps(self.dirdata.ActionAnalyseBatch, self.pickMarkIterator(), coldesc1,coldesc2),
+             lambda result,cancelled,error: self.SortRefresh(None),
+             lambda done,total,results: self.table.ResetView(self))
 
   def ActionColourise(self, coldesc1,coldesc2):
     self.DeleteOutputs()
     
-    fileiter = self.pickMarkIterator()
-    for file in fileiter:
-      file.ActionColourise(coldesc1,coldesc2)
+    #batch comparisons over all [marked] files, as a JOB chunk by chunk
+    StartJob("Colourise", basis.BatchSteps(self.dirdata.ActionColouriseBatch, self.pickMarkIterator(), coldesc1,coldesc2),
+             lambda result,cancelled,error: self.SortRefresh(None),
+             lambda done,total,results: self.table.ResetView(self))
+
+  def ActionPlan(self, coldesc1,coldesc2):
+    """TRANSFER as a dry run, the output column shows new against old stamp"""
+    self.DeleteOutputs()
+    
+    plan = transfer.TransferPlan(self.pickMarkIterator(), coldesc1,coldesc2)
+    for row in plan.rows:
+      if row.compare:
+        severity,seconds = row.compare
+        row.entry.SetOutput( (severity, row.entry.myseveritycolours[severity], seconds) )
     
     self.SortRefresh(None)
-
-  def ActionTransfer(self, coldesc1,coldesc2):
+    return plan
+  
+  def ActionTransfer(self, coldesc1,coldesc2, plan=None):
     self.DeleteOutputs()
     
-    fileiter = self.pickMarkIterator()
-    all = fail = 0
-    for file in fileiter:
-      all += 1
-      if not file.ActionTransfer(coldesc1,coldesc2):
-        fail += 1
+    #all [marked] files in batches: the mtimes are set together on a pool of threads
+    if plan:            #...or exactly the files of a reviewed plan
+      steps = plan.ExecuteSteps()
+    else:
+      steps = transfer.TransferBatch().RunSteps(self.pickMarkIterator(), coldesc1,coldesc2)
     
-    #new Error Handling: tell the user if some Transfers failed
+    #as a JOB: the results come chunk by chunk, a cancel keeps what is done
+    results = []
+    StartJob("Transfer", steps,
+             lambda result,cancelled,error: self.TransferDone(coldesc2, results, cancelled),
+             lambda done,total,chunkresults: results.extend(chunkresults))
+  
+  def TransferDone(self, coldesc2, results, cancelled):
+    done = len(results)
+    fail = [result for result in results if result.ok is False]
+    
+    #new Error Handling: tell the user if some Transfers failed (and why, for the first few)
     if fail:
-      LogMessageDialog(MSG_ERROR, "%d/%d transfers failed." % (fail,all))
+      reasons = "".join("\n%s: %s" % (result.entry.getName(), result.reason) for result in fail[:10])
+      LogMessageDialog(MSG_ERROR, "%d/%d transfers failed.%s" % (len(fail),done,reasons))
+    if cancelled:
+      LogMessageDialog(MSG_WARNG, "Transfer cancelled, %d files were done before." % done)
     
     #for the harmless OPS 1 and 2 SortRefresh was enough
     #the BIG TRANSFER needs more...
@@ -440,8 +683,9 @@ class StamperDirTable (wx.grid.Grid):
       coldesc2.posttransfer()
       #call it as a function, currently used for DirWriteMyFile
     
-    #3.when all is set, order a full reload
-    MainWin.GotoDirMain(self.dirpath)
+    #3.when all is set, reload what the transfer changed
+    ##NOT a full GotoDirMain: unchanged files keep their FileData and marks
+    self.GotoDirGrid(None, None, incremental=True, ondone=MainWin.MainDataReset)
 
 #----------------------------------------------------------------------
 #TOPLEVEL Window and main Program Loop
@@ -454,10 +698,15 @@ class StamperWindow (wx.Frame):
     
     #data stored in main: 2 COLUMNS (ColumnDescription) for the main operations
     self.main_fromto = [None,None]
+    self.lastMarkRule = "sev:dst+"     #the last rule of "[X] by..."
     
     wx.Frame.__init__(self, parent=None, title="TimeStamper GUI", size=(800,600))
-    ##NO NEED self.Bind(wx.EVT_CLOSE, self.OnCloseWindow)
-    self.CreateStatusBar()
+    self.Bind(wx.EVT_CLOSE, self.OnCloseWindow)
+      #a running job is cancelled first
+    self.CreateStatusBar(2 if perftrace.Enabled else 1)
+    if perftrace.Enabled:
+      #the TRACE of the last operation in a field of its own (from the job thread too)
+      perftrace.Report = lambda summary: wx.CallAfter(self.SetStatusText, summary, 1)
     
     #script dir, my icon
     self.pythondir = pythondir
@@ -490,6 +739,12 @@ class StamperWindow (wx.Frame):
     buttonMaker("Refresh", self.ButtRefresh, topsizer1)
     buttonMaker("Go Up",   self.ButtGoUp,    topsizer1)
     
+    #the running JOB: progress and cancel
+    global JobGauge
+    JobGauge = wx.Gauge(self,-1, 100, size=(100,-1))
+    topsizer1.Add(JobGauge, 0, wx.EXPAND)
+    buttonMaker("Cancel",  self.ButtCancel,  topsizer1)
+    
     mainsizer.Add(topsizer1, 0, wx.EXPAND)
     
     #TOP AREA 2: small buttons for mark <- and ->sort
@@ -498,6 +753,15 @@ class StamperWindow (wx.Frame):
     buttonMaker("  [X]  ", self.ButtMarkAll,  topsizer2, style=wx.BU_EXACTFIT)
     buttonMaker("  [ ]  ", self.ButtMarkNone, topsizer2, style=wx.BU_EXACTFIT)
     buttonMaker("  [/]  ", self.ButtMarkInv,  topsizer2, style=wx.BU_EXACTFIT)
+    buttonMaker(" [X] by... ", self.ButtMarkRule, topsizer2, style=wx.BU_EXACTFIT)
+    
+    #the FILTER: every keystroke narrows the rows (see rowfilter.py)
+    global FilterLine
+    topsizer2.Add( wx.StaticText(self,-1," Filter: "), 0, wx.ALIGN_CENTER_VERTICAL)
+    FilterLine = wx.TextCtrl(self,-1, "", size=(250,-1))
+    FilterLine.SetToolTip("name text, .mp4 .mov (extensions), type:F (F/D/x), sev:dst,hours or sev:dst+ (output), has:fname, re:REGEX")
+    FilterLine.Bind(wx.EVT_TEXT, self.FilterLineText)
+    topsizer2.Add(FilterLine, 0, wx.EXPAND)
     
     topsizer2.AddStretchSpacer()
     
@@ -546,6 +810,7 @@ class StamperWindow (wx.Frame):
     buttonMaker("Colourise", self.ButtColourise,bottomsizer)
     
     bottomsizer.Add( wx.StaticText(self,-1,"X\nX\nX"), 0, wx.EXPAND)
+    buttonMaker("Plan...",   self.ButtPlan,     bottomsizer)
     buttonMaker("Transfer!", self.ButtTransfer, bottomsizer)
     
     mainsizer.Add(bottomsizer, 0, wx.EXPAND)
@@ -556,6 +821,11 @@ class StamperWindow (wx.Frame):
     
     self.Show(True)
 
+  def OnCloseWindow(self, event):
+    Jobs.Cancel()       #the worker stops at its next chunk, it is a daemon thread anyway
+    if TableGrid.dirsignature: TableGrid.LeaveDirData()
+    event.Skip()        #the normal close
+  
   def MainDataReset(self):
     self.main_fromto = [None,None]
     ##@@MUEHSAM self.main_fromto = [ColumnDescriptions[9],ColumnDescriptions[6]]
@@ -577,10 +847,8 @@ class StamperWindow (wx.Frame):
     PathLine.SetValue(dirpath)
     
     #goto the dir, Sorting is default
-    TableGrid.GotoDirGrid(dirpath, None)
-    
-    #update the display for the main ops
-    self.MainDataReset()
+    #  then update the display for the main ops
+    TableGrid.GotoDirGrid(dirpath, None, ondone=self.MainDataReset)
   
   #-------------------------------------------------
   #Helper for EVENTS
@@ -607,50 +875,87 @@ class StamperWindow (wx.Frame):
   #===== PATH EVENTS: buttons and from text field =====
   def PathLineEnter(self, event):
     "enter key in path line -> GOTO"
+    if JobConflict(): return
     self.GotoDirMain( PathLine.GetValue() )
   
   def ButtRefresh(self, event):
     "Path: Refresh, stay here"
-    #redisplay, stay where you are
-    TableGrid.GotoDirGrid(None, None)
-      ##only the Grid itself, all the main window decoration can stay
+    if JobConflict(): return
     
-    #we dont call the full GotoDirMain, so we need to reset that manually
-    self.MainDataReset()
+    #a mediaprefs file might have been edited just now
+    #  (and files changed in place, the DIRS in the cache would not see that)
+    mediaprefs.Resolver.Forget()
+    TableGrid.dircache.Forget()
+    
+    #redisplay, stay where you are (only changed entries are rebuilt)
+    #  we dont call the full GotoDirMain, so we need to reset that manually
+    TableGrid.GotoDirGrid(None, None, incremental=True, ondone=self.MainDataReset)
+      ##only the Grid itself, all the main window decoration can stay
   
   def ButtGoUp(self, event):
     "Path: Go Up 1 directory"
+    if JobConflict(): return
     self.GotoDirMain("..")
       ##abspath will do the rest
   
+  def ButtCancel(self, event):
+    "Path: Cancel the running job (loading, analyse, colourise, transfer)"
+    Jobs.Cancel()
+  
+  #===== FILTER EVENT: every keystroke =====
+  def FilterLineText(self, event):
+    "Filter: show only the rows passing it"
+    TableGrid.SetFilterText( FilterLine.GetValue() )
+  
   #===== MARK EVENTS: 3 buttons =====
   def ButtMarkAll(self, event):
     "selected Grid lines -> mark all File objects"
+    if JobConflict(): return
     TableGrid.MarkSelectedRows(1)
   def ButtMarkNone(self, event):
     "selected Grid lines -> unmark all File objects"
+    if JobConflict(): return
     TableGrid.MarkSelectedRows(0)
   def ButtMarkInv(self, event):
     "selected Grid lines -> toggle mark for all File objects"
+    if JobConflict(): return
     TableGrid.MarkSelectedRows(-1)
+  def ButtMarkRule(self, event):
+    "a rule (words like the filter) -> mark all rows passing it (in the selection, if any)"
+    if JobConflict(): return
+    dlg = wx.TextEntryDialog(self, "Mark all rows passing a rule, eg. 'sev:dst+' 'has:fname .jpg' 're:^IMG_\\d+'\n"
+                                   "('not ...' marks those NOT passing it, with selected rows only among them)",
+                             "Mark by rule", self.lastMarkRule)
+    if dlg.ShowModal() == wx.ID_OK:
+      self.lastMarkRule = dlg.GetValue()
+      TableGrid.MarkByRule(self.lastMarkRule)
+    dlg.Destroy()
   
   #===== SORT EVENTS: 2 buttons =====
-    ##LATER: instead of GetOneSelectedColumn, could sort by multiple cols
+    #several selected columns sort by all of them, in the order of selection
+  
+  def GetSelectedColumns(self):
+    if JobConflict(): return []
+    cols = list(TableGrid.GetSelectedCols())
+    if not cols:
+      LogMessageDialog(MSG_WARNG, "No COLUMN selected.")
+    return cols
   
   def ButtSortAZ(self, event):
-    "selected Column: Sort A-Z"
-    col = self.GetOneSelectedColumn()
-    if col>=0:
-      TableGrid.SortItems(col,False)
+    "selected Column(s): Sort A-Z"
+    cols = self.GetSelectedColumns()
+    if cols:
+      TableGrid.SortItems([ (col,False) for col in cols ])
   
   def ButtSortZA(self, event):
-    "selected Column: Sort Z-A"
-    col = self.GetOneSelectedColumn()
-    if col>=0:
-      TableGrid.SortItems(col,True)
+    "selected Column(s): Sort Z-A"
+    cols = self.GetSelectedColumns()
+    if cols:
+      TableGrid.SortItems([ (col,True) for col in cols ])
 
   #===== PREPARE EVENTS: 2 buttons =====
   def SetFromto(self, fromtoidx):
+    if JobConflict(): return
     if fromtoidx==2:
       fromtoidxs = [0,1]
       cols = self.GetOneSelectedColumn(2)
@@ -692,6 +997,7 @@ class StamperWindow (wx.Frame):
   
   def ButtPrepSwap(self, event):
     "Prep Action: Swap from and to"
+    if JobConflict(): return
     self.main_fromto.reverse()
     self.UpdateMainopText()
     TableGrid.DeleteOutputs()
@@ -721,12 +1027,25 @@ class StamperWindow (wx.Frame):
   def checkMainInputs(self, require_marks, require_col1,require_col2):
     """check all Inputs: Grid markers and 2 coldescs according to OPERATION settings"""
     
+    #===== nothing while a job is running
+    if JobConflict(): return True
+    
+    #===== nothing on a directory read only in part (cancelled): Refresh first
+    if TableGrid.dirdata.incomplete:
+      LogMessageDialog(MSG_ERROR, "Directory was not read completely (cancelled), press Refresh first")
+      return True
+    
     #===== Markers in the Grid
     msg1 = ""
     if require_marks:
       if not TableGrid.hasMarkers():
         msg1 = "No Files marked in Table"
     
+    #the operations only see the marked rows shown, never those the filter hides
+    hidden = TableGrid.dirdata.countMarkedHidden()
+    if hidden and hidden == TableGrid.dirdata.countMarkedEntries()[1]:
+      msg1 = "All %d marked entries are hidden by the filter" % hidden
+    
     #===== 2 Columns to pick
     coldesc1,coldesc2 = self.main_fromto
     
@@ -743,6 +1062,11 @@ class StamperWindow (wx.Frame):
     if msg:
       LogMessageDialog(MSG_ERROR, msg)
     
+    #some marks hidden: the operation is done on the others only, say so first
+    elif hidden and require_marks:
+      msg = "%d marked entries are hidden by the filter and are left out." % hidden
+      if QuestionDialog(MSG_WARNG, "%s\n\nContinue ?" % msg, False): msg = ""
+    
     #return errorflag
     return bool(msg)
   
@@ -790,6 +1114,25 @@ class StamperWindow (wx.Frame):
       #  assert that it is allowed as target
     
     TableGrid.ActionTransfer(*self.main_fromto)
+  
+  def ButtPlan(self, event):
+    "Big Action: Transfer as a dry run first, export the plan, then carry it out"
+    if self.checkMainInputs(True, True,"TARGET"): return
+      #the same inputs as TRANSFER, nothing is changed before the last question
+    
+    plan = TableGrid.ActionPlan(*self.main_fromto)
+    summary = plan.Summary()
+    
+    if QuestionDialog(MSG_INFO, "%s\n\nExport the plan to a file ?" % summary, False):
+      dlg = wx.FileDialog(self, "Export the plan", defaultFile="transferplan.txt",
+                          style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+      if dlg.ShowModal() == wx.ID_OK:
+        error = plan.ExportFile(dlg.GetPath())
+        if error: LogMessageDialog(MSG_ERROR, error)
+      dlg.Destroy()
+    
+    if QuestionDialog(MSG_WARNG, "%s\n\nExecute the plan now ?" % summary, False):
+      TableGrid.ActionTransfer(*self.main_fromto, plan=plan)
 
 if __name__ == "__main__":
     #python script directory
@@ -0,0 +1,336 @@
+"""the TRANSFER ENGINE: FileData.ActionTransfer for many files at once
+
+  1.RESOLVE: the normal ActionTransfer for every file (all the formulas,
+    double checks and in-memory stamps), but the batch is passed along and
+    CellObjectStampStat.transferSet only NOTES the new mtime in it instead of
+    doing os.stat/os.utime/os.stat
+  2.APPLY: all notes with os.utime(ns=..) on a pool of threads, one dir_fd
+    per directory, atime from the stat the FileData already have
+  3.VERIFY (optional): one os.stat per file afterwards, in the same pool
+  
+  a big transfer is then bounded by the device and not by python round trips
+  
+  the TRANSFER PLAN is the dry run of all that: old and new stamps, severities
+  and skip/fail reasons for every file, without a single syscall;
+  it can be exported for review and then executed as a whole
+"""
+
+import os,time
+import concurrent.futures
+
+import basis
+import config
+import perftrace
+
+class TransferResult:
+  """what happened to one file:
+    ok is None (empty source, skipped), True or False (then reason says why)"""
+  
+  def __init__(self, entry, ok, reason=None):
+    self.entry  = entry
+    self.ok     = ok
+    self.reason = reason
+
+class _MtimeNote:
+  """one os.utime to do, noted by CellObjectStampStat.transferSet"""
+  
+  def __init__(self, result, stampobj, statint, atime_ns):
+    self.result   = result
+    self.stampobj = stampobj
+    self.statint  = statint     #the new mtime in seconds
+    self.atime_ns = atime_ns    #None: unknown, must stat first
+
+class TransferBatch:
+  def __init__(self, maxworkers=config.TRANSFER_WORKERS, verify=config.TRANSFER_VERIFY):
+    self.maxworkers = maxworkers
+    self.verify     = verify
+    
+    self.notes   = []
+    self.current = None         #the TransferResult of the file in ActionTransfer right now
+  
+  #===== 1.RESOLVE
+  def AddMtime(self, stampobj, statint):
+    """callback from CellObjectStampStat.transferSet(.., batch) (instead of the syscalls)"""
+    entry = self.current.entry
+    
+    #the stat of the FileData is the one from os.scandir, still good for atime
+    atime_ns = getattr(getattr(entry, "mystat", None), "st_atime_ns", None)
+      ##_fakeStat and the columnar stat don't have it
+    self.notes.append( _MtimeNote(self.current, stampobj, statint, atime_ns) )
+  
+  def Run(self, entries, coldesc1,coldesc2):
+    """THE TRANSFER for all entries (files only, like ActionTransfer),
+      returns a list of TransferResult in the order of the files"""
+    results = []
+    for done,total,chunkresults in self.RunSteps(entries, coldesc1,coldesc2):
+      results.extend(chunkresults)
+    return results
+  
+  def RunSteps(self, entries, coldesc1,coldesc2, chunksize=None):
+    """Run in STEPS (basis.BatchSteps), one complete transfer per chunk:
+      yields (entries done, all entries, the TransferResults of the chunk)"""
+    entries = list(entries)
+    chunksize = chunksize or config.JOB_CHUNK
+    
+    with perftrace.Span("Transfer", fromcol=coldesc1.name, tocol=coldesc2.name):
+      for start in range(0, len(entries), chunksize):
+        yield (min(start+chunksize, len(entries)), len(entries), self.RunChunk(entries[start:start+chunksize], coldesc1,coldesc2))
+  
+  def RunChunk(self, entries, coldesc1,coldesc2):
+    """1.RESOLVE for the chunk, then 2.APPLY and 3.VERIFY for its notes"""
+    results = []
+    
+    try:
+      with perftrace.Span("resolve"):
+        for entry in entries:
+          if entry.getType()!='F': continue
+          
+          self.current = TransferResult(entry, None)
+          try:
+            ok = entry.ActionTransfer(coldesc1,coldesc2, self)
+          
+          #one file failing its double check must not stop the chunk (like TransferPlan._planRow)
+          except ValueError as ex:      #eg. month=13
+            self.current.ok = False
+            self.current.reason = "no valid stamp for this target: %s" % str(ex)
+            results.append(self.current)
+            continue
+          except AssertionError:        #eg. a stamp in the DST gap (02:30 on the day of the change)
+            self.current.ok = False
+            self.current.reason = "the stamp does not survive the conversion back"
+            results.append(self.current)
+            continue
+          
+          if ok is not None:
+            self.current.ok = ok
+            if not ok: self.current.reason = "no valid stamp for this target"
+          results.append(self.current)
+    
+    finally:
+      self.current = None
+    
+    #2.+3. the filesystem, only for files that did not fail already
+    notes = [note for note in self.notes if note.result.ok]
+    self.notes = []
+    with perftrace.Span("apply"):
+      self.ApplyNotes(notes)
+    perftrace.Count("files", len(results))
+    perftrace.Count("mtimes set", len(notes))
+    
+    return results
+  
+  #===== 2.APPLY and 3.VERIFY
+  def ApplyNotes(self, notes):
+    if not notes: return
+    
+    #one directory fd for all files in it, if the platform can do that (not Windows)
+    use_dir_fd = os.utime in os.supports_dir_fd and os.stat in os.supports_dir_fd
+    dirfds = {}
+    
+    try:
+      if use_dir_fd:
+        for note in notes:
+          dirpath = os.path.dirname(note.stampobj.fullpath)
+          if dirpath not in dirfds:
+            try:
+              dirfds[dirpath] = os.open(dirpath or ".", os.O_RDONLY)
+            except OSError:
+              dirfds[dirpath] = None    #then with the full path
+      
+      with concurrent.futures.ThreadPoolExecutor(max_workers=self.maxworkers) as pool:
+        list( pool.map(lambda note: self._applyOne(note, dirfds), notes) )
+        
+        if self.verify:
+          list( pool.map(lambda note: self._verifyOne(note, dirfds), [note for note in notes if note.result.ok]) )
+    
+    finally:
+      for fd in dirfds.values():
+        if fd is not None: os.close(fd)
+  
+  @staticmethod
+  def _pathArgs(note, dirfds):
+    """(path, keywords) for the os calls: the name plus dir_fd, or the full path"""
+    fullpath = note.stampobj.fullpath
+    dirfd = dirfds.get(os.path.dirname(fullpath))
+    if dirfd is None: return fullpath, {}
+    return os.path.basename(fullpath), {"dir_fd":dirfd}
+  
+  def _applyOne(self, note, dirfds):
+    path,kwargs = self._pathArgs(note, dirfds)
+    try:
+      atime_ns = note.atime_ns
+      if atime_ns is None:
+        atime_ns = os.stat(path, **kwargs).st_atime_ns
+      
+      os.utime(path, ns=(atime_ns, note.statint * 10**9), **kwargs)    #keep atime, set new mtime !!
+    
+    except OSError as ex:       #not allowed to Set new Time
+      note.result.ok = False
+      note.result.reason = str(ex)
+  
+  def _verifyOne(self, note, dirfds):
+    """like the old 'triple check', but a failure is reported and not asserted"""
+    path,kwargs = self._pathArgs(note, dirfds)
+    try:
+      mtime_ns = os.stat(path, **kwargs).st_mtime_ns
+    except OSError as ex:
+      note.result.ok = False
+      note.result.reason = "verify: %s" % str(ex)
+      return
+    
+    #FAT/exFAT store the mtime in 2 seconds: an odd second comes back as its neighbour
+    if abs(mtime_ns // 10**9 - note.statint) >= config.TRANSFER_VERIFY_RESOLUTION:
+      note.result.ok = False
+      note.result.reason = "verify: mtime is %s" % time.strftime(config.DATA_TIMESTAMP_FORMAT, note.stampobj._int2struct(mtime_ns // 10**9))
+
+#----------------------------------------------------------------------
+#the DRY RUN: the transfer as a plan, computed for all files at once
+
+class PlannedTransfer:
+  """one file of a TransferPlan, status is one of
+    "change", "same" (the target shows the source already),
+    "skip" (empty source) or "fail" (then reason says why)"""
+  
+  def __init__(self, entry, path):
+    self.entry  = entry
+    self.path   = path
+    self.status = None
+    self.reason = None
+    
+    self.oldstruct = None       #the target stamp now
+    self.newstruct = None       #...and after the transfer (the source stamp)
+    self.oldepoch  = None       #both as basis.StampEpoch
+    self.newepoch  = None
+    self.compare   = None       #(severityname, seconds) of new against old, like ANALYSE
+    self.statint   = None       #the new mtime in seconds, None for the datafile
+
+def _structText(structtime):
+  if not structtime: return ""
+  try:
+    return time.strftime(config.DATA_TIMESTAMP_FORMAT, structtime)
+  except ValueError:
+    return config.DATA_TIMESTAMP_ERROR
+
+class TransferPlan:
+  """what TransferBatch.Run would do to the entries, but nothing is changed:
+    neither the stamp objects nor the filesystem"""
+  
+  HEADING = ["path", "status", "old", "new", "severity", "seconds", "mtime", "reason"]
+  
+  def __init__(self, entries, coldesc1,coldesc2):
+    self.coldesc1 = coldesc1
+    self.coldesc2 = coldesc2
+    
+    files = [entry for entry in entries if entry.getType()=='F']
+    colname1 = "col_"+coldesc1.name
+    colname2 = "col_"+coldesc2.name
+    
+    #1.ALL EPOCHS AND SEVERITIES in one go, like DirectoryData.ActionAnalyseBatch
+    newepochs = basis.ColumnEpochs(files, colname1)
+    oldepochs = basis.ColumnEpochs(files, colname2)
+    compares  = basis.CompareEpochColumns(newepochs, oldepochs)
+    
+    #2.per file only the formulas of the target (transferPlan instead of transferSet)
+    self.rows = []
+    for entry,newepoch,oldepoch,compare in zip(files, newepochs,oldepochs, compares):
+      row = PlannedTransfer(entry, os.path.join(entry.mydir.dirpath, entry.getName()))
+      row.newepoch, row.oldepoch, row.compare = newepoch, oldepoch, compare
+      
+      stampobj2 = entry._getCellValueCol(colname2)
+      row.newstruct = entry._getCellValueCol(colname1).transferGet()
+      row.oldstruct = stampobj2.transferGet()
+      self._planRow(row, stampobj2)
+      self.rows.append(row)
+  
+  @staticmethod
+  def _planRow(row, stampobj2):
+    #empty source is normal, ignored silently (like ActionTransfer)
+    if not row.newstruct:
+      row.status = "skip"
+      row.reason = "no source stamp"
+      return
+    
+    try:
+      row.statint = stampobj2.transferPlan(row.newstruct)
+    except ValueError as ex:    #eg. ctime, month=13
+      row.status = "fail"
+      row.reason = "no valid stamp for this target: %s" % str(ex)
+      return
+    except AssertionError:      #one of the double checks of the formulas
+      row.status = "fail"
+      row.reason = "the stamp does not survive the conversion back"
+      return
+    
+    if row.compare and row.compare[0]==basis.SEVERITY_NAMES[0]:
+      row.status = "same"
+    else:
+      row.status = "change"
+  
+  def Counts(self):
+    """{status: number of files}"""
+    counts = {}
+    for row in self.rows:
+      counts[row.status] = counts.get(row.status, 0) + 1
+    return counts
+  
+  def Summary(self):
+    counts = self.Counts()
+    return "Plan %s -> %s: %s" % (self.coldesc1.name, self.coldesc2.name,
+                                  ", ".join("%d %s" % (counts.get(status,0), status) for status in ["change","same","skip","fail"]))
+  
+  #===== REVIEW
+  def Lines(self):
+    """one list of texts per file, as in HEADING"""
+    for row in self.rows:
+      severity,seconds = row.compare or ("", "")
+      yield [row.path, row.status, _structText(row.oldstruct), _structText(row.newstruct),
+             severity, str(seconds), "" if row.statint is None else str(row.statint), row.reason or ""]
+  
+  def Export(self, fileobj):
+    """the plan as text, tab separated with a heading line"""
+    fileobj.write("\t".join(self.HEADING) + "\n")
+    for fields in self.Lines():
+      fileobj.write("\t".join(fields) + "\n")
+  
+  def ExportFile(self, filename):
+    try:
+      with open(filename, "wt", encoding="utf8", newline='\n') as planfile:
+        self.Export(planfile)
+    except OSError as ex:
+      return "cannot write the plan: %s" % str(ex)
+    return None         #OK, no message
+  
+  #===== EXECUTE
+  def Execute(self, batch=None):
+    """carry out the plan: ONE TransferBatch for all files planned as "change"
+      a file whose stamps are not what the plan saw any more fails instead
+      returns a TransferResult for each of these files, in plan order"""
+    results = {}
+    for done,total,stepresults in self.ExecuteSteps(batch):
+      for result in stepresults:
+        results[id(result.entry)] = result
+    
+    return [results[id(row.entry)] for row in self.rows if row.status=="change"]
+  
+  def ExecuteSteps(self, batch=None, chunksize=None):
+    """Execute in STEPS (basis.BatchSteps): yields (files done, all files, their TransferResults),
+      the files that changed since the plan first"""
+    batch = batch or TransferBatch()
+    colname1 = "col_"+self.coldesc1.name
+    colname2 = "col_"+self.coldesc2.name
+    
+    todo = [row for row in self.rows if row.status=="change"]
+    stale = []
+    runnable = []
+    for row in todo:
+      entry = row.entry
+      if entry._getCellValueCol(colname1).transferGet()!=row.newstruct or entry._getCellValueCol(colname2).transferGet()!=row.oldstruct:
+        stale.append( TransferResult(entry, False, "changed since the plan") )
+      else:
+        runnable.append(entry)
+    
+    if stale:
+      yield (len(stale), len(todo), stale)
+    
+    for done,total,results in batch.RunSteps(runnable, self.coldesc1,self.coldesc2, chunksize):
+      yield (len(stale)+done, len(todo), results)
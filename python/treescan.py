@@ -0,0 +1,61 @@
+"""scanning a whole TREE of directories, one basis.DirectoryData per directory;
+  several directories are read at the same time on a bounded pool of threads"""
+
+import os,collections
+import concurrent.futures
+
+import basis
+
+def ScanOneDir(dirpath, AllColumnNames):
+  """one job for the pool: a new DirectoryData with all entries of dirpath
+    returns (dirdata, errormessage) like DirectoryData.GotoDir"""
+  dirdata = basis.DirectoryData(AllColumnNames)
+
+  #the directory may be gone since its parent was listed, GotoDir would assert
+  if not os.path.isdir(dirpath):
+    dirdata.dirpath = dirpath
+    return dirdata, "Path '%s' is not a directory" % dirpath
+
+  #GotoDir resolves timestampmode (mediaprefs) and the datafile, then builds the FileData
+  errormessage = dirdata.GotoDir(dirpath)
+  return dirdata, errormessage
+
+def ScanTree(rootpath, AllColumnNames, maxworkers=4, maxinflight=None, followlinks=False):
+  """GENERATOR over (dirdata, errormessage) for rootpath and all directories below,
+    in the order in which the directories are FINISHED (not in tree order)
+
+    ! at most maxinflight directories are being read or waiting for the consumer,
+      so memory is bounded by that number and not by the size of the tree
+    ! symlinked subdirectories are not followed unless followlinks (no loops)
+  """
+  maxinflight = maxinflight or 2*maxworkers
+
+  pending  = collections.deque([rootpath])     #paths only, cheap
+  inflight = set()                              #futures of ScanOneDir
+
+  with concurrent.futures.ThreadPoolExecutor(max_workers=maxworkers) as pool:
+    try:
+      while pending or inflight:
+        #1.keep the pool busy, but never more than maxinflight
+        while pending and len(inflight) < maxinflight:
+          inflight.add( pool.submit(ScanOneDir, pending.popleft(), AllColumnNames) )
+
+        #2.wait for the first to finish
+        done,inflight = concurrent.futures.wait(inflight, return_when=concurrent.futures.FIRST_COMPLETED)
+
+        for future in done:
+          dirdata,errormessage = future.result()
+
+          #3.subdirectories are new work, the FileData still know their os.DirEntry
+          for entry in dirdata.get_EntriesIterAll():
+            if entry.getType()!='D': continue
+            if not followlinks and entry.mydirentry.is_symlink(): continue
+            pending.append( os.path.join(dirdata.dirpath, entry.getName()) )
+
+          #4.hand it over, the consumer decides how long to keep it
+          yield dirdata,errormessage
+
+    finally:
+      #consumer stopped early (break, exception): don't wait for the whole queue
+      for future in inflight:
+        future.cancel()
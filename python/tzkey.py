@@ -0,0 +1,22 @@
+"""the ZONE KEY: which local timezone the process has right now
+
+  libc does all the local time conversions (time.localtime, time.mktime),
+  every cache of local times (fnamestamp memo, stampcache, catalog, dircache)
+  keeps the key it was made with and is outdated when that is not the key anymore
+  ! the TZ of the process may change while it runs (time.tzset),
+    so RevalidateZone() is called for every directory
+"""
+
+import os,time
+
+ZoneKey = None          #a new object whenever TZ changes: "is not" is enough to compare
+
+def RevalidateZone():
+  """cheap check whether the timezone of the process is still the same one,
+    returns ZoneKey"""
+  global ZoneKey
+  key = (os.environ.get("TZ"), time.tzname, time.timezone, time.altzone)
+  if key != ZoneKey: ZoneKey = key
+  return ZoneKey
+
+RevalidateZone()